@@ -0,0 +1,58 @@
+"""
+Times file lookups on a resource with a large number of files, without connecting to HydroShare.
+
+    python benchmarks/file_lookup.py --files 50000
+
+Lookups on path, name, extension, folder and checksum go through a hash index built on first use, so the first
+lookup pays for building the index and later lookups take constant time regardless of the number of files.
+"""
+import argparse
+import hashlib
+import time
+
+from hsclient.hydroshare import Aggregation, File
+
+RESOURCE_PATH = "/resource/b4ce17c17c654a5c8004af73f2df87ab/data/contents/"
+
+
+def synthetic_aggregation(n_files: int, files_per_folder: int = 100) -> Aggregation:
+    aggregation = Aggregation(RESOURCE_PATH + "resourcemap.xml", None)
+    aggregation._parsed_files = []
+    for i in range(n_files):
+        path = f"folder{i // files_per_folder}/file{i}.txt"
+        aggregation._parsed_files.append(File(path, RESOURCE_PATH + path, hashlib.md5(path.encode()).hexdigest()))
+    aggregation._parsed_aggregations = []
+    return aggregation
+
+
+def timed(label: str, func, repeat: int) -> None:
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / repeat * 1e6:12.1f} us/lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    aggregation = synthetic_aggregation(args.files)
+    paths = [file.path for file in aggregation._files]
+    step = max(1, args.files // args.lookups)
+
+    for key in Aggregation._indexed_file_properties:
+        start = time.perf_counter()
+        aggregation._file_index(key)
+        print(f"{'building the ' + key + ' index':<40} {(time.perf_counter() - start) * 1e3:12.1f} ms")
+    timed("file(path=...)", lambda i: aggregation.file(path=paths[i * step % args.files]), args.lookups)
+    timed("file(name=...)", lambda i: aggregation.file(name=f"file{i * step % args.files}.txt"), args.lookups)
+    timed("files(folder=...)", lambda i: aggregation.files(folder=f"folder{i % (args.files // 100 or 1)}"), 100)
+    timed("files(folder=..., extension=...)", lambda i: aggregation.files(folder="folder1", extension=".txt"), 100)
+    timed("file(url=...) (unindexed, full scan)", lambda i: aggregation.file(url=RESOURCE_PATH + paths[-1]), 10)
+
+
+if __name__ == "__main__":
+    main()
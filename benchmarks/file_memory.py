@@ -0,0 +1,54 @@
+"""
+Measures the memory used per File on a resource with a large number of files, without connecting to HydroShare.
+
+    python benchmarks/file_memory.py --files 200000
+
+File stores its url as a prefix shared by every file in the resource and its checksum as a 16 byte digest.  For
+comparison, the same files are also built with the url and hex checksum stored as separate strings in a __dict__.
+"""
+import argparse
+import hashlib
+import tracemalloc
+
+from hsclient.hydroshare import File
+
+RESOURCE_PATH = "/resource/b4ce17c17c654a5c8004af73f2df87ab/data/contents/"
+
+
+class DictFile(str):
+    """A File storing the full url and hex checksum strings in its __dict__"""
+
+    def __new__(cls, value, file_url, checksum):
+        return super(DictFile, cls).__new__(cls, value)
+
+    def __init__(self, value, file_url, checksum):
+        self._file_url = file_url
+        self._checksum = checksum
+
+
+def measure(file_class, n_files: int) -> float:
+    """The bytes still allocated per file once the strings parsed from the resource map and manifest are released"""
+    tracemalloc.start()
+    files = []
+    for i in range(n_files):
+        path = f"folder{i // 100}/file{i}.txt"
+        files.append(file_class(path, RESOURCE_PATH + path, hashlib.md5(path.encode()).hexdigest()))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / n_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=200000)
+    args = parser.parse_args()
+
+    dict_file = measure(DictFile, args.files)
+    file = measure(File, args.files)
+    print(f"{'url and checksum strings in __dict__':<40} {dict_file:8.0f} bytes/file")
+    print(f"{'File':<40} {file:8.0f} bytes/file")
+    print(f"{'saved for ' + str(args.files) + ' files':<40} {(dict_file - file) * args.files / 1024 ** 2:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
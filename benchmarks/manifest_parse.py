@@ -0,0 +1,56 @@
+"""
+Times parsing the manifest-md5.txt of a resource with a large number of files, without connecting to HydroShare.
+
+    python benchmarks/manifest_parse.py --files 500000
+
+The manifest is parsed line by line as it is downloaded into a dictionary of paths to 16 byte digests.  For
+comparison, it is also parsed the way it is when the whole document is decoded into one string first, with each path
+quoted and each checksum kept as a hex string.
+"""
+import argparse
+import hashlib
+import io
+import time
+import tracemalloc
+from urllib.parse import quote
+
+from hsclient.hydroshare import Aggregation
+
+
+def parse_string(content: bytes):
+    file_str = content.decode()
+    return {quote(path): checksum for checksum, path in (line.split("    ") for line in file_str.split("\n") if line)}
+
+
+def parse_streamed(content: bytes):
+    # BytesIO stands in for the response, which is read in chunks and split into lines by iter_lines
+    return Aggregation._parse_checksums(line.rstrip(b"\n") for line in io.BytesIO(content))
+
+
+def measure(label: str, parse, content: bytes) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    checksums = parse(content)
+    elapsed = time.perf_counter() - start
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {elapsed:8.2f} s {size / 1024 ** 2:10.1f} MiB kept {peak / 1024 ** 2:10.1f} MiB peak")
+    return checksums
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=500000)
+    args = parser.parse_args()
+
+    content = b"".join(
+        f"{hashlib.md5(str(i).encode()).hexdigest()}    data/contents/folder{i // 100}/file {i}.txt\n".encode()
+        for i in range(args.files)
+    )
+    print(f"manifest of {args.files} files, {len(content) / 1024 ** 2:.1f} MiB")
+    measure("decoded string", parse_string, content)
+    measure("streamed lines", parse_streamed, content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Times building a table of search results from json pages, without connecting to HydroShare.
+
+    python benchmarks/search_dataframe.py --results 50000
+
+The columns of the DataFrame are built directly from the pages.  For comparison, a ResourcePreview is validated for
+each result first, with and without validation, and the DataFrame is built from the models.
+"""
+import argparse
+import time
+
+import pandas
+
+from hsclient.json_models import ResourcePreview
+from hsclient.tables import columns_to_dataframe, result_columns
+
+
+def from_models(pages, validate: bool):
+    previews = [ResourcePreview.from_result(item, validate=validate) for results in pages for item in results]
+    return pandas.DataFrame([preview.dict() for preview in previews])
+
+
+def from_columns(pages):
+    return columns_to_dataframe(result_columns(pages))
+
+
+def measure(label: str, build, *args) -> None:
+    start = time.perf_counter()
+    build(*args)
+    print(f"{label:<30} {time.perf_counter() - start:8.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--results", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    results = [
+        {
+            "resource_id": f"{i:032x}",
+            "resource_title": f"resource {i}",
+            "resource_type": "CompositeResource",
+            "authors": None if i % 10 == 0 else ["Black, Scott", "Horsburgh, Jeff"],
+            "date_created": "2021-05-11T18:51:53.041587Z",
+            "date_last_updated": "2021-06-01T08:00:00Z",
+            "public": True,
+            "discoverable": True,
+            "coverages": [{"type": "point", "value": {"north": 41.7, "east": -111.8, "units": "Decimal degrees"}}],
+        }
+        for i in range(args.results)
+    ]
+    pages = [results[i : i + args.page_size] for i in range(0, len(results), args.page_size)]
+    print(f"{args.results} results in {len(pages)} pages")
+    measure("validated models", from_models, pages, True)
+    measure("constructed models", from_models, pages, False)
+    measure("columns from json", from_columns, pages)
+
+
+if __name__ == "__main__":
+    main()
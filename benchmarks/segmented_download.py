@@ -0,0 +1,80 @@
+"""
+Measures download throughput against the number of segments a file is downloaded in, from a local server which
+limits the bandwidth of each connection the way a long distance TCP stream is limited.
+
+    python benchmarks/segmented_download.py --size 64 --rate 16 --segments 1 2 4 8
+"""
+import argparse
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hsclient import HydroShare
+
+PATH = "/resource/b4ce17c17c654a5c8004af73f2df87ab/data/contents/large.bin"
+
+
+def throttled_server(content: bytes, rate: float) -> ThreadingHTTPServer:
+    """A server for content which answers Range requests and sends at most rate bytes per second per connection"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            start, end = 0, len(content) - 1
+            range_header = self.headers.get("Range")
+            if range_header:
+                first, last = range_header.split("=", 1)[1].split("-", 1)
+                start, end = int(first), int(last or end)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Disposition", 'attachment; filename="large.bin"')
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", '"large"')
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            block = 64 * 1024
+            began = time.perf_counter()
+            try:
+                for offset in range(start, end + 1, block):
+                    data = content[offset : min(offset + block, end + 1)]
+                    self.wfile.write(data)
+                    sent = offset + len(data) - start
+                    time.sleep(max(0.0, sent / rate - (time.perf_counter() - began)))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=64, help="size of the file in MiB")
+    parser.add_argument("--rate", type=float, default=16, help="bandwidth of each connection in MiB/s")
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    content = bytes(range(256)) * (args.size * 4096)
+    server = throttled_server(content, args.rate * 1024 ** 2)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=server.server_address[1])
+    print(f"{args.size} MiB file, {args.rate:g} MiB/s per connection")
+    for segments in args.segments:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            hs._hs_session.retrieve_file(PATH, tmp, segments=segments)
+            elapsed = time.perf_counter() - start
+        print(f"{segments:>3} segments {elapsed:8.2f} s {args.size / elapsed:10.1f} MiB/s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
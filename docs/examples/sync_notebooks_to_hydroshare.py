@@ -1,14 +1,11 @@
 from hsclient.hydroshare import HydroShare
-import os
 
 hs = HydroShare()
 hs.sign_in()
 
 res = hs.resource("7561aa12fd824ebb8edbee05af19b910")
-for root, directories, files in os.walk("."):
-    root = root[2:]
-    file_paths = [os.path.join(root, f) for f in files if f[0] != "." and f.endswith(".ipynb")]
-    if not res.file(folder=root):
-        res.folder_create(root)
-    res.file_upload(*file_paths, destination_path=root)
-    break
+# uploads only the notebooks at the top of this folder that are new or changed since they were last uploaded
+result = res.sync(".", direction="push", include=["*.ipynb"])
+print(f"uploaded {len(result['uploaded'])} files")
+for path, error in result["errors"].items():
+    print(f"failed to upload {path}: {error}")
@@ -1 +1,2 @@
+from hsclient.exceptions import ChecksumMismatchError, FileChangedError, HydroShareHTTPError, HydroShareTaskError
 from hsclient.hydroshare import Aggregation, File, HydroShare, Resource
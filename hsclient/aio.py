@@ -0,0 +1,501 @@
+"""
+An asyncio client for HydroShare mirroring the HydroShare, Resource and Aggregation classes.  Requires aiohttp, which is
+installed with `pip install hsclient[async]`.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from posixpath import basename, join as urljoin
+from typing import AsyncIterator, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+from hsmodels.schemas import load_rdf
+from hsmodels.schemas.base_models import BaseMetadata
+from hsmodels.schemas.fields import BoxCoverage, PointCoverage
+
+from hsclient.exceptions import HydroShareHTTPError
+from hsclient.hydroshare import Aggregation, File, HydroShare, HydroShareSession, Resource, search_params
+from hsclient.json_models import ResourcePreview, User
+from hsclient.utils import backoff_delays, encode_resource_url, task_status_ready
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    raise ImportError("The hsclient asyncio client requires aiohttp, install it with `pip install hsclient[async]`")
+
+
+class AsyncAggregation:
+    """
+    Represents an Aggregation in HydroShare.  The resource map, metadata and checksums of the aggregation and of every
+    aggregation it contains are retrieved concurrently by refresh(), after which metadata and filtering are served
+    locally.
+    """
+
+    _sync_class = Aggregation
+
+    def __init__(self, map_path, hs_session, checksums=None):
+        self._hs_session = hs_session
+        self._aggregation = self._sync_class(map_path, None, checksums)
+        self._loaded = False
+
+    @classmethod
+    def _wrap(cls, aggregation: Aggregation, hs_session) -> "AsyncAggregation":
+        instance = cls.__new__(cls)
+        instance._hs_session = hs_session
+        instance._aggregation = aggregation
+        instance._loaded = True
+        return instance
+
+    def __str__(self):
+        return str(self._aggregation)
+
+    async def _retrieve_and_parse(self, path):
+        return load_rdf(await self._hs_session.retrieve_string(path))
+
+    async def _load(self, aggregation: Aggregation, checksums: bool = False) -> None:
+        aggregation._retrieved_map = await self._retrieve_and_parse(aggregation._map_path)
+        documents = [self._retrieve_and_parse(aggregation.metadata_path)]
+        if checksums:
+            documents.append(self._hs_session.retrieve_string(aggregation._checksums_path))
+        retrieved = await asyncio.gather(*documents)
+        aggregation._retrieved_metadata = retrieved[0]
+        if checksums:
+            aggregation._parsed_checksums = Aggregation._parse_checksums(retrieved[1].encode().splitlines())
+        await asyncio.gather(*(self._load(child) for child in aggregation._aggregations))
+
+    async def refresh(self) -> None:
+        """
+        Retrieves the resource map and metadata files of the aggregation and the aggregations it contains concurrently
+        """
+        self._aggregation.refresh()
+        await self._load(self._aggregation, checksums=True)
+        self._loaded = True
+
+    @property
+    def _loaded_aggregation(self) -> Aggregation:
+        if not self._loaded:
+            raise RuntimeError("{} has not been retrieved, await refresh() first".format(self))
+        return self._aggregation
+
+    @property
+    def metadata(self) -> BaseMetadata:
+        """A metadata object for reading and updating metadata values"""
+        return self._loaded_aggregation.metadata
+
+    @property
+    def metadata_file(self):
+        """The path to the metadata file"""
+        return self._loaded_aggregation.metadata_file
+
+    @property
+    def metadata_path(self) -> str:
+        """The path to the metadata file"""
+        return self._loaded_aggregation.metadata_path
+
+    @property
+    def main_file_path(self) -> str:
+        """The path to the main file in the aggregation"""
+        return self._loaded_aggregation.main_file_path
+
+    async def files(self, search_aggregations: bool = False, **kwargs) -> List[File]:
+        """
+        List files and filter by properties on the file object using kwargs (i.e. extension='.txt')
+        :param search_aggregations: Defaults False, set to true to search aggregations
+        :params **kwargs: Search by properties on the File object (path, name, extension, folder, checksum url)
+        :return: a List of File objects matching the filter parameters
+        """
+        if not self._loaded:
+            await self.refresh()
+        return self._aggregation.files(search_aggregations=search_aggregations, **kwargs)
+
+    async def file(self, search_aggregations=False, **kwargs) -> File:
+        """
+        Returns a single file in the resource that matches the filtering parameters
+        :param search_aggregations: Defaults False, set to true to search aggregations
+        :params **kwargs: Search by properties on the File object (path, name, extension, folder, checksum url)
+        :return: A File object matching the filter parameters or None if no matching File was found
+        """
+        if not self._loaded:
+            await self.refresh()
+        return self._aggregation.file(search_aggregations=search_aggregations, **kwargs)
+
+    async def aggregations(self, **kwargs) -> List["AsyncAggregation"]:
+        """
+        List the aggregations in the resource.  Filter by properties on the metadata object using kwargs, see
+        Aggregation.aggregations for the filtering rules.
+        :params **kwargs: Search by properties on the metadata object
+        :return: a List of AsyncAggregation objects matching the filter parameters
+        """
+        if not self._loaded:
+            await self.refresh()
+        return [
+            AsyncAggregation._wrap(aggregation, self._hs_session)
+            for aggregation in self._aggregation.aggregations(**kwargs)
+        ]
+
+    async def aggregation(self, **kwargs) -> Optional["AsyncAggregation"]:
+        """
+        Returns a single AsyncAggregation in the resource that matches the filtering parameters.
+        :params **kwargs: Search by properties on the metadata object
+        :return: An AsyncAggregation object matching the filter parameters or None if no matching Aggregation was found.
+        """
+        aggregations = await self.aggregations(**kwargs)
+        if aggregations:
+            return aggregations[0]
+        return None
+
+    async def _download(self, save_path: str = "", unzip_to: str = None) -> str:
+        aggregation = self._loaded_aggregation
+        path = urljoin(aggregation._resource_path, "data", "contents", aggregation.main_file_path)
+        params = {"zipped": "true", "aggregation": "true"}
+        path = path.replace('resource', 'django_irods/rest_download', 1)
+        downloaded_zip = await self._hs_session.retrieve_zip(path, save_path=save_path, params=params)
+
+        if unzip_to:
+            import zipfile
+
+            with zipfile.ZipFile(downloaded_zip, 'r') as zip_ref:
+                zip_ref.extractall(unzip_to)
+            os.remove(downloaded_zip)
+            return unzip_to
+        return downloaded_zip
+
+
+class AsyncResource(AsyncAggregation):
+    """Represents a Resource in HydroShare"""
+
+    _sync_class = Resource
+
+    @property
+    def resource_id(self) -> str:
+        """The resource id (guid) of the HydroShare resource"""
+        return self._loaded_aggregation.resource_id
+
+    async def _upload(self, file, destination_path):
+        path = urljoin(self._loaded_aggregation._hsapi_path, "files", destination_path.strip("/"))
+        with open(file, 'rb') as f:
+            await self._hs_session.upload_file(path, files={'file': f}, status_code=201)
+
+    async def file_upload(self, *files: str, destination_path: str = "") -> Dict[str, Optional[Exception]]:
+        """
+        Uploads files to a folder in HydroShare.  Each file is uploaded concurrently in its own request.
+        :param *files: The local file paths to upload
+        :param destination_path: The path on HydroShare to upload the files to, defaults to the root contents directory
+        :return: A dictionary of each local file path to the Exception raised while uploading it, or None if the upload
+            succeeded
+        """
+        results = await asyncio.gather(
+            *(self._upload(file, destination_path) for file in files), return_exceptions=True
+        )
+        await self.refresh()
+        return {file: result for file, result in zip(files, results)}
+
+    async def file_download(self, path: str, save_path: str = "", zipped: bool = False) -> str:
+        """
+        Downloads a file from HydroShare
+        :param path: The path to the file
+        :param save_path: The local path to save the file to
+        :param zipped: Defaults to False, set to True to download the file zipped
+        :returns: The path to the downloaded file
+        """
+        path = urljoin(self._loaded_aggregation._resource_path, "data", "contents", path)
+        if zipped:
+            return await self._hs_session.retrieve_zip(path, save_path, params={"zipped": "true"})
+        return await self._hs_session.retrieve_file(path, save_path)
+
+    async def folder_download(self, path: str, save_path: str = "") -> str:
+        """
+        Downloads a folder from HydroShare
+        :param path: The path to folder
+        :param save_path: The local path to save the download to, defaults to the current directory
+        :returns: The path to the download zipped folder
+        """
+        path = urljoin(self._loaded_aggregation._resource_path, "data", "contents", path)
+        return await self._hs_session.retrieve_zip(path, save_path, params={"zipped": "true"})
+
+    async def aggregation_download(
+        self, aggregation: AsyncAggregation, save_path: str = "", unzip_to: str = None
+    ) -> str:
+        """
+        Download an aggregation from HydroShare
+        :param aggregation: The aggreation to download
+        :param save_path: The local path to save the aggregation to, defaults to the current directory
+        :param unzip_to: If set, the resulting download will be unzipped to the specified path
+        """
+        return await aggregation._download(save_path=save_path, unzip_to=unzip_to)
+
+
+class AsyncHydroShareSession:
+    """
+    An aiohttp session to a HydroShare server.  Connections are pooled and reused across all concurrent requests, up
+    to a maximum of limit connections.
+    """
+
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        host=HydroShare.default_host,
+        protocol=HydroShare.default_protocol,
+        port=HydroShare.default_port,
+        client_id=None,
+        token=None,
+        chunk_size=HydroShareSession.default_chunk_size,
+        limit=100,
+    ):
+        self._host = host
+        self._protocol = protocol
+        self._port = port
+        self._client_id = client_id
+        self._token = token
+        self.chunk_size = chunk_size
+        self._limit = limit
+        self._auth = aiohttp.BasicAuth(username, password) if username or password else None
+        self._session = None
+
+    @property
+    def host(self):
+        return self._host
+
+    @property
+    def base_url(self):
+        return "{}://{}:{}".format(self._protocol, self._host, self._port)
+
+    def _build_url(self, path: str):
+        path = "/" + path.strip("/") + "/"
+        return self.base_url + path
+
+    def _client_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            headers = {}
+            if self._token:
+                headers["Authorization"] = "Bearer {}".format(self._token["access_token"])
+            self._session = aiohttp.ClientSession(
+                auth=self._auth, headers=headers, connector=aiohttp.TCPConnector(limit=self._limit)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @staticmethod
+    def _query(params) -> List:
+        if isinstance(params, str):
+            return params
+        query = []
+        for key, value in (params or {}).items():
+            for v in value if isinstance(value, list) else [value]:
+                query.append((key, str(v)))
+        return query
+
+    async def _request(self, method, path, status_code, params=None, **kwargs) -> aiohttp.ClientResponse:
+        url = encode_resource_url(self._build_url(path))
+        response = await self._client_session().request(method, url, params=self._query(params), **kwargs)
+        body = await response.read()
+        if response.status != status_code:
+            raise HydroShareHTTPError(method, url, response, status_code=response.status, content=body)
+        return response
+
+    async def get(self, path, status_code, **kwargs) -> aiohttp.ClientResponse:
+        return await self._request("GET", path, status_code, **kwargs)
+
+    async def post(self, path, status_code, data=None, **kwargs) -> aiohttp.ClientResponse:
+        return await self._request("POST", path, status_code, data=data, **kwargs)
+
+    async def put(self, path, status_code, data=None, **kwargs) -> aiohttp.ClientResponse:
+        return await self._request("PUT", path, status_code, data=data, **kwargs)
+
+    async def delete(self, path, status_code, **kwargs) -> aiohttp.ClientResponse:
+        return await self._request("DELETE", path, status_code, **kwargs)
+
+    async def retrieve_string(self, path) -> str:
+        response = await self.get(path, status_code=200)
+        return (await response.read()).decode()
+
+    async def retrieve_file(self, path, save_path="") -> str:
+        url = encode_resource_url(self._build_url(path))
+        async with self._client_session().get(url) as response:
+            if response.status != 200:
+                raise HydroShareHTTPError(
+                    "GET", url, response, status_code=response.status, content=await response.read()
+                )
+            cd = response.headers['content-disposition']
+            filename = cd.split("filename=")[1].strip('"')
+            downloaded_file = os.path.join(save_path, filename)
+            with open(downloaded_file, 'wb') as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    f.write(chunk)
+        return downloaded_file
+
+    async def check_task(self, task_id) -> str:
+        response = await self.get(f"/hsapi/taskstatus/{task_id}/", status_code=200)
+        return (await response.json(content_type=None))['status']
+
+    async def task_ready(self, task_id) -> bool:
+        """Whether the task is done, raises a HydroShareTaskError if the task reports that it failed"""
+        return task_status_ready(task_id, await self.check_task(task_id))
+
+    async def retrieve_zip(self, path, save_path="", params=None, timeout=None) -> str:
+        """
+        Requests the zip at path, waits for HydroShare to build it and downloads it, see HydroShareSession.retrieve_zip
+        :param timeout: The number of seconds to wait for the zip to be built before raising a TimeoutError, defaults
+            to waiting indefinitely
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        response = await self.get(path, status_code=200, params=params)
+        json_response = await response.json(content_type=None)
+        task_id = json_response['task_id']
+        download_path = json_response['download_path']
+        if json_response['zip_status'] == "Not ready":
+            for delay in backoff_delays():
+                if await self.task_ready(task_id):
+                    break
+                if deadline is not None:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Timed out waiting for task {task_id} to zip {download_path}")
+                    delay = min(delay, deadline - time.monotonic())
+                await asyncio.sleep(max(delay, 0))
+        return await self.retrieve_file(download_path, save_path)
+
+    async def upload_file(self, path, files, status_code=204) -> aiohttp.ClientResponse:
+        data = aiohttp.FormData()
+        for name, value in files.items():
+            if isinstance(value, tuple):
+                data.add_field(name, value[1], filename=value[0])
+            else:
+                data.add_field(name, value, filename=basename(value.name))
+        return await self.post(path, data=data, status_code=status_code)
+
+
+class AsyncHydroShare:
+    """
+    An asyncio HydroShare object for querying HydroShare's REST API without blocking the event loop.  Use it as an
+    async context manager, or await close() when done, to release its pooled connections.
+
+    :param username: A HydroShare username
+    :param password: A HydroShare password associated with the username
+    :param host: The host to use, defaults to `www.hydroshare.org`
+    :param protocol: The protocol to use, defaults to `https`
+    :param port: The port to use, defaults to `443`
+    :param client_id: The client id associated with the OAuth2 token
+    :param token: The OAuth2 token to use
+    :param session_options: Additional keyword arguments passed to the AsyncHydroShareSession, such as `limit`, the
+        maximum number of concurrent connections
+    """
+
+    def __init__(
+        self,
+        username: str = None,
+        password: str = None,
+        host: str = HydroShare.default_host,
+        protocol: str = HydroShare.default_protocol,
+        port: int = HydroShare.default_port,
+        client_id: str = None,
+        token: str = None,
+        **session_options,
+    ):
+        if (client_id or token) and not (client_id and token):
+            raise ValueError("Oauth2 requires a client_id to be paired with a token")
+        self._hs_session = AsyncHydroShareSession(
+            username=username,
+            password=password,
+            host=host,
+            protocol=protocol,
+            port=port,
+            client_id=client_id,
+            token=token,
+            **session_options,
+        )
+
+    async def __aenter__(self) -> "AsyncHydroShare":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Closes the pooled connections to HydroShare"""
+        await self._hs_session.close()
+
+    async def search(
+        self,
+        creator: str = None,
+        contributor: str = None,
+        owner: str = None,
+        group_name: str = None,
+        from_date: datetime = None,
+        to_date: datetime = None,
+        edit_permission: bool = False,
+        resource_types: List[str] = [],
+        subject: List[str] = [],
+        full_text_search: str = None,
+        published: bool = False,
+        spatial_coverage: Union[BoxCoverage, PointCoverage] = None,
+        page_size: int = None,
+        validate: bool = True,
+    ) -> AsyncIterator[ResourcePreview]:
+        """
+        Query the GET /hsapi/resource/ REST end point of the HydroShare server.  Takes the same parameters as
+        HydroShare.search.
+        :return: An async generator to iterate over ResourcePreview objects
+        """
+        params = search_params(
+            creator=creator,
+            contributor=contributor,
+            owner=owner,
+            group_name=group_name,
+            from_date=from_date,
+            to_date=to_date,
+            edit_permission=edit_permission,
+            resource_types=resource_types,
+            subject=subject,
+            full_text_search=full_text_search,
+            published=published,
+            spatial_coverage=spatial_coverage,
+            page_size=page_size,
+        )
+        path = "/hsapi/resource/"
+        while path:
+            response = await self._hs_session.get(path, 200, params=params)
+            res = await response.json(content_type=None)
+            for item in res['results']:
+                yield ResourcePreview.from_result(item, validate=validate)
+            path = None
+            if res['next']:
+                next_url = urlparse(res['next'])
+                path, params = next_url.path, next_url.query
+
+    async def resource(self, resource_id: str, validate: bool = True) -> AsyncResource:
+        """
+        Creates a resource object from HydroShare with the provided resource_id
+        :param resource_id: The resource id of the resource to retrieve
+        :param validate: Defaults to True, which retrieves the resource documents.  Set to False to not validate the
+            resource exists, the documents are then retrieved on the first call to files(), aggregations() or
+            refresh()
+        :return: An AsyncResource object representing a resource on HydroShare
+        """
+        res = AsyncResource("/resource/{}/data/resourcemap.xml".format(resource_id), self._hs_session)
+        if validate:
+            await res.refresh()
+        return res
+
+    async def user(self, user_id: int) -> User:
+        """
+        Retrieves the user details of a Hydroshare user
+        :param user_id: The user id of the user details to retrieve
+        :return: User object representing the user details
+        """
+        response = await self._hs_session.get(f'/hsapi/userDetails/{user_id}/', status_code=200)
+        return User(**await response.json(content_type=None))
+
+    async def my_user_info(self):
+        """
+        Retrieves the user info of the user's credentials provided
+        :return: JSON object representing the user info
+        """
+        response = await self._hs_session.get('/hsapi/userInfo/', status_code=200)
+        return await response.json(content_type=None)
@@ -0,0 +1,181 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from hashlib import sha256
+from typing import Dict, Iterable, Optional
+
+CacheEntry = namedtuple("CacheEntry", ["path", "etag", "last_modified", "size"])
+
+
+class DiskCache:
+    """
+    A persistent cache of downloaded documents in a local directory.  Each document is stored in its own file along
+    with the ETag and Last-Modified headers it was served with, so it can be revalidated with a conditional GET.  When
+    the total size of the stored documents exceeds max_bytes, the least recently used documents are evicted.  The
+    index of the cache is a sqlite database, so a cache directory may be shared by several processes.
+    :param directory: The directory to store the cached documents in, created if it does not exist
+    :param max_bytes: The maximum total size of the cached documents, defaults to 1 GiB
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024**3):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, filename TEXT NOT NULL, etag TEXT, "
+                "last_modified TEXT, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _filename(self, key: str) -> str:
+        return sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Looks up the entry stored for key and marks it as recently used, returns None on a miss"""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT filename, etag, last_modified, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            filename, etag, last_modified, size = row
+            path = os.path.join(self.directory, filename)
+            if not os.path.exists(path):
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(path, etag, last_modified, size)
+
+    def put(self, key: str, chunks: Iterable[bytes], etag: str = None, last_modified: str = None) -> CacheEntry:
+        """
+        Stores the document for key, written to disk from an iterable of byte chunks, and evicts the least recently
+        used entries if the cache is over its size limit
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return self.put_file(key, tmp_path, etag=etag, last_modified=last_modified)
+
+    def put_file(self, key: str, file_path: str, etag: str = None, last_modified: str = None) -> CacheEntry:
+        """
+        Stores the document for key by moving the file at file_path into the cache, which avoids copying a large
+        file written to a temporary directory on the same file system as the cache, and evicts the least recently used
+        entries if the cache is over its size limit
+        """
+        filename = self._filename(key)
+        path = os.path.join(self.directory, filename)
+        size = os.path.getsize(file_path)
+        shutil.move(file_path, path)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, filename, etag, last_modified, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, filename, etag, last_modified, size, time.time()),
+            )
+            self._evict(keep=key)
+        return CacheEntry(path, etag, last_modified, size)
+
+    def _evict(self, keep: str) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, filename, size in self._db.execute(
+            "SELECT key, filename, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def remove(self, key: str) -> None:
+        """Removes the entry stored for key"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            try:
+                os.remove(os.path.join(self.directory, self._filename(key)))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Removes every entry in the cache"""
+        with self._lock, self._db:
+            for (filename,) in self._db.execute("SELECT filename FROM entries").fetchall():
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+            self._db.execute("DELETE FROM entries")
+
+
+class ResourceCache:
+    """
+    A bounded, in-memory cache of parsed Resource objects.  Entries expire ttl seconds after they are added and the
+    least recently used entry is evicted when max_size entries are cached.  Hits, misses, evictions and invalidations
+    are counted in stats.
+    :param max_size: The maximum number of cached objects
+    :param ttl: The number of seconds an object is cached for
+    """
+
+    def __init__(self, max_size: int = 128, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The hit, miss, eviction, expiration and invalidation counts and the current size of the cache"""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def get(self, key: str):
+        """Returns the object cached for key, or None if it is not cached or has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: str, value) -> None:
+        """Caches value for key, evicting the least recently used object if the cache is full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, key: str = None) -> None:
+        """Removes the object cached for key, or every object if key is not provided"""
+        with self._lock:
+            if key is None:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(key, None) is not None:
+                self._stats["invalidations"] += 1
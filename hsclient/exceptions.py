@@ -0,0 +1,70 @@
+class ChecksumMismatchError(Exception):
+    """
+    Raised when the md5 checksum of a download does not match the checksum of the file in the resource manifest
+    :param path: the path of the file that failed verification
+    :param expected: the md5 checksum in the manifest, None if the file is not in the manifest
+    :param actual: the md5 checksum of the downloaded bytes
+    """
+
+    def __init__(self, path: str, expected: str, actual: str):
+        if expected is None:
+            message = f"{path} has no checksum in the resource manifest to verify against"
+        else:
+            message = f"Checksum mismatch for {path}, expected {expected} but downloaded {actual}"
+        super().__init__(message)
+        self.path = path
+        self.expected = expected
+        self.actual = actual
+
+
+class HydroShareHTTPError(Exception):
+    """
+    Raised when HydroShare answers a request with an unexpected status code, after any retries
+    :param method: the HTTP method of the request
+    :param url: the url of the request
+    :param response: the response HydroShare answered with
+    :param status_code: the status code of the response, defaults to response.status_code
+    :param content: the body of the response, defaults to response.content.  Both are given for aiohttp responses.
+    """
+
+    def __init__(self, method: str, url: str, response, status_code: int = None, content: bytes = None):
+        if status_code is None:
+            status_code = response.status_code
+        if content is None:
+            content = response.content
+        super().__init__("Failed {} {}, status_code {}, message {}".format(method, url, status_code, content))
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.response = response
+
+
+class FileChangedError(HydroShareHTTPError):
+    """
+    Raised when a file changes on HydroShare while it is downloaded in segments, so that a segment is answered with the
+    whole new file instead of the requested byte range.  Downloading the file again starts from the new version.
+    :param method: the HTTP method of the request
+    :param url: the url of the request
+    :param response: the response HydroShare answered with
+    """
+
+    def __init__(self, method: str, url: str, response):
+        # the body of the response is the whole file, so it is not read into the message
+        Exception.__init__(self, f"Failed {method} {url}, the file changed during a segmented download")
+        self.method = method
+        self.url = url
+        self.status_code = response.status_code
+        self.response = response
+
+
+class HydroShareTaskError(Exception):
+    """
+    Raised when a task HydroShare runs to build a download reports that it failed
+    :param task_id: the id of the task
+    :param status: the status the task reported
+    """
+
+    def __init__(self, task_id: str, status: str):
+        super().__init__(f"HydroShare task {task_id} failed with status {status}")
+        self.task_id = task_id
+        self.status = status
@@ -1,14 +1,26 @@
 import getpass
+import hashlib
+import heapq
 import os
+import pathlib
 import pickle
+import re
+import shutil
 import sqlite3
+import sys
 import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
-from posixpath import join as urljoin, splitext, basename, dirname
-from typing import Dict, List, Union
-from urllib.parse import urlparse, quote, unquote
-from zipfile import ZipFile
+from functools import partial
+from itertools import islice
+from operator import itemgetter
+from posixpath import basename, dirname, join as urljoin, splitext
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import unquote, urlparse
 
 import pandas
 import requests
@@ -18,24 +30,59 @@ from hsmodels.schemas.enums import AggregationType
 from hsmodels.schemas.fields import BoxCoverage, PointCoverage
 from requests_oauthlib import OAuth2Session
 
+from hsclient.cache import DiskCache, ResourceCache
+from hsclient.exceptions import ChecksumMismatchError, FileChangedError, HydroShareHTTPError
 from hsclient.json_models import ResourcePreview, User
-from hsclient.utils import attribute_filter, encode_resource_url, is_aggregation, main_file_type
+from hsclient.remote import RangeReader, connect as connect_remote, require_apsw
+from hsclient.streaming import HashingReader, MultipartEncoder, ProgressCallback, extract_hashed, stream_zip
+from hsclient.sync import DEFAULT_EXCLUDE, LocalState, path_filter, plan_sync
+from hsclient.tables import columns_to_arrow, columns_to_dataframe, result_columns
+from hsclient.tasks import TaskPoller
+from hsclient.transport import HydroShareAdapter, retry_policy
+from hsclient.utils import (
+    backoff_delays,
+    compile_filter,
+    encode_resource_url,
+    hashable,
+    is_aggregation,
+    main_file_type,
+    may_create_aggregation,
+    task_status_ready,
+)
 
 
 class File(str):
     """
-    A File path string representing the path to a file within a resource.
+    A File path string representing the path to a file within a resource.  To keep large resources small in memory,
+    the url is stored as a prefix shared with the other files in the same resource and the checksum as a 16 byte
+    digest.
     :param value: the string path value
     :param file_url: the fully qualified url to the file on hydroshare.org
-    :param checksum: the md5 checksum of the file
+    :param checksum: the md5 checksum of the file, as a hex string or a 16 byte digest
     """
 
+    __slots__ = ("_url_prefix", "_url", "_digest")
+
     def __new__(cls, value, file_url, checksum):
         return super(File, cls).__new__(cls, value)
 
     def __init__(self, value, file_url, checksum):
-        self._file_url = file_url
-        self._checksum = checksum
+        if file_url is not None and file_url.endswith(self):
+            self._url_prefix = sys.intern(file_url[: len(file_url) - len(self)])
+            self._url = None
+        else:
+            self._url_prefix = None
+            self._url = file_url
+        if checksum is None or isinstance(checksum, bytes):
+            self._digest = checksum
+            return
+        try:
+            self._digest = bytes.fromhex(checksum)
+        except ValueError:
+            self._digest = checksum
+
+    def __reduce__(self):
+        return File, (str(self), self.url, self.checksum)
 
     @property
     def path(self) -> str:
@@ -60,25 +107,35 @@ class File(str):
     @property
     def checksum(self):
         """The md5 checksum of the file"""
-        return self._checksum
+        if isinstance(self._digest, bytes):
+            return self._digest.hex()
+        return self._digest
 
     @property
     def url(self):
         """The url to the file on HydroShare"""
-        return self._file_url
+        if self._url_prefix is not None:
+            return self._url_prefix + self
+        return self._url
 
 
 class Aggregation:
     """Represents an Aggregation in HydroShare"""
 
+    # File properties files() and file() look up through a hash index instead of scanning every file
+    _indexed_file_properties = ("path", "name", "extension", "folder", "checksum")
+
     def __init__(self, map_path, hs_session, checksums=None):
         self._map_path = map_path
         self._hs_session = hs_session
         self._retrieved_map = None
         self._retrieved_metadata = None
         self._parsed_files = None
+        self._file_indexes = {}
         self._parsed_aggregations = None
         self._parsed_checksums = checksums
+        self._remote_reader = None
+        self._timeseries_download = None
 
     def __str__(self):
         return self._map_path
@@ -97,37 +154,58 @@ class Aggregation:
 
     @property
     def _checksums(self):
-        if not self._parsed_checksums:
+        if self._parsed_checksums is None:
             self._parsed_checksums = self._retrieve_checksums(self._checksums_path)
         return self._parsed_checksums
 
     @property
     def _files(self):
-        if not self._parsed_files:
+        if self._parsed_files is None:
             self._parsed_files = []
             for file in self._map.describes.files:
                 if not is_aggregation(str(file)):
                     if not file.path == self.metadata_path:
                         if not str(file.path).endswith('/'):  # checking for folders, shouldn't have to do this
-                            file_checksum_path = file.path.split(self._resource_path, 1)[1].strip("/")
-                            file_path = unquote(
-                                file_checksum_path.split(
-                                    "data/contents/",
-                                )[1]
-                            )
+                            file_checksum_path = unquote(file.path.split(self._resource_path, 1)[1].strip("/"))
+                            file_path = file_checksum_path.split("data/contents/", 1)[1]
                             f = File(file_path, unquote(file.path), self._checksums[file_checksum_path])
                             self._parsed_files.append(f)
+            self._file_indexes = {}
         return self._parsed_files
 
+    def _file_index(self, key: str) -> Dict[str, List[File]]:
+        """The files grouped by the value of the key property, built on first use"""
+        index = self._file_indexes.get(key)
+        if index is None:
+            index = {}
+            for file in self._files:
+                index.setdefault(getattr(file, key), []).append(file)
+            self._file_indexes[key] = index
+        return index
+
+    def _filter_files(self, **kwargs) -> Iterator[File]:
+        """
+        Yields the files matching kwargs in order.  The candidates are narrowed to the smallest group matching one of
+        the equality filters on indexed properties, the remaining filters are applied to those candidates only.
+        """
+        files = self._files
+        filters = dict(kwargs)
+        indexed = [key for key in filters if key in self._indexed_file_properties and hashable(filters[key])]
+        if indexed:
+            key = min(indexed, key=lambda key: len(self._file_index(key).get(filters[key], [])))
+            files = self._file_index(key).get(filters.pop(key), [])
+        matches = compile_filter(**filters)
+        for file in files:
+            if matches(file):
+                yield file
+
     @property
     def _aggregations(self):
-        if not self._parsed_aggregations:
+        if self._parsed_aggregations is None:
             self._parsed_aggregations = []
             for file in self._map.describes.files:
                 if is_aggregation(str(file)):
-                    self._parsed_aggregations.append(
-                        Aggregation(unquote(file.path), self._hs_session, self._checksums)
-                    )
+                    self._parsed_aggregations.append(Aggregation(unquote(file.path), self._hs_session, self._checksums))
         return self._parsed_aggregations
 
     @property
@@ -153,30 +231,86 @@ class Aggregation:
         return instance
 
     def _retrieve_checksums(self, path):
-        file_str = self._hs_session.retrieve_string(path)
-        data = {
-            quote(path): checksum
-            for checksum, path in (line.split("    ") for line in file_str.split("\n") if line)
-        }
+        return self._parse_checksums(self._hs_session.retrieve_lines(path))
+
+    @staticmethod
+    def _parse_checksums(lines: Iterable[bytes]) -> Dict[str, bytes]:
+        """
+        Parses the lines of a manifest into a dictionary of the unquoted path of each file to its 16 byte md5 digest.
+        The dictionary is shared by the resource and every aggregation in it.
+        """
+        data = {}
+        for line in lines:
+            if line.strip():
+                checksum, path = line.split(None, 1)
+                data[path.decode()] = bytes.fromhex(checksum.decode())
         return data
 
-    def _download(self, save_path: str = "", unzip_to: str = None) -> str:
-        main_file_path = self.main_file_path
+    @property
+    def _download_path(self) -> str:
+        path = urljoin(self._resource_path, "data", "contents", self.main_file_path)
+        return path.replace('resource', 'django_irods/rest_download', 1)
 
-        path = urljoin(self._resource_path, "data", "contents", main_file_path)
-        params = {"zipped": "true", "aggregation": "true"}
-        path = path.replace('resource', 'django_irods/rest_download', 1)
-        downloaded_zip = self._hs_session.retrieve_zip(path, save_path=save_path, params=params)
+    _download_params = {"zipped": "true", "aggregation": "true"}
 
-        if unzip_to:
+    def _download(self, save_path: str = "", unzip_to: str = None, verify: bool = False) -> str:
+        downloaded_zip = self._hs_session.retrieve_zip(
+            self._download_path, save_path=save_path, params=self._download_params
+        )
+        return self._unzip(downloaded_zip, unzip_to=unzip_to, verify=verify)
+
+    def _unzip(self, downloaded_zip: str, unzip_to: str = None, verify: bool = False) -> str:
+        if verify:
+            # extract next to unzip_to and only move the files in once every one of them is verified
+            staging = None
+            if unzip_to:
+                parent = os.path.dirname(os.path.abspath(unzip_to))
+                os.makedirs(parent, exist_ok=True)
+                staging = tempfile.mkdtemp(dir=parent, prefix=".unzip-")
+            try:
+                self._verify_zip(downloaded_zip, unzip_to=staging)
+                if staging:
+                    _move_tree(staging, unzip_to)
+            except ChecksumMismatchError:
+                os.remove(downloaded_zip)
+                raise
+            finally:
+                if staging:
+                    shutil.rmtree(staging, ignore_errors=True)
+        elif unzip_to:
             import zipfile
 
             with zipfile.ZipFile(downloaded_zip, 'r') as zip_ref:
                 zip_ref.extractall(unzip_to)
+        if unzip_to:
             os.remove(downloaded_zip)
             return unzip_to
         return downloaded_zip
 
+    def _verify_zip(self, downloaded_zip: str, unzip_to: str = None) -> None:
+        """
+        Checks the files in a downloaded zip against the checksums of the files in this aggregation, hashing each one
+        as it is extracted to unzip_to.  Archive members are matched to the files by the longest path they end with,
+        members not matching a file with a checksum, such as generated metadata documents, are not checked.
+        """
+        # every trailing part of the file paths, e.g. a/b/c.txt, b/c.txt and c.txt, mapped to the first file it ends
+        suffixes = {}
+        for file in self.files(search_aggregations=True):
+            if file.checksum is None:
+                continue
+            parts = file.path.split("/")
+            for i in range(len(parts)):
+                suffixes.setdefault("/".join(parts[i:]), file)
+        checksums = extract_hashed(downloaded_zip, to=unzip_to, chunk_size=self._hs_session.chunk_size)
+        for member, checksum in checksums.items():
+            parts = member.split("/")
+            for i in range(len(parts)):
+                file = suffixes.get("/".join(parts[i:]))
+                if file is not None:
+                    if file.checksum != checksum:
+                        raise ChecksumMismatchError(file.path, file.checksum, checksum)
+                    break
+
     @property
     def metadata_file(self):
         """The path to the metadata file"""
@@ -214,14 +348,13 @@ class Aggregation:
 
     def files(self, search_aggregations: bool = False, **kwargs) -> List[File]:
         """
-        List files and filter by properties on the file object using kwargs (i.e. extension='.txt')
+        List files and filter by properties on the file object using kwargs (i.e. extension='.txt').  A property may be
+        followed by an operator such as folder__startswith='data', see utils.compile_filter for the operators.
         :param search_aggregations: Defaults False, set to true to search aggregations
         :params **kwargs: Search by properties on the File object (path, name, extension, folder, checksum url)
         :return: a List of File objects matching the filter parameters
         """
-        files = self._files
-        for key, value in kwargs.items():
-            files = list(filter(lambda file: attribute_filter(file, key, value), files))
+        files = list(self._filter_files(**kwargs))
         if search_aggregations:
             for aggregation in self.aggregations():
                 files = files + list(aggregation.files(search_aggregations=search_aggregations, **kwargs))
@@ -234,29 +367,39 @@ class Aggregation:
         :params **kwargs: Search by properties on the File object (path, name, extension, folder, checksum url)
         :return: A File object matching the filter parameters or None if no matching File was found
         """
-        files = self.files(search_aggregations=search_aggregations, **kwargs)
-        if files:
-            return files[0]
-        return None
+        file = next(self._filter_files(**kwargs), None)
+        if file is None and search_aggregations:
+            for aggregation in self.aggregations():
+                file = aggregation.file(search_aggregations=search_aggregations, **kwargs)
+                if file is not None:
+                    break
+        return file
 
     def aggregations(self, **kwargs) -> List[BaseMetadata]:
         """
         List the aggregations in the resource.  Filter by properties on the metadata object using kwargs.  If you need
         to filter on nested properties, use __ (double underscore) to separate the properties.  For example, to filter
         by the BandInformation name, call this method like aggregations(band_information__name="the name to search").
+        The last property may be followed by an operator, such as aggregations(title__regex="^Temp") or
+        aggregations(period_coverage__start__gt="2020-01-01"), see utils.compile_filter for the operators.
         :params **kwargs: Search by properties on the metadata object
         :return: a List of Aggregation objects matching the filter parameters
         """
-        aggregations = self._aggregations
+        file_args = {}
+        metadata_args = {}
         for key, value in kwargs.items():
             if key.startswith('file__'):
-                file_args = {key[len('file__') :]: value}
-                aggregations = [agg for agg in aggregations if agg.files(**file_args)]
+                file_args[key[len('file__') :]] = value
             elif key.startswith('files__'):
-                file_args = {key[len('files__') :]: value}
-                aggregations = [agg for agg in aggregations if agg.files(**file_args)]
+                file_args[key[len('files__') :]] = value
             else:
-                aggregations = filter(lambda agg: attribute_filter(agg.metadata, key, value), aggregations)
+                metadata_args[key] = value
+        aggregations = self._aggregations
+        if metadata_args:
+            matches = compile_filter(**metadata_args)
+            aggregations = [agg for agg in aggregations if matches(agg.metadata)]
+        for key, value in file_args.items():
+            aggregations = [agg for agg in aggregations if agg.file(**{key: value}) is not None]
         return list(aggregations)
 
     def aggregation(self, **kwargs) -> BaseMetadata:
@@ -271,43 +414,259 @@ class Aggregation:
             return aggregations[0]
         return None
 
-    def refresh(self) -> None:
+    def refresh(self, eager: bool = False, max_workers: int = 8) -> None:
         """
-        Forces the retrieval of the resource map and metadata files.  Currently this is implemented to be lazy and will
-        only retrieve those files again after another call to access them is made.  This will be later updated to be
-        eager and retrieve the files asynchronously.
+        Forces the retrieval of the resource map and metadata files.  By default this is lazy and will only retrieve
+        those files again after another call to access them is made.
+        :param eager: Defaults to False, set to True to immediately retrieve the files with prefetch()
+        :param max_workers: The maximum number of concurrent requests made when eager is True
         """
-        # TODO, refresh should destroy the aggregation objects and async fetch everything.
         self._retrieved_map = None
         self._retrieved_metadata = None
         self._parsed_files = None
+        self._file_indexes = {}
         self._parsed_aggregations = None
         self._parsed_checksums = None
+        self._remote_reader = None
+        self._timeseries_download = None
+        if eager:
+            self.prefetch(max_workers=max_workers)
+
+    def prefetch(self, max_workers: int = 8) -> None:
+        """
+        Retrieves the resource map, metadata and checksums of this aggregation along with the resource maps and
+        metadata of every aggregation it contains.  The files of the contained aggregations are retrieved
+        concurrently, so filtering many aggregations afterwards does not make any further requests.
+        :param max_workers: The maximum number of concurrent requests
+        """
+
+        def retrieve(aggregation: Aggregation) -> List[Aggregation]:
+            aggregation._map
+            aggregation._metadata
+            return aggregation._aggregations
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            self._map
+            metadata = executor.submit(lambda: self._metadata)
+            executor.submit(lambda: self._checksums).result()
+            aggregations = self._aggregations
+            while aggregations:
+                aggregations = [child for children in executor.map(retrieve, aggregations) for child in children]
+            metadata.result()
+
+    def _timeseries_file(self) -> str:
+        """
+        Returns the path to a local copy of the sqlite file of this time series aggregation.  The aggregation is
+        downloaded and verified once and the sqlite file is kept in the session's timeseries_cache under its md5
+        checksum, so it is only downloaded again when the file changes on HydroShare or is evicted from the cache.
+        A sqlite file without a checksum in the manifest is not cached, see _uncached_timeseries_file.
+        """
+        sqlite_file = self.file(extension=".sqlite")
+        if sqlite_file.checksum is None:
+            return self._uncached_timeseries_file(sqlite_file)
+        cache = self._hs_session.timeseries_cache
+        entry = cache.get(sqlite_file.checksum)
+        if entry is not None:
+            return entry.path
+        # download next to the cache so the extracted file is moved into it rather than copied
+        with tempfile.TemporaryDirectory(dir=cache.directory) as td:
+            self._download(save_path=td, unzip_to=td, verify=True)
+            # zip extracted to folder with main file name
+            extracted = os.path.join(td, sqlite_file.name, sqlite_file.name)
+            return cache.put_file(sqlite_file.checksum, extracted).path
+
+    def _uncached_timeseries_file(self, sqlite_file: File) -> str:
+        """
+        Without a checksum there is no key to find the sqlite file in the timeseries_cache by, so it is downloaded to a
+        temporary directory kept with the aggregation until it is refreshed
+        """
+        if self._timeseries_download is None:
+            td = tempfile.TemporaryDirectory(prefix="hsclient-timeseries-")
+            self._download(save_path=td.name, unzip_to=td.name)
+            self._timeseries_download = td
+        # zip extracted to folder with main file name
+        return os.path.join(self._timeseries_download.name, sqlite_file.name, sqlite_file.name)
+
+    def _timeseries_path(self, agg_path: str = None) -> str:
+        """The path to the sqlite file of this time series aggregation in agg_path, or in the timeseries_cache"""
+        if agg_path is None:
+            return self._timeseries_file()
+        return urljoin(agg_path, self.file(extension=".sqlite").name)
+
+    def _timeseries_connection(self, agg_path: str = None, remote: bool = False):
+        """
+        Opens the sqlite file of this time series aggregation read-only.  When remote, the file is read from HydroShare
+        with Range requests through a block cache kept with the aggregation until it is refreshed.
+        """
+        if not remote:
+            return _connect_read_only(self._timeseries_path(agg_path))
+        require_apsw()
+        if self._remote_reader is None:
+            self._remote_reader = RangeReader(self._hs_session, self.file(extension=".sqlite").url)
+        return connect_remote(self._remote_reader)
 
-    def as_series(self, series_id: str, agg_path: str = None) -> Dict[int, pandas.Series]:
+    def as_series(self, series_id: str, agg_path: str = None, remote: bool = False) -> Dict[int, pandas.Series]:
         """
         Creates a pandas Series object out of an aggregation of type TimeSeries.
         :param series_id: The series_id of the timeseries result to be converted to a Series object.
         :param agg_path: Not required.  Include this parameter to avoid downloading the aggregation if you already have
-        it downloaded locally.
+        it downloaded locally.  Otherwise the aggregation is downloaded once and its sqlite file is cached locally, see
+        the timeseries_cache_max_bytes option of HydroShare.
+        :param remote: Defaults to False, set to True to query the sqlite file on HydroShare without downloading the
+        aggregation.  Only the pages of the file the query reads are requested.  Requires apsw.
         :return: A pandas.Series object
         """
+        con = self._timeseries_connection(agg_path, remote)
+        try:
+            columns = [row[1] for row in con.cursor().execute("PRAGMA table_info(TimeSeriesResultValues)")]
+            rows = list(
+                con.cursor().execute(
+                    'SELECT * FROM TimeSeriesResultValues WHERE ResultID IN '
+                    '(SELECT ResultID FROM Results WHERE ResultUUID = ?);',
+                    (series_id,),
+                )
+            )
+            return pandas.DataFrame.from_records(rows, columns=columns).squeeze()
+        finally:
+            con.close()
+
+    def as_dataframe(
+        self, series_ids: List[str] = None, agg_path: str = None, chunksize: int = None, remote: bool = False
+    ) -> Union[pandas.DataFrame, Iterator[pandas.DataFrame]]:
+        """
+        Creates a wide pandas DataFrame out of an aggregation of type TimeSeries, with one float64 column of values
+        per series indexed by ValueDateTime.  The local ValueDateTime of each value is converted to UTC with its
+        ValueDateTimeUTCOffset, so series recorded in different time zones line up, and the index is in UTC.  The
+        values of every series are read with one query ordered by time.  Raises a ValueError if a series has more than
+        one value at the same time, which as_series returns as separate rows.
+        :param series_ids: The series_ids of the timeseries results to read, in column order.  Defaults to every series
+        in the aggregation.
+        :param agg_path: Not required.  Include this parameter to avoid downloading the aggregation if you already have
+        it downloaded locally, see as_series.
+        :param chunksize: Not required.  Include this parameter to iterate over DataFrames covering consecutive ranges
+        of time instead, each built from about chunksize values.  The values at one time are never split across
+        DataFrames.
+        :param remote: Defaults to False, set to True to query the sqlite file on HydroShare, see as_series.
+        :return: A pandas.DataFrame object, or an iterator of them when chunksize is provided
+        """
+        frames = _timeseries_frames(partial(self._timeseries_connection, agg_path, remote), series_ids, chunksize)
+        if chunksize:
+            return frames
+        with closing(frames):
+            return next(frames)
 
-        def to_series(timeseries_file: str):
-            con = sqlite3.connect(timeseries_file)
-            return pandas.read_sql(
-                f'SELECT * FROM TimeSeriesResultValues WHERE ResultID IN '
-                f'(SELECT ResultID FROM Results WHERE ResultUUID = "{series_id}");',
-                con,
-            ).squeeze()
 
-        if agg_path is None:
-            with tempfile.TemporaryDirectory() as td:
-                self._download(unzip_to=td)
-                # zip extracted to folder with main file name
-                file_name = self.file(extension=".sqlite").name
-                return to_series(urljoin(td, file_name, file_name))
-        return to_series(urljoin(agg_path, self.file(extension=".sqlite").name))
+def _connect_read_only(path: str) -> sqlite3.Connection:
+    """Opens the sqlite database at path read-only, so a cached file can not be changed by a query"""
+    return sqlite3.connect(pathlib.Path(os.path.abspath(path)).as_uri() + "?mode=ro", uri=True)
+
+
+# the maximum number of variables in a statement of sqlite versions before 3.32
+SQLITE_MAX_VARIABLES = 999
+
+
+def _timeseries_frames(
+    connect, series_ids: Optional[List[str]], chunksize: Optional[int]
+) -> Iterator[pandas.DataFrame]:
+    """
+    Yields the values of the series in the sqlite database opened by connect as wide DataFrames, see
+    Aggregation.as_dataframe.  The rows are fetched in UTC order chunksize at a time, the rows at the last time of a
+    chunk are held back for the next one.  Works with sqlite3 and apsw connections.
+    """
+    con = connect()
+    try:
+        # ValueDateTime is local time, ValueDateTimeUTCOffset hours ahead of UTC
+        select = (
+            "SELECT r.ResultUUID, strftime('%Y-%m-%d %H:%M:%f', v.ValueDateTime, "
+            "printf('%+d minutes', -round(v.ValueDateTimeUTCOffset * 60))) AS ValueDateTimeUTC, v.DataValue "
+            "FROM TimeSeriesResultValues v JOIN Results r ON r.ResultID = v.ResultID "
+        )
+        order = "ORDER BY ValueDateTimeUTC, v.ResultID"
+        if series_ids is None:
+            series_ids = [row[0] for row in con.cursor().execute("SELECT ResultUUID FROM Results ORDER BY ResultID")]
+            cursor = con.cursor().execute(select + order)
+        else:
+            # the ids are bound in batches under the sqlite limit on the number of variables in a statement
+            series_ids = list(series_ids)
+            batches = [
+                series_ids[i : i + SQLITE_MAX_VARIABLES] for i in range(0, len(series_ids), SQLITE_MAX_VARIABLES)
+            ]
+            cursors = [
+                con.cursor().execute(select + f"WHERE r.ResultUUID IN ({', '.join('?' * len(batch))}) " + order, batch)
+                for batch in batches or [[]]
+            ]
+            cursor = cursors[0] if len(cursors) == 1 else heapq.merge(*cursors, key=itemgetter(1))
+        if not chunksize:
+            yield _pivot_series(list(cursor), series_ids)
+            return
+        held = []
+        while True:
+            rows = list(islice(cursor, chunksize))
+            if not rows:
+                if held:
+                    yield _pivot_series(held, series_ids)
+                return
+            rows = held + rows
+            split = len(rows)
+            while split and rows[split - 1][1] == rows[-1][1]:
+                split -= 1
+            held = rows[split:]
+            if split:
+                yield _pivot_series(rows[:split], series_ids)
+    finally:
+        con.close()
+
+
+def _pivot_series(rows: List[tuple], series_ids: List[str]) -> pandas.DataFrame:
+    """
+    Pivots (ResultUUID, ValueDateTimeUTC, DataValue) rows into a float64 column per series indexed by the UTC
+    ValueDateTime.  Raises a ValueError if a series has more than one value at a time.
+    """
+    columns = list(zip(*rows)) or [[], [], []]
+    values = pandas.Series(
+        pandas.array(columns[2], dtype="float64"),
+        index=pandas.MultiIndex.from_arrays(
+            [
+                pandas.to_datetime(pandas.Index(columns[1], dtype=object), format="%Y-%m-%d %H:%M:%S.%f", utc=True),
+                pandas.Index(columns[0], dtype=object),
+            ],
+            names=["ValueDateTime", "series_id"],
+        ),
+    )
+    duplicated = values.index.duplicated()
+    if duplicated.any():
+        time, series_id = values.index[duplicated][0]
+        raise ValueError(
+            f"Series {series_id} has more than one value at {time} UTC, {duplicated.sum()} values in all are at "
+            "the same time as another value of their series, read them with as_series instead"
+        )
+    wide = values.unstack("series_id").reindex(columns=series_ids).astype("float64")
+    wide.columns.name = None
+    return wide
+
+
+def _parent_folders(paths: Iterable[str]) -> Iterator[str]:
+    """Yields every folder above each of the paths"""
+    for path in paths:
+        parts = path.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            yield "/".join(parts[:i])
+
+
+def _record_sync(state: LocalState, local: Dict[str, str], remote: Dict[str, str], result: Dict) -> None:
+    """Saves the checksums the local and remote files agree on after a sync, see Resource.sync"""
+    synced = dict(state.synced)
+    synced.update({path: checksum for path, checksum in local.items() if remote.get(path) == checksum})
+    for path in result["uploaded"]:
+        synced[path] = local[path]
+    for path in result["downloaded"]:
+        state.record(path, remote[path])
+        synced[path] = remote[path]
+    for path in result["deleted_remote"] + result["deleted_local"]:
+        state.record(path, None)
+        synced.pop(path, None)
+    state.synced = synced
+    state.save()
 
 
 class Resource(Aggregation):
@@ -318,9 +677,17 @@ class Resource(Aggregation):
         path = urlparse(self.metadata.identifier).path
         return '/hsapi' + path
 
-    def _upload(self, file, destination_path):
+    def _upload(self, file, destination_path, progress_callback: ProgressCallback = None) -> str:
+        with open(file, 'rb') as f:
+            reader = HashingReader(f)
+            self._upload_content(reader, destination_path, progress_callback=progress_callback)
+        return reader.md5.hexdigest()
+
+    def _upload_content(self, content, destination_path, progress_callback: ProgressCallback = None):
         path = urljoin(self._hsapi_path, "files", destination_path.strip("/"))
-        self._hs_session.upload_file(path, files={'file': open(file, 'rb')}, status_code=201)
+        self._hs_session.upload_file(
+            path, files={'file': content}, status_code=201, progress_callback=progress_callback
+        )
 
     def _delete_file(self, path) -> None:
         path = urljoin(self._hsapi_path, "files", path)
@@ -333,6 +700,52 @@ class Resource(Aggregation):
         path = urljoin(self._hsapi_path, "folders", path)
         self._hs_session.delete(path, status_code=200)
 
+    # local state updates
+
+    def _can_update_locally(self, *paths: str) -> bool:
+        """
+        Whether a change to the paths can be applied to the parsed files in place of a refresh.  This requires the
+        files to have been parsed and no folder holding an aggregation to be in, above or below any of the paths, as
+        HydroShare may update those aggregations as a side effect.
+        """
+        if self._parsed_files is None:
+            return False
+        for aggregation in self._aggregations:
+            folder = dirname(aggregation._map_path.split("/data/contents/", 1)[1])
+            if not folder:
+                continue
+            for path in paths:
+                path = path.strip("/")
+                if path == folder or path.startswith(folder + "/") or folder.startswith(path + "/"):
+                    return False
+        return True
+
+    def _local_file(self, path: str, checksum: str = None) -> File:
+        return File(path, "/" + urljoin(self._resource_path, "data", "contents", path), checksum)
+
+    def _remove_local_files(self, path: str) -> List[File]:
+        """
+        Removes the file at path, or the files in the folder at path, from the parsed files and the manifest checksums
+        and returns them
+        """
+        removed = [file for file in self._parsed_files if file == path or file.startswith(path + "/")]
+        if removed:
+            self._parsed_files = [file for file in self._parsed_files if file not in removed]
+            self._file_indexes = {}
+            if self._parsed_checksums is not None:
+                for file in removed:
+                    self._parsed_checksums.pop(urljoin("data", "contents", file), None)
+        return removed
+
+    def _add_local_file(self, path: str, checksum: str = None) -> None:
+        """Adds the file at path to the parsed files, and its checksum to the manifest checksums when it is known"""
+        self._remove_local_files(path)
+        file = self._local_file(path, checksum)
+        self._parsed_files.append(file)
+        self._file_indexes = {}
+        if self._parsed_checksums is not None and isinstance(file._digest, bytes):
+            self._parsed_checksums[urljoin("data", "contents", path)] = file._digest
+
     # system information
 
     @property
@@ -396,13 +809,14 @@ class Resource(Aggregation):
         resource_id = response.text
         return Resource("/resource/{}/data/resourcemap.xml".format(resource_id), self._hs_session)
 
-    def download(self, save_path: str = "") -> str:
+    def download(self, save_path: str = "", timeout: float = None) -> str:
         """
         Downloads a zipped bagit archive of the resource from HydroShare
         param save_path: A local path to save the bag to, defaults to the current working directory
+        param timeout: The number of seconds to wait for HydroShare to build the bag, defaults to waiting indefinitely
         returns: The relative pathname of the download
         """
-        return self._hs_session.retrieve_bag(self._hsapi_path, save_path=save_path)
+        return self._hs_session.retrieve_bag(self._hsapi_path, save_path=save_path, timeout=timeout)
 
     def delete(self) -> None:
         """Deletes the resource on HydroShare"""
@@ -415,7 +829,8 @@ class Resource(Aggregation):
         metadata_string = rdf_string(self._retrieved_metadata, rdf_format="xml")
         path = urljoin(self._hsapi_path, "ingest_metadata")
         self._hs_session.upload_file(path, files={'file': ('resourcemetadata.xml', metadata_string)})
-        self.refresh()
+        # only the metadata document changes, the files and aggregations are kept
+        self._retrieved_metadata = None
 
     # referenced content operations
 
@@ -473,7 +888,10 @@ class Resource(Aggregation):
         :param path: the path to the folder
         """
         self._delete_file_folder(path)
-        self.refresh()
+        if self._can_update_locally(path):
+            self._remove_local_files(path)
+        else:
+            self.refresh()
 
     def folder_download(self, path: str, save_path: str = ""):
         """
@@ -486,20 +904,56 @@ class Resource(Aggregation):
             urljoin(self._resource_path, "data", "contents", path), save_path, params={"zipped": "true"}
         )
 
-    def file_download(self, path: str, save_path: str = "", zipped: bool = False):
+    def folders_download(self, *paths: str, save_path: str = "") -> Dict[str, Future]:
+        """
+        Downloads several folders from HydroShare without waiting on each one in turn.  Every zip is requested up
+        front and each folder is downloaded as soon as HydroShare has zipped it.
+        :param *paths: The paths to the folders
+        :param save_path: The local path to save the downloads to, defaults to the current directory
+        :returns: A dictionary of each folder path to a Future resolving to the path of the downloaded zipped folder
+        """
+        return {
+            path: self._hs_session.submit_zip(
+                urljoin(self._resource_path, "data", "contents", path), save_path, params={"zipped": "true"}
+            )
+            for path in paths
+        }
+
+    def file_download(
+        self, path: str, save_path: str = "", zipped: bool = False, verify: bool = False, segments: int = None
+    ):
         """
         Downloads a file from HydroShare
         :param path: The path to the file
         :param save_path: The local path to save the file to
         :param zipped: Defaults to False, set to True to download the file zipped
+        :param verify: Defaults to False, set to True to check the md5 checksum of the download against the resource
+        manifest.  The checksum is computed as the file is streamed to disk.  A ChecksumMismatchError is raised and the
+        download removed if it does not match.
+        :param segments: Set to download a large file in this many parts over concurrent connections, which is faster
+            when a single connection cannot use all of the available bandwidth.  Not used for zipped downloads.
         :returns: The path to the downloaded file
         """
+        checksum = None
+        if verify:
+            digest = self._checksums.get(urljoin("data", "contents", path))
+            if digest is None:
+                raise ChecksumMismatchError(path, None, None)
+            checksum = digest.hex()
         if zipped:
-            return self._hs_session.retrieve_zip(
+            downloaded_zip = self._hs_session.retrieve_zip(
                 urljoin(self._resource_path, "data", "contents", path), save_path, params={"zipped": "true"}
             )
+            if verify:
+                actual = list(extract_hashed(downloaded_zip, chunk_size=self._hs_session.chunk_size).values())
+                if actual != [checksum]:
+                    os.remove(downloaded_zip)
+                    raise ChecksumMismatchError(path, checksum, actual[0] if len(actual) == 1 else None)
+            return downloaded_zip
         else:
-            return self._hs_session.retrieve_file(urljoin(self._resource_path, "data", "contents", path), save_path)
+            return self._hs_session.retrieve_file(
+                urljoin(self._resource_path, "data", "contents", path), save_path, checksum=checksum, segments=segments
+            )
 
     def file_delete(self, path: str = None) -> None:
         """
@@ -507,7 +961,8 @@ class Resource(Aggregation):
         :param path: The path to the file
         """
         self._delete_file(path)
-        self.refresh()
+        if not (self._can_update_locally(path) and self._remove_local_files(path)):
+            self.refresh()
 
     def file_rename(self, path: str, new_path: str) -> None:
         """
@@ -517,11 +972,18 @@ class Resource(Aggregation):
         """
         rename_path = urljoin(self._hsapi_path, "functions", "move-or-rename")
         self._hs_session.post(rename_path, status_code=200, data={"source_path": path, "target_path": new_path})
-        self.refresh()
+        if not self._can_update_locally(path, new_path):
+            self.refresh()
+            return
+        renamed = self._remove_local_files(path)
+        for file in renamed:
+            self._add_local_file(new_path + file[len(path) :], file.checksum)
+        if not renamed:
+            self.refresh()
 
     def file_zip(self, path: str, zip_name: str = None, remove_file: bool = True) -> None:
         """
-        Zip a file on HydroShare
+        Zip a file on HydroShare.  The checksum of the new zip file is not known until the resource is refreshed.
         :param path: The path to the file
         :param zip_name: The name of the zipped file
         :param remove_file: Defaults to True, set to False to not delete the file that was zipped
@@ -530,7 +992,13 @@ class Resource(Aggregation):
         data = {"input_coll_path": path, "output_zip_file_name": zip_name, "remove_original_after_zip": remove_file}
         zip_path = urljoin(self._hsapi_path, "functions", "zip")
         self._hs_session.post(zip_path, status_code=200, data=data)
-        self.refresh()
+        zip_file_path = urljoin(dirname(path), zip_name)
+        if self._can_update_locally(path, zip_file_path):
+            if remove_file:
+                self._remove_local_files(path)
+            self._add_local_file(zip_file_path)
+        else:
+            self.refresh()
 
     def file_unzip(self, path: str) -> None:
         """
@@ -565,30 +1033,169 @@ class Resource(Aggregation):
         self.refresh()
         return self.aggregation(file__path=path)
 
-    def file_upload(self, *files: str, destination_path: str = "") -> None:
-        """
-        Uploads files to a folder in HydroShare
+    def file_upload(
+        self,
+        *files: str,
+        destination_path: str = "",
+        progress_callback: ProgressCallback = None,
+        parallel: int = None,
+        compression_level: int = None,
+    ) -> Optional[Dict[str, Optional[Exception]]]:
+        """
+        Uploads files to a folder in HydroShare.  Multiple files are zipped into a single upload and unzipped on
+        HydroShare unless parallel is set.  The zip is generated while it is uploaded and is never written to disk.
         :param *files: The local file paths to upload
         :param destination_path: The path on HydroShare to upload the files to, defaults to the root contents directory
-        """
+        :param progress_callback: Called with (bytes_sent, total_bytes, bytes_per_second) while each upload is sent
+        :param parallel: Set to the number of concurrent uploads to upload each file individually over a thread pool
+        :param compression_level: The zlib compression level (1-9) used to zip multiple files.  Defaults to storing
+            the files uncompressed, which is fastest for already compressed data like .nc and .tif files.
+        :return: When parallel is set, a dictionary of each local file path to the Exception raised while uploading it,
+            or None if the upload succeeded.  Failed files may be passed back to file_upload to retry them.
+        """
+        if parallel:
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                futures = {
+                    file: executor.submit(self._upload, file, destination_path, progress_callback) for file in files
+                }
+                results = {file: future.exception() for file, future in futures.items()}
+            uploaded = {file: futures[file].result() for file, error in results.items() if error is None}
+            self._add_uploaded_files(uploaded, destination_path)
+            return results
         if len(files) == 1:
-            self._upload(files[0], destination_path=destination_path)
+            checksum = self._upload(files[0], destination_path=destination_path, progress_callback=progress_callback)
+            self._add_uploaded_files({files[0]: checksum}, destination_path)
         else:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                zipped_file = os.path.join(tmpdir, 'files.zip')
-                with ZipFile(zipped_file, 'w') as zipped:
-                    for file in files:
-                        zipped.write(file, os.path.basename(file))
-                self._upload(zipped_file, destination_path=destination_path)
-                unzip_path = urljoin(
-                    self._hsapi_path, "functions", "unzip", "data", "contents", destination_path, 'files.zip'
-                )
-                self._hs_session.post(
-                    unzip_path, status_code=200, data={"overwrite": "true", "ingest_metadata": "true"}
-                )
-        self.refresh()
+            zipped = stream_zip(files, compression_level=compression_level, chunk_size=self._hs_session.chunk_size)
+            self._upload_content(
+                ('files.zip', zipped), destination_path=destination_path, progress_callback=progress_callback
+            )
+            unzip_path = urljoin(
+                self._hsapi_path, "functions", "unzip", "data", "contents", destination_path, 'files.zip'
+            )
+            self._hs_session.post(unzip_path, status_code=200, data={"overwrite": "true", "ingest_metadata": "true"})
+            self.refresh()
         # TODO, return those files?
 
+    def _add_uploaded_files(self, uploaded: Dict[str, str], destination_path: str) -> None:
+        """Adds uploaded files to the parsed files, or refreshes if HydroShare may have aggregated them"""
+        paths = {urljoin(destination_path.strip("/"), basename(file)): checksum for file, checksum in uploaded.items()}
+        if any(may_create_aggregation(path) for path in paths) or not self._can_update_locally(*paths):
+            self.refresh()
+            return
+        for path, checksum in paths.items():
+            self._add_local_file(path, checksum)
+
+    def sync(
+        self,
+        local_dir: str,
+        direction: str = "push",
+        delete: bool = False,
+        parallel: int = 4,
+        include: Iterable[str] = None,
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+    ) -> Dict[str, Union[List[str], Dict[str, Exception]]]:
+        """
+        Syncs the files in a local directory with the files in the resource, transferring only the files that are new
+        or have changed.  Files are compared by the md5 checksums in the resource manifest and the checksums of the
+        local files, which are cached by modification time and size in a .hsclient-sync.json file in local_dir.
+        :param local_dir: The local directory to sync
+        :param direction: "push" to make the resource match local_dir, "pull" to make local_dir match the resource or
+            "both" to transfer the changes made on each side since the last sync.  Files changed on both sides are
+            reported as conflicts and left alone.
+        :param delete: Defaults to False, set to True to delete files which are only on the side being synced to
+        :param parallel: The number of concurrent uploads and downloads
+        :param include: Glob patterns of the paths to sync, relative to local_dir and the resource, defaults to every
+            path.  See sync.path_filter, "*.ipynb" matches the notebooks at the top of local_dir only.
+        :param exclude: Glob patterns of the paths not to sync, defaults to the *_meta.xml and *_resmap.xml metadata
+            documents generated by HydroShare and the .part files of interrupted downloads.  Hidden files and folders
+            are never synced.
+        :return: A dictionary of the paths that were uploaded, downloaded, deleted_remote, deleted_local and the
+            conflicts, along with the errors raised by failed transfers and folder creations keyed by path
+        """
+        self.refresh()
+        matches = path_filter(include, exclude)
+        state = LocalState(local_dir, chunk_size=self._hs_session.chunk_size)
+        local = state.checksums(matches)
+        remote = {
+            path[len("data/contents/") :]: digest.hex()
+            for path, digest in self._checksums.items()
+            if path.startswith("data/contents/") and matches(path[len("data/contents/") :])
+        }
+        plan = plan_sync(local, remote, state.synced, direction, delete)
+
+        errors = {}
+        uploads = self._sync_create_folders(plan.upload, remote, errors)
+        self._sync_transfer(state, uploads, plan.download, parallel, errors)
+        self._sync_delete(state, plan.delete_remote, plan.delete_local, errors)
+
+        result = {
+            "uploaded": [path for path in plan.upload if path not in errors],
+            "downloaded": [path for path in plan.download if path not in errors],
+            "deleted_remote": [path for path in plan.delete_remote if path not in errors],
+            "deleted_local": [path for path in plan.delete_local if path not in errors],
+            "conflicts": plan.conflicts,
+            "errors": errors,
+        }
+        _record_sync(state, local, remote, result)
+        if uploads or plan.delete_remote:
+            self.refresh()
+        return result
+
+    def _sync_create_folders(
+        self, uploads: List[str], remote: Dict[str, str], errors: Dict[str, Exception]
+    ) -> List[str]:
+        """
+        Creates the folders of the uploads which are not in the resource yet, recording the errors of the folders that
+        could not be created in errors along with each upload into them.  Returns the uploads whose folders exist.
+        """
+        remote_folders = set(_parent_folders(remote))
+        for folder in sorted(set(_parent_folders(uploads)) - remote_folders):
+            try:
+                self.folder_create(folder)
+            except HydroShareHTTPError as e:
+                # an empty folder is not in the manifest and may already exist
+                if e.status_code != 400 or b"already exists" not in e.response.content:
+                    errors[folder] = e
+        ready = []
+        for path in uploads:
+            error = next((errors[folder] for folder in _parent_folders([path]) if folder in errors), None)
+            if error is None:
+                ready.append(path)
+            else:
+                errors[path] = error
+        return ready
+
+    def _sync_transfer(
+        self, state: LocalState, uploads: List[str], downloads: List[str], parallel: int, errors: Dict[str, Exception]
+    ) -> None:
+        """Uploads and downloads the files over a thread pool, recording the errors of failed transfers in errors"""
+
+        def download(path):
+            save_path = dirname(state.local_path(path))
+            os.makedirs(save_path, exist_ok=True)
+            self.file_download(path, save_path=save_path, verify=True)
+
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            futures = {executor.submit(self._upload, state.local_path(path), dirname(path)): path for path in uploads}
+            futures.update({executor.submit(download, path): path for path in downloads})
+        errors.update({futures[future]: future.exception() for future in futures if future.exception() is not None})
+
+    def _sync_delete(
+        self, state: LocalState, delete_remote: List[str], delete_local: List[str], errors: Dict[str, Exception]
+    ) -> None:
+        """Deletes the files in the resource and local_dir, recording the errors of failed deletes in errors"""
+        for path in delete_remote:
+            try:
+                self._delete_file(path)
+            except Exception as e:
+                errors[path] = e
+        for path in delete_local:
+            try:
+                os.remove(state.local_path(path))
+            except OSError as e:
+                errors[path] = e
+
     # aggregation operations
 
     def aggregation_remove(self, aggregation: Aggregation) -> None:
@@ -623,39 +1230,138 @@ class Resource(Aggregation):
         aggregation.refresh()
         self.refresh()
 
-    def aggregation_download(self, aggregation: Aggregation, save_path: str = "", unzip_to: str = None) -> str:
+    def aggregation_download(
+        self, aggregation: Aggregation, save_path: str = "", unzip_to: str = None, verify: bool = False
+    ) -> str:
         """
         Download an aggregation from HydroShare
         :param aggregation: The aggreation to download
         :param save_path: The local path to save the aggregation to, defaults to the current directory
         :param unzip_to: If set, the resulting download will be unzipped to the specified path
-        """
-        return aggregation._download(save_path=save_path, unzip_to=unzip_to)
+        :param verify: Defaults to False, set to True to check the md5 checksum of each file against the resource
+        manifest.  The files are hashed while they are unzipped, a download that is not unzipped is read once to check
+        it.  A ChecksumMismatchError is raised and the download removed if a file does not match.
+        """
+        return aggregation._download(save_path=save_path, unzip_to=unzip_to, verify=verify)
+
+    def aggregations_download(
+        self, *aggregations: Aggregation, save_path: str = "", unzip_to: str = None, verify: bool = False
+    ) -> Dict[Aggregation, Future]:
+        """
+        Downloads several aggregations from HydroShare without waiting on each one in turn.  Every zip is requested up
+        front and each aggregation is downloaded as soon as HydroShare has zipped it.
+        :param *aggregations: The aggregations to download
+        :param save_path: The local path to save the aggregations to, defaults to the current directory
+        :param unzip_to: If set, the downloads will be unzipped to the specified path
+        :param verify: Defaults to False, set to True to check the md5 checksums of the files, see aggregation_download
+        :returns: A dictionary of each aggregation to a Future resolving to the path of its download
+        """
+        return {
+            aggregation: self._hs_session.submit_zip(
+                aggregation._download_path,
+                save_path,
+                params=aggregation._download_params,
+                then=lambda downloaded_zip, aggregation=aggregation: aggregation._unzip(
+                    downloaded_zip, unzip_to=unzip_to, verify=verify
+                ),
+            )
+            for aggregation in aggregations
+        }
 
 
 class HydroShareSession:
-    def __init__(self, username, password, host, protocol, port, client_id=None, token=None):
+
+    default_chunk_size = 1024 * 1024
+    default_cache_max_bytes = 1024**3
+    default_timeseries_cache_max_bytes = 8 * 1024**3
+    _resource_id_pattern = re.compile(r"[0-9a-f]{32}")
+
+    def __init__(
+        self,
+        username,
+        password,
+        host,
+        protocol,
+        port,
+        client_id=None,
+        token=None,
+        chunk_size=default_chunk_size,
+        cache_dir=None,
+        cache_max_bytes=default_cache_max_bytes,
+        resource_cache_size=0,
+        resource_cache_ttl=300,
+        download_retries=3,
+        pool_connections=10,
+        pool_maxsize=32,
+        timeout=None,
+        max_retries=3,
+        backoff_factor=0.5,
+        timeseries_cache_max_bytes=default_timeseries_cache_max_bytes,
+    ):
         self._host = host
         self._protocol = protocol
         self._port = port
         self._client_id = client_id
         self._token = token
+        self.chunk_size = chunk_size
+        self.download_retries = download_retries
+        self._cache = DiskCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir else None
+        self._cache_dir = cache_dir
+        self.timeseries_cache_max_bytes = timeseries_cache_max_bytes
+        self._timeseries_cache = None
+        self._timeseries_cache_dir = None
+        self._timeseries_cache_lock = threading.Lock()
+        self.resource_cache = ResourceCache(resource_cache_size, resource_cache_ttl) if resource_cache_size else None
+        self._task_poller = None
+        self._task_poller_lock = threading.Lock()
+        self._adapter = HydroShareAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry_policy(max_retries, backoff_factor),
+            timeout=timeout,
+        )
         if client_id or token:
             if not token or not client_id:
                 raise ValueError("Oauth2 requires both token and client_id be provided")
             else:
-                self._session = OAuth2Session(client_id=client_id, token=token)
+                self._session = self._mount(OAuth2Session(client_id=client_id, token=token))
         else:
-            self._session = requests.Session()
+            self._session = self._mount(requests.Session())
             self.set_auth((username, password))
 
+    @property
+    def timeseries_cache(self) -> DiskCache:
+        """
+        The cache of the sqlite files of time series aggregations, keyed by their md5 checksum.  It is kept in the
+        timeseries folder of cache_dir, or in a temporary directory removed with the session if there is no cache_dir.
+        """
+        with self._timeseries_cache_lock:
+            if self._timeseries_cache is None:
+                if self._cache_dir:
+                    directory = os.path.join(self._cache_dir, "timeseries")
+                else:
+                    self._timeseries_cache_dir = tempfile.TemporaryDirectory(prefix="hsclient-timeseries-")
+                    directory = self._timeseries_cache_dir.name
+                self._timeseries_cache = DiskCache(directory, max_bytes=self.timeseries_cache_max_bytes)
+        return self._timeseries_cache
+
+    def _mount(self, session):
+        session.mount("https://", self._adapter)
+        session.mount("http://", self._adapter)
+        return session
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of requests sent by this session and the number of times they were retried"""
+        return self._adapter.stats
+
     def set_auth(self, auth):
         if self._client_id:
             raise NotImplementedError(f"This session is an Oauth2 session and does not provide the set_oauth method")
         self._session.auth = auth
 
     def set_oauth(self, client_id, token):
-        self._session = OAuth2Session(client_id=client_id, token=token)
+        self._session = self._mount(OAuth2Session(client_id=client_id, token=token))
 
     @property
     def host(self):
@@ -670,32 +1376,214 @@ class HydroShareSession:
         return self.base_url + path
 
     def retrieve_string(self, path):
+        if self._cache:
+            with open(self._retrieve_cached(path).path, 'rb') as f:
+                return f.read().decode()
         file = self.get(path, status_code=200, allow_redirects=True)
         return file.content.decode()
 
-    def retrieve_file(self, path, save_path=""):
-        file = self.get(path, status_code=200, allow_redirects=True)
+    def retrieve_lines(self, path) -> Iterator[bytes]:
+        """
+        Yields the lines of the document at path as it is downloaded, so large documents such as the manifest of a
+        resource with many files are never held in memory in full
+        """
+        if self._cache:
+            with open(self._retrieve_cached(path).path, 'rb') as f:
+                for line in f:
+                    yield line.rstrip(b"\r\n")
+            return
+        with self.get(path, status_code=200, allow_redirects=True, stream=True) as response:
+            yield from response.iter_lines(chunk_size=self.chunk_size)
+
+    def _retrieve_cached(self, path):
+        """
+        Retrieves the document at path through the disk cache.  A cached copy is revalidated with a conditional GET and
+        is only downloaded again if the server reports it has changed.
+        """
+        url = encode_resource_url(self._build_url(path))
+        entry = self._cache.get(url)
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        with self._session.get(url, headers=headers, allow_redirects=True, stream=True) as response:
+            if entry and response.status_code == 304:
+                return entry
+            if response.status_code != 200:
+                raise HydroShareHTTPError("GET", url, response)
+            return self._cache.put(
+                url,
+                response.iter_content(chunk_size=self.chunk_size),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
 
-        cd = file.headers['content-disposition']
+    def _save_response(self, response, path, save_path="", chunk_size=None, checksum=None):
+        """
+        Streams the body of a response opened with stream=True to disk, one chunk at a time.  The body is written to
+        a .part file which is renamed once it is complete.  If the transfer is interrupted, the rest of the file is
+        requested from path with a Range request, up to download_retries times.  A .part file left by an earlier
+        call is resumed the same way when the server reports the file has not changed since, which is recorded in a
+        .part.etag file.  If checksum is provided, the md5 checksum of the file is computed while it is written and
+        the file is removed if it does not match.
+        """
+        cd = response.headers['content-disposition']
         filename = cd.split("filename=")[1].strip('"')
         downloaded_file = os.path.join(save_path, filename)
-        with open(downloaded_file, 'wb') as f:
-            f.write(file.content)
+        part = _PartFile(downloaded_file + ".part", _range_validator(response), checksum, chunk_size or self.chunk_size)
+
+        current = response if part.offset == 0 else None
+        delays = backoff_delays()
+        retries = 0
+        while True:
+            try:
+                if current is None:
+                    current = self._request_range(path, part.offset, part.validator)
+                    if current.status_code == 416 and _range_length(current) == part.offset:
+                        break
+                    if current.status_code != 206:
+                        part.restart(_range_validator(current))
+                part.write(current)
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                retries += 1
+                if retries > self.download_retries:
+                    raise
+                if not part.validator:
+                    part.restart(None)
+                time.sleep(next(delays))
+            finally:
+                if current is not None:
+                    current.close()
+                    current = None
+        part.finish(downloaded_file)
         return downloaded_file
 
-    def retrieve_bag(self, path, save_path=""):
-        file = self.get(path, status_code=200, allow_redirects=True)
+    def _request_range(self, path, offset, validator, end=None):
+        """
+        Requests the bytes of path from offset on, up to but not including end if provided, if they are unchanged
+        since validator, or else the whole file
+        """
+        url = encode_resource_url(self._build_url(path))
+        headers = {}
+        if offset or end is not None:
+            headers = {"Range": f"bytes={offset}-{end - 1 if end is not None else ''}", "If-Range": validator}
+        response = self._session.get(url, headers=headers, allow_redirects=True, stream=True)
+        if response.status_code not in (200, 206, 416):
+            response.close()
+            raise HydroShareHTTPError("GET", url, response)
+        return response
 
-        if file.headers['Content-Type'] != "application/zip":
-            time.sleep(1)
-            return self.retrieve_bag(path, save_path)
-        return self.retrieve_file(path, save_path)
+    def _save_segments(self, response, path, save_path, segments, chunk_size=None, checksum=None):
+        """
+        Downloads the file of response in segments byte ranges requested concurrently, each written at its offset in
+        a preallocated .part file.  Each segment resumes from where it was interrupted up to download_retries times.
+        As the segments arrive out of order, a checksum is verified by reading the file once it is complete.
+        """
+        cd = response.headers['content-disposition']
+        filename = cd.split("filename=")[1].strip('"')
+        downloaded_file = os.path.join(save_path, filename)
+        part_file = downloaded_file + ".part"
+        size = int(response.headers['Content-Length'])
+        validator = _range_validator(response)
+        response.close()
+
+        with open(part_file, 'wb') as f:
+            f.truncate(size)
+        bounds = [(size * i // segments, size * (i + 1) // segments) for i in range(segments)]
+        fd = os.open(part_file, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                futures = [
+                    executor.submit(self._save_segment, path, fd, start, end, validator, chunk_size)
+                    for start, end in bounds
+                ]
+            for future in futures:
+                future.result()
+        except BaseException:
+            os.close(fd)
+            os.remove(part_file)
+            raise
+        os.close(fd)
+
+        if checksum:
+            md5 = hashlib.md5()
+            with open(part_file, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size or self.chunk_size), b""):
+                    md5.update(chunk)
+            if md5.hexdigest() != checksum:
+                os.remove(part_file)
+                raise ChecksumMismatchError(downloaded_file, checksum, md5.hexdigest())
+        os.replace(part_file, downloaded_file)
+        return downloaded_file
+
+    def _save_segment(self, path, fd, start, end, validator, chunk_size=None):
+        offset = start
+        delays = backoff_delays()
+        retries = 0
+        while offset < end:
+            progress = offset
+            try:
+                with self._request_range(path, offset, validator, end=end) as response:
+                    if response.status_code != 206:
+                        raise FileChangedError("GET", response.url, response)
+                    for chunk in response.iter_content(chunk_size=chunk_size or self.chunk_size):
+                        _pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                if offset < end and offset == progress:
+                    raise requests.exceptions.ChunkedEncodingError(f"Empty response for bytes {offset}-{end - 1}")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                retries += 1
+                if retries > self.download_retries:
+                    raise
+                time.sleep(next(delays))
+
+    def retrieve_file(self, path, save_path="", chunk_size=None, checksum=None, segments=None):
+        """
+        Downloads the file at path
+        :param segments: If set, files larger than chunk_size are downloaded in this many byte ranges concurrently.
+            A single stream is used when the server does not accept Range requests for the file.
+        """
+        with self.get(path, status_code=200, allow_redirects=True, stream=True) as file:
+            if (
+                segments
+                and segments > 1
+                and _range_validator(file)
+                and 'Content-Encoding' not in file.headers
+                and int(file.headers.get('Content-Length', 0)) > (chunk_size or self.chunk_size)
+            ):
+                return self._save_segments(file, path, save_path, segments, chunk_size, checksum)
+            return self._save_response(file, path, save_path, chunk_size, checksum)
+
+    def retrieve_bag(self, path, save_path="", chunk_size=None, timeout=None):
+        """
+        Downloads the bag at path.  While HydroShare is building the bag, the response is closed without reading its
+        body and the bag is requested again with an exponential backoff.  The first response that is a zip is saved.
+        :param timeout: The number of seconds to wait for the bag to be built before raising a TimeoutError, defaults
+            to waiting indefinitely
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for delay in backoff_delays():
+            with self.get(path, status_code=200, allow_redirects=True, stream=True) as file:
+                if file.headers.get('Content-Type') == "application/zip":
+                    return self._save_response(file, path, save_path, chunk_size)
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for the bag at {path} to be built")
+                delay = min(delay, deadline - time.monotonic())
+            time.sleep(max(delay, 0))
 
     def check_task(self, task_id):
         response = self.get(f"/hsapi/taskstatus/{task_id}/", status_code=200)
         return response.json()['status']
 
-    def retrieve_zip(self, path, save_path="", params=None):
+    def task_ready(self, task_id) -> bool:
+        """Whether the task is done, raises a HydroShareTaskError if the task reports that it failed"""
+        return task_status_ready(task_id, self.check_task(task_id))
+
+    def _request_zip(self, path, params=None):
+        """Requests a zip of path, returning the id of the task building it, its download path and if it is ready"""
         if params is None:
             params = {}
         file = self.get(path, status_code=200, allow_redirects=True, params=params)
@@ -704,51 +1592,256 @@ class HydroShareSession:
         task_id = json_response['task_id']
         download_path = json_response['download_path']
         zip_status = json_response['zip_status']
-        if zip_status == "Not ready":
-            while self.check_task(task_id) != 'true':
-                time.sleep(1)
-        return self.retrieve_file(download_path, save_path)
-
-    def upload_file(self, path, files, status_code=204):
-        return self.post(path, files=files, status_code=status_code)
+        return task_id, download_path, zip_status != "Not ready"
+
+    def retrieve_zip(self, path, save_path="", params=None, chunk_size=None, timeout=None):
+        """
+        Requests the zip at path, waits for HydroShare to build it and downloads it.  The task building the zip is
+        polled with an exponential backoff, a HydroShareTaskError is raised if it fails.
+        :param timeout: The number of seconds to wait for the zip to be built before raising a TimeoutError, defaults
+            to waiting indefinitely
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        task_id, download_path, ready = self._request_zip(path, params)
+        if not ready:
+            for delay in backoff_delays():
+                if self.task_ready(task_id):
+                    break
+                if deadline is not None:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Timed out waiting for task {task_id} to zip {download_path}")
+                    delay = min(delay, deadline - time.monotonic())
+                time.sleep(max(delay, 0))
+        return self.retrieve_file(download_path, save_path, chunk_size)
+
+    def submit_zip(self, path, save_path="", params=None, chunk_size=None, then=None, timeout=None) -> Future:
+        """
+        Requests a zip without waiting for it, see TaskPoller.submit_zip.  The zips submitted by a session share one
+        thread polling their tasks.
+        :return: A Future resolving to the path of the downloaded zip
+        """
+        with self._task_poller_lock:
+            if self._task_poller is None:
+                self._task_poller = TaskPoller(self)
+        return self._task_poller.submit_zip(path, save_path, params, chunk_size, then=then, timeout=timeout)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Shuts down the thread polling the zips submitted by this session and closes its connections
+        :param wait: Defaults to True, waits for the zip requests and downloads underway to finish
+        """
+        with self._task_poller_lock:
+            task_poller, self._task_poller = self._task_poller, None
+        if task_poller is not None:
+            task_poller.shutdown(wait=wait)
+        self._session.close()
+
+    def upload_file(self, path, files, status_code=204, progress_callback: ProgressCallback = None):
+        encoder = MultipartEncoder(files, progress_callback=progress_callback)
+        return self.post(path, data=encoder, headers={'Content-Type': encoder.content_type}, status_code=status_code)
+
+    def _invalidate(self, path, data=None):
+        """Removes the resources a mutating request may have changed from the resource cache"""
+        if self.resource_cache is None:
+            return
+        resource_ids = set(self._resource_id_pattern.findall(path))
+        if isinstance(data, dict) and "res_id" in data:
+            resource_ids.add(data["res_id"])
+        for resource_id in resource_ids:
+            self.resource_cache.invalidate(resource_id)
 
     def post(self, path, status_code, data=None, params={}, **kwargs):
         url = encode_resource_url(self._build_url(path))
         response = self._session.post(url, params=params, data=data, **kwargs)
+        self._invalidate(path, data)
         if response.status_code != status_code:
-            raise Exception(
-                "Failed POST {}, status_code {}, message {}".format(url, response.status_code, response.content)
-            )
+            raise HydroShareHTTPError("POST", url, response)
         return response
 
     def put(self, path, status_code, data=None, **kwargs):
         url = encode_resource_url(self._build_url(path))
         response = self._session.put(url, data=data, **kwargs)
+        self._invalidate(path, data)
         if response.status_code != status_code:
-            raise Exception(
-                "Failed PUT {}, status_code {}, message {}".format(url, response.status_code, response.content)
-            )
+            raise HydroShareHTTPError("PUT", url, response)
         return response
 
     def get(self, path, status_code, **kwargs):
         url = encode_resource_url(self._build_url(path))
         response = self._session.get(url, **kwargs)
         if response.status_code != status_code:
-            raise Exception(
-                "Failed GET {}, status_code {}, message {}".format(url, response.status_code, response.content)
-            )
+            raise HydroShareHTTPError("GET", url, response)
         return response
 
     def delete(self, path, status_code, **kwargs):
         url = encode_resource_url(self._build_url(path))
         response = self._session.delete(url, **kwargs)
+        self._invalidate(path)
         if response.status_code != status_code:
-            raise Exception(
-                "Failed DELETE {}, status_code {}, message {}".format(url, response.status_code, response.content)
-            )
+            raise HydroShareHTTPError("DELETE", url, response)
         return response
 
 
+def _range_validator(response) -> Optional[str]:
+    """The strong ETag or the Last-Modified date of a response if the server accepts Range requests for it"""
+    if response.headers.get('Accept-Ranges') != 'bytes':
+        return None
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+class _PartFile:
+    """
+    A download written to a .part file.  A .part file left by an earlier download is resumed from its end when the
+    validator of the file, recorded in a .part.etag file, is unchanged.  If checksum is provided, the md5 checksum of
+    the file is computed while it is written.
+    """
+
+    def __init__(self, path: str, validator: Optional[str], checksum: Optional[str], chunk_size: int):
+        self.path = path
+        self.validator_file = path + ".etag"
+        self.checksum = checksum
+        self.chunk_size = chunk_size
+        if validator and os.path.exists(path) and _read_text(self.validator_file) == validator:
+            self.validator = validator
+            self.offset = os.path.getsize(path)
+            self.md5 = hashlib.md5() if checksum else None
+            if self.md5:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(chunk_size), b""):
+                        self.md5.update(chunk)
+        else:
+            self.restart(validator)
+
+    def restart(self, validator: Optional[str]) -> None:
+        """Starts the file over, recording the validator of the response it is written from"""
+        self.validator = validator
+        self.offset = 0
+        self.md5 = hashlib.md5() if self.checksum else None
+        _write_text(self.validator_file, validator)
+
+    def write(self, response) -> None:
+        """Appends the body of response at the current offset"""
+        with open(self.path, 'ab' if self.offset else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                f.write(chunk)
+                self.offset += len(chunk)
+                if self.md5:
+                    self.md5.update(chunk)
+
+    def finish(self, downloaded_file: str) -> None:
+        """Renames the complete file to downloaded_file, or removes it if its checksum does not match"""
+        if os.path.exists(self.validator_file):
+            os.remove(self.validator_file)
+        if self.md5 and self.md5.hexdigest() != self.checksum:
+            os.remove(self.path)
+            raise ChecksumMismatchError(downloaded_file, self.checksum, self.md5.hexdigest())
+        os.replace(self.path, downloaded_file)
+
+
+def _range_length(response) -> Optional[int]:
+    """The complete length reported in the Content-Range header of a 416 response"""
+    content_range = response.headers.get('Content-Range', '')
+    if content_range.startswith('bytes */'):
+        return int(content_range[len('bytes */') :])
+    return None
+
+
+def _move_tree(source: str, destination: str) -> None:
+    """Moves the files under source into destination, replacing files and merging into folders that already exist"""
+    for root, _, files in os.walk(source):
+        target = os.path.join(destination, os.path.relpath(root, source))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            os.replace(os.path.join(root, name), os.path.join(target, name))
+
+
+_pwrite_lock = threading.Lock()
+
+
+def _pwrite(fd, data, offset) -> None:
+    """Writes data at offset in the file descriptor fd, which may be shared by several threads"""
+    if hasattr(os, 'pwrite'):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+        return
+    with _pwrite_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        while data:
+            data = data[os.write(fd, data) :]
+
+
+def _read_text(path) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_text(path, text) -> None:
+    if text is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def search_params(
+    creator: str = None,
+    contributor: str = None,
+    owner: str = None,
+    group_name: str = None,
+    from_date: datetime = None,
+    to_date: datetime = None,
+    edit_permission: bool = False,
+    resource_types: List[str] = [],
+    subject: List[str] = [],
+    full_text_search: str = None,
+    published: bool = False,
+    spatial_coverage: Union[BoxCoverage, PointCoverage] = None,
+    page_size: int = None,
+) -> Dict:
+    """Builds the query parameters of the GET /hsapi/resource/ REST end point, see HydroShare.search"""
+    params = {"edit_permission": edit_permission, "published": published}
+    if page_size:
+        params["count"] = page_size
+    if creator:
+        params["creator"] = creator
+    if contributor:
+        params["author"] = contributor
+    if owner:
+        params["owner"] = owner
+    if group_name:
+        params["group"] = group_name
+    if resource_types:
+        params["type[]"] = resource_types
+    if subject:
+        params["subject"] = ",".join(subject)
+    if full_text_search:
+        params["full_text_search"] = full_text_search
+    if from_date:
+        params["from_date"] = from_date.strftime('%Y-%m-%d')
+    if to_date:
+        params["to_date"] = to_date.strftime('%Y-%m-%d')
+    if spatial_coverage:
+        params["coverage_type"] = spatial_coverage.type
+        if spatial_coverage.type == "point":
+            params["north"] = spatial_coverage.north
+            params["east"] = spatial_coverage.east
+        else:
+            params["north"] = spatial_coverage.northlimit
+            params["east"] = spatial_coverage.eastlimit
+            params["south"] = spatial_coverage.southlimit
+            params["west"] = spatial_coverage.westlimit
+    return params
+
+
 class HydroShare:
     """
     A HydroShare object for querying HydroShare's REST API.  Provide a username and password at initialization or call
@@ -765,6 +1858,24 @@ class HydroShare:
     :param port: The port to use, defaults to `443`
     :param client_id: The client id associated with the OAuth2 token
     :param token: The OAuth2 token to use
+    :param session_options: Additional keyword arguments passed to the HydroShareSession:
+        `chunk_size`, the number of bytes read into memory at a time when streaming downloads to disk.
+        `cache_dir`, a directory to cache resource maps, metadata and manifests in.  Cached documents are revalidated
+        with conditional GETs instead of being downloaded again when they have not changed.
+        `cache_max_bytes`, the size the cache directory is bounded to by evicting the least recently used documents.
+        `resource_cache_size`, the number of parsed Resource objects kept in memory and returned again by resource().
+        Cached resources are dropped after any create, update or delete request on them.
+        `resource_cache_ttl`, the number of seconds a Resource object is cached for, defaults to 300.
+        `download_retries`, the number of times an interrupted download is resumed before giving up, defaults to 3.
+        `pool_connections` and `pool_maxsize`, the number of hosts connection pools are kept for and the number of
+        connections kept alive to each host, defaults to 10 and 32.  Raise pool_maxsize above the number of threads
+        making requests at once, such as parallel uploads or segmented downloads.
+        `timeout`, the default number of seconds to wait on a request, or a (connect, read) tuple, defaults to no limit.
+        `max_retries` and `backoff_factor`, how many times idempotent requests are retried on connection errors and
+        429, 502, 503 and 504 responses, waiting backoff_factor * 2 ** (retry - 1) seconds between retries or as long
+        as a Retry-After header asks for, defaults to 3 and 0.5.  Requests still failing raise a HydroShareHTTPError.
+        `timeseries_cache_max_bytes`, the size the sqlite files of time series aggregations read by as_series are
+        bounded to, defaults to 8 GiB.  They are kept in cache_dir, or in a temporary directory without a cache_dir.
     """
 
     default_host = 'www.hydroshare.org'
@@ -780,18 +1891,19 @@ class HydroShare:
         port: int = default_port,
         client_id: str = None,
         token: str = None,
+        **session_options,
     ):
         if client_id or token:
             if not client_id or not token:
                 raise ValueError("Oauth2 requires a client_id to be paired with a token")
             else:
                 self._hs_session = HydroShareSession(
-                    host=host, protocol=protocol, port=port, client_id=client_id, token=token
+                    host=host, protocol=protocol, port=port, client_id=client_id, token=token, **session_options
                 )
                 self.my_user_info()  # validate credentials
         else:
             self._hs_session = HydroShareSession(
-                username=username, password=password, host=host, protocol=protocol, port=port
+                username=username, password=password, host=host, protocol=protocol, port=port, **session_options
             )
             if username or password:
                 self.my_user_info()  # validate credentials
@@ -830,6 +1942,9 @@ class HydroShare:
         full_text_search: str = None,
         published: bool = False,
         spatial_coverage: Union[BoxCoverage, PointCoverage] = None,
+        page_size: int = None,
+        read_ahead: int = 0,
+        validate: bool = True,
     ):
         """
         Query the GET /hsapi/resource/ REST end point of the HydroShare server.
@@ -847,56 +1962,101 @@ class HydroShare:
         :param edit_permission: Filter by boolean edit permission
         :param published: Filter by boolean published status
         :param spatial_coverage: Filtering by spatial coverage raises a 500, do not use
+        :param page_size: The number of results requested per page, defaults to HydroShare's page size
+        :param read_ahead: The number of pages fetched in the background while the current page is iterated over,
+            defaults to 0 to fetch each page when it is reached.  Results are yielded in the same order either way.
+        :param validate: Defaults to True, set to False to construct each ResourcePreview without validation
 
         :return: A generator to iterate over a ResourcePreview object
         """
 
-        params = {"edit_permission": edit_permission, "published": published}
-        if creator:
-            params["creator"] = creator
-        if contributor:
-            params["author"] = contributor
-        if owner:
-            params["owner"] = owner
-        if group_name:
-            params["group"] = group_name
-        if resource_types:
-            params["type[]"] = resource_types
-        if subject:
-            params["subject"] = ",".join(subject)
-        if full_text_search:
-            params["full_text_search"] = full_text_search
-        if from_date:
-            params["from_date"] = from_date.strftime('%Y-%m-%d')
-        if to_date:
-            params["to_date"] = to_date.strftime('%Y-%m-%d')
-        if spatial_coverage:
-            params["coverage_type"] = spatial_coverage.type
-            if spatial_coverage.type == "point":
-                params["north"] = spatial_coverage.north
-                params["east"] = spatial_coverage.east
-            else:
-                params["north"] = spatial_coverage.northlimit
-                params["east"] = spatial_coverage.eastlimit
-                params["south"] = spatial_coverage.southlimit
-                params["west"] = spatial_coverage.westlimit
-        response = self._hs_session.get("/hsapi/resource/", 200, params=params)
-
-        res = response.json()
-        results = res['results']
-        for item in results:
-            yield ResourcePreview(**item)
-
-        while res['next']:
-            next_url = res['next']
-            next_url = urlparse(next_url)
-            path = next_url.path
-            params = next_url.query
-            response = self._hs_session.get(path, 200, params=params)
-            res = response.json()
-            results = res['results']
+        params = search_params(
+            creator=creator,
+            contributor=contributor,
+            owner=owner,
+            group_name=group_name,
+            from_date=from_date,
+            to_date=to_date,
+            edit_permission=edit_permission,
+            resource_types=resource_types,
+            subject=subject,
+            full_text_search=full_text_search,
+            published=published,
+            spatial_coverage=spatial_coverage,
+            page_size=page_size,
+        )
+        for results in self._search_pages(params, read_ahead=read_ahead):
             for item in results:
-                yield ResourcePreview(**item)
+                yield ResourcePreview.from_result(item, validate=validate)
+
+    def search_dataframe(self, page_size: int = None, read_ahead: int = 0, **filters) -> pandas.DataFrame:
+        """
+        Query the GET /hsapi/resource/ REST end point of the HydroShare server and collect the results in a
+        DataFrame, one row per resource.  The columns are built directly from the json pages without validating each
+        result.  Dates are parsed to UTC timestamps and coverages are flattened into coverage_ columns.
+        :param page_size: The number of results requested per page, defaults to HydroShare's page size
+        :param read_ahead: The number of pages fetched in the background, see HydroShare.search
+        :param filters: The filters of HydroShare.search, e.g. subject, creator or full_text_search
+        :return: A DataFrame of the search results
+        """
+        pages = self._search_pages(search_params(page_size=page_size, **filters), read_ahead=read_ahead)
+        return columns_to_dataframe(result_columns(pages))
+
+    def search_arrow(self, page_size: int = None, read_ahead: int = 0, **filters):
+        """
+        Query the GET /hsapi/resource/ REST end point of the HydroShare server and collect the results in a pyarrow
+        Table with the columns of HydroShare.search_dataframe.  Requires pyarrow.
+        :param page_size: The number of results requested per page, defaults to HydroShare's page size
+        :param read_ahead: The number of pages fetched in the background, see HydroShare.search
+        :param filters: The filters of HydroShare.search, e.g. subject, creator or full_text_search
+        :return: A pyarrow Table of the search results
+        """
+        pages = self._search_pages(search_params(page_size=page_size, **filters), read_ahead=read_ahead)
+        return columns_to_arrow(result_columns(pages))
+
+    def _search_pages(self, params: Dict, read_ahead: int = 0) -> Iterator[List[Dict]]:
+        """
+        Yields the results of each page of a search in order.  With read_ahead, the url of every page is computed from
+        the total count of results on the first page and up to read_ahead pages are fetched at a time in the
+        background.  If the total count is not reported, the next link of each page is followed one page ahead.
+        """
+
+        def fetch(path, params):
+            return self._hs_session.get(path, 200, params=params).json()
+
+        res = fetch("/hsapi/resource/", params)
+        yield res['results']
+        if not res['next']:
+            return
+        if not read_ahead:
+            while res['next']:
+                next_url = urlparse(res['next'])
+                res = fetch(next_url.path, next_url.query)
+                yield res['results']
+            return
+
+        executor = ThreadPoolExecutor(max_workers=read_ahead)
+        pending = deque()
+        try:
+            if res.get('count') and res['results']:
+                page_count = -(-res['count'] // len(res['results']))
+                pages = iter(range(2, page_count + 1))
+                for page in islice(pages, read_ahead):
+                    pending.append(executor.submit(fetch, "/hsapi/resource/", dict(params, page=page)))
+                while pending:
+                    results = pending.popleft().result()['results']
+                    for page in islice(pages, 1):
+                        pending.append(executor.submit(fetch, "/hsapi/resource/", dict(params, page=page)))
+                    yield results
+            else:
+                while res['next']:
+                    next_url = urlparse(res['next'])
+                    res = executor.submit(fetch, next_url.path, next_url.query).result()
+                    yield res['results']
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def resource(self, resource_id: str, validate: bool = True) -> Resource:
         """
@@ -905,11 +2065,39 @@ class HydroShare:
         :param validate: Defaults to True, set to False to not validate the resource exists
         :return: A Resource object representing a resource on HydroShare
         """
+        resource_cache = self._hs_session.resource_cache
+        if resource_cache:
+            res = resource_cache.get(resource_id)
+            if res is not None:
+                if validate:
+                    res.metadata
+                return res
         res = Resource("/resource/{}/data/resourcemap.xml".format(resource_id), self._hs_session)
         if validate:
             res.metadata
+        if resource_cache:
+            resource_cache.put(resource_id, res)
         return res
 
+    def request_stats(self) -> Dict[str, int]:
+        """
+        The statistics of the requests sent to HydroShare
+        :return: A dictionary of the number of requests sent and the number of times they were retried
+        """
+        return self._hs_session.stats
+
+    def close(self) -> None:
+        """Waits for the folder and aggregation downloads underway to finish and closes the connections to HydroShare"""
+        self._hs_session.close()
+
+    def resource_cache_stats(self) -> Dict[str, int]:
+        """
+        The statistics of the cache of Resource objects enabled with the resource_cache_size option
+        :return: A dictionary of the hit, miss, eviction, expiration and invalidation counts and size of the cache
+        """
+        resource_cache = self._hs_session.resource_cache
+        return resource_cache.stats if resource_cache else {}
+
     def create(self) -> Resource:
         """
         Creates a new resource on HydroShare
@@ -39,3 +39,17 @@ class ResourcePreview(BaseModel):
     def handle_null_author(cls, v):
         if v is None:
             return []
+        return v
+
+    @classmethod
+    def from_result(cls, item: Dict, validate: bool = True) -> "ResourcePreview":
+        """
+        Creates a ResourcePreview from a search result.  With validate=False the model is constructed without
+        validation, unknown keys are dropped and null authors become an empty list.
+        """
+        if validate:
+            return cls(**item)
+        values = {name: item[name] for name in cls.__fields__ if name in item}
+        if values.get("authors") is None:
+            values["authors"] = []
+        return cls.construct(**values)
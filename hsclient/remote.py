@@ -0,0 +1,216 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List
+
+try:
+    import apsw
+except ImportError:
+    apsw = None
+
+
+class RangeReader:
+    """
+    Reads a file on HydroShare with HTTP Range requests, block_size bytes at a time, keeping the last cache_blocks
+    blocks read in memory.  Consecutive blocks missing from the cache are requested together.  The first request pins
+    the version of the file read by its ETag or Last-Modified date, which is sent with every later request in an
+    If-Range header, so the blocks of a file changed in between are never mixed.
+    :param hs_session: The HydroShareSession to make requests with
+    :param path: The path to the file
+    :param block_size: The number of bytes requested at a time, a multiple of the sqlite page size works best
+    :param cache_blocks: The number of blocks kept in memory
+    """
+
+    def __init__(self, hs_session, path: str, block_size: int = 64 * 1024, cache_blocks: int = 256):
+        self._hs_session = hs_session
+        self.path = path
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self._validator = None
+        self._stats = {"requests": 0, "bytes": 0, "hits": 0, "misses": 0}
+        self.size = None
+        self._fetch(0, 0)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of range requests made and bytes received, and the block cache hits and misses"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _fetch(self, first: int, last: int) -> List[bytes]:
+        """Requests blocks first to last, inclusive, and returns them"""
+        start = first * self.block_size
+        end = (last + 1) * self.block_size
+        if self.size is not None:
+            end = min(end, self.size)
+        response = self._hs_session._request_range(self.path, start, self._validator, end=end)
+        with response:
+            if response.status_code == 416:
+                # the range starts at or past the end of the file, which is empty if this is the first request
+                if self.size is None:
+                    self.size = int(response.headers.get("Content-Range", "bytes */0").rsplit("/", 1)[1])
+                return [b""] * (last - first + 1)
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 200:
+                if self._validator is not None:
+                    raise OSError(f"{self.path} changed while it was being read")
+                size = int(response.headers.get("Content-Length", -1))
+                if size < 0 or size > end - start:
+                    raise OSError(f"The server does not accept Range requests for {self.path}")
+            else:
+                size = int(content_range.rsplit("/", 1)[1])
+            content = response.content
+        if self._validator is None:
+            etag = response.headers.get("ETag")
+            self._validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+            self.size = size
+        blocks = [content[i : i + self.block_size] for i in range(0, end - start, self.block_size)]
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes"] += len(content)
+            for index, block in enumerate(blocks, first):
+                self._blocks[index] = block
+                self._blocks.move_to_end(index)
+            while len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last=False)
+        return blocks
+
+    def read(self, amount: int, offset: int) -> bytes:
+        """Reads amount bytes from offset, fewer if the file ends first"""
+        end = min(offset + amount, self.size)
+        if end <= offset:
+            return b""
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        blocks = {}
+        missing = []
+        with self._lock:
+            for index in range(first, last + 1):
+                block = self._blocks.get(index)
+                if block is None:
+                    missing.append(index)
+                else:
+                    self._blocks.move_to_end(index)
+                    blocks[index] = block
+            self._stats["hits"] += len(blocks)
+            self._stats["misses"] += len(missing)
+        # request each run of consecutive missing blocks at once
+        while missing:
+            run = 1
+            while run < len(missing) and missing[run] == missing[0] + run:
+                run += 1
+            blocks.update(zip(missing[:run], self._fetch(missing[0], missing[run - 1])))
+            missing = missing[run:]
+        data = b"".join(blocks[index] for index in range(first, last + 1))
+        start = offset - first * self.block_size
+        return data[start : start + end - offset]
+
+
+# the readers of the databases being opened, by the name given to the connection
+_readers = {}
+_vfs = None
+_vfs_lock = threading.Lock()
+VFS_NAME = "hsclient-range"
+
+
+def _range_vfs():
+    """Registers the range reading sqlite VFS with apsw on first use"""
+    global _vfs
+    with _vfs_lock:
+        if _vfs is None:
+            _vfs = _RangeVFS()
+        return _vfs
+
+
+def require_apsw() -> None:
+    """Raises an ImportError if apsw, which remote queries are made with, is not installed"""
+    if apsw is None:
+        raise ImportError("Remote time series queries require apsw, install it with `pip install hsclient[remote]`")
+
+
+def connect(reader: RangeReader):
+    """
+    Opens the sqlite database read by reader as a read-only apsw Connection.  Only the pages of the database a query
+    touches are requested, through the block cache of the reader.
+    """
+    require_apsw()
+    _range_vfs()
+    name = f"{VFS_NAME}-{uuid.uuid4().hex}.sqlite"
+    _readers[name] = reader
+    try:
+        return apsw.Connection(name, flags=apsw.SQLITE_OPEN_READONLY, vfs=VFS_NAME)
+    finally:
+        _readers.pop(name, None)
+
+
+class _RangeVFS(apsw.VFS if apsw is not None else object):
+    """
+    A sqlite VFS opening the databases of _readers, other files such as temporary files are opened as usual.  It is
+    only instantiated once apsw is known to be installed.
+    """
+
+    def __init__(self):
+        super().__init__(VFS_NAME, base="")
+
+    def xOpen(self, name, flags):
+        filename = name.filename() if isinstance(name, apsw.URIFilename) else name
+        reader = _readers.get(filename)
+        if reader is None or not flags[0] & apsw.SQLITE_OPEN_MAIN_DB:
+            return apsw.VFSFile("", name, flags)
+        flags[1] = flags[0]
+        return _RangeFile(reader)
+
+    def xAccess(self, pathname, flags):
+        # there are no journals next to a remote database
+        if pathname.startswith(VFS_NAME):
+            return False
+        return super().xAccess(pathname, flags)
+
+    def xFullPathname(self, name):
+        if name.startswith(VFS_NAME):
+            return name
+        return super().xFullPathname(name)
+
+
+class _RangeFile:
+    """A read-only sqlite file reading its pages through a RangeReader"""
+
+    def __init__(self, reader: RangeReader):
+        self._reader = reader
+
+    def xRead(self, amount, offset):
+        return self._reader.read(amount, offset)
+
+    def xFileSize(self):
+        return self._reader.size
+
+    def xDeviceCharacteristics(self):
+        return getattr(apsw, "SQLITE_IOCAP_IMMUTABLE", 0x2000)
+
+    def xSectorSize(self):
+        return 0
+
+    def xFileControl(self, op, ptr):
+        return False
+
+    def xCheckReservedLock(self):
+        return False
+
+    def xLock(self, level):
+        pass
+
+    def xUnlock(self, level):
+        pass
+
+    def xSync(self, flags):
+        pass
+
+    def xClose(self):
+        pass
+
+    def xWrite(self, data, offset):
+        raise apsw.ReadOnlyError("remote databases are read-only")
+
+    def xTruncate(self, newsize):
+        raise apsw.ReadOnlyError("remote databases are read-only")
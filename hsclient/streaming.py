@@ -0,0 +1,285 @@
+import hashlib
+import io
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from uuid import uuid4
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+ProgressCallback = Callable[[int, Optional[int], float], None]
+
+
+class HashingReader:
+    """Wraps a binary file object and computes the md5 digest of the bytes read through it"""
+
+    def __init__(self, file):
+        self._file = file
+        self.md5 = hashlib.md5()
+
+    @property
+    def name(self):
+        return self._file.name
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self.md5.update(data)
+        return data
+
+
+class _IterableReader:
+    """Adapts an iterable of byte strings to a file-like object with a read method"""
+
+    def __init__(self, iterable: Iterable[bytes]):
+        self._iterator = iter(iterable)
+        self._buffer = b""
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            try:
+                self._buffer += next(self._iterator)
+            except StopIteration:
+                break
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class MultipartEncoder:
+    """
+    A read-only, file-like multipart/form-data request body.  File parts are read from disk in small pieces as the
+    request is sent, so memory use stays flat regardless of the size of the files being uploaded.  When a part is an
+    iterable of bytes the length of the body is unknown and it is sent with chunked transfer encoding.
+    :param files: A dictionary of form field names to file objects, or to (filename, content) tuples where content is a
+        file object, a string, bytes or an iterable of bytes, matching the files argument accepted by requests
+    :param progress_callback: Called with (bytes_sent, total_bytes, bytes_per_second) as the body is read, total_bytes
+        is None when the length of the body is unknown
+    :param callback_interval: The minimum number of seconds between calls to progress_callback
+    """
+
+    def __init__(self, files, progress_callback: ProgressCallback = None, callback_interval: float = 0.25):
+        self.boundary = uuid4().hex
+        self.content_type = "multipart/form-data; boundary={}".format(self.boundary)
+        self._progress_callback = progress_callback
+        self._callback_interval = callback_interval
+        self._parts = []
+        for name, value in files.items():
+            if isinstance(value, tuple):
+                filename, content = value[0], value[1]
+            else:
+                filename, content = os.path.basename(value.name), value
+            header = (
+                '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+                'Content-Type: application/octet-stream\r\n\r\n'.format(
+                    self.boundary, name, filename.replace('"', '%22')
+                )
+            )
+            self._parts.append(header.encode())
+            if isinstance(content, str):
+                content = content.encode()
+            elif not isinstance(content, bytes) and not hasattr(content, "read"):
+                content = _IterableReader(content)
+            self._parts.append(content)
+            self._parts.append(b"\r\n")
+        self._parts.append("--{}--\r\n".format(self.boundary).encode())
+        lengths = [self._part_length(part) for part in self._parts]
+        self.len = None if None in lengths else sum(lengths)
+
+        self._part_index = 0
+        self._part_offset = 0
+        self._bytes_read = 0
+        self._started = None
+        self._last_callback = 0.0
+
+    @staticmethod
+    def _part_length(part) -> Optional[int]:
+        if isinstance(part, bytes):
+            return len(part)
+        if isinstance(part, _IterableReader):
+            return None
+        try:
+            return os.fstat(part.fileno()).st_size - part.tell()
+        except (AttributeError, OSError):
+            pass
+        # an in-memory file object such as a BytesIO has no file descriptor
+        if hasattr(part, "seekable") and part.seekable():
+            position = part.tell()
+            end = part.seek(0, io.SEEK_END)
+            part.seek(position)
+            return end - position
+        return None
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            data = self.read(64 * 1024)
+            if not data:
+                return
+            yield data
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return b"".join(iter(self))
+        if self._started is None:
+            self._started = time.monotonic()
+        chunks = []
+        remaining = size
+        while remaining > 0 and self._part_index < len(self._parts):
+            part = self._parts[self._part_index]
+            if isinstance(part, bytes):
+                chunk = part[self._part_offset : self._part_offset + remaining]
+                self._part_offset += len(chunk)
+                exhausted = self._part_offset >= len(part)
+            else:
+                chunk = part.read(remaining)
+                exhausted = len(chunk) < remaining
+            if exhausted:
+                self._part_index += 1
+                self._part_offset = 0
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        data = b"".join(chunks)
+        if data:
+            self._bytes_read += len(data)
+            self._report_progress()
+        return data
+
+    def _report_progress(self) -> None:
+        if not self._progress_callback:
+            return
+        now = time.monotonic()
+        finished = self._part_index >= len(self._parts)
+        if not finished and now - self._last_callback < self._callback_interval:
+            return
+        self._last_callback = now
+        elapsed = now - self._started
+        rate = self._bytes_read / elapsed if elapsed > 0 else 0.0
+        self._progress_callback(self._bytes_read, self.len, rate)
+
+
+class _QueueWriter:
+    """A write-only, unseekable stream which hands the bytes written to it to a consumer in chunk_size pieces"""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event, chunk_size: int):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer = bytearray()
+
+    def put(self, item) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise RuntimeError("The consumer of the zip stream went away")
+
+
+def stream_zip(
+    files: List[str], compression_level: int = None, chunk_size: int = 1024 * 1024, max_chunks: int = 8
+) -> Iterator[bytes]:
+    """
+    Generates a zip archive of the files without staging it on disk.  The archive is compressed in a producer thread
+    while the bytes already produced are consumed, and at most max_chunks chunks are held in memory at a time.
+    :param files: The local file paths to add to the root of the archive
+    :param compression_level: The zlib compression level from 1 to 9 to deflate the files with, defaults to storing
+        them uncompressed, which is also what 0 does and is fastest for already compressed formats like .nc or .tif
+    :param chunk_size: The size in bytes of the chunks generated
+    :param max_chunks: The maximum number of produced chunks waiting to be consumed
+    :return: A generator of the bytes of the zip archive
+    """
+    if compression_level:
+        compression = ZIP_DEFLATED
+    else:
+        compression, compression_level = ZIP_STORED, None
+    chunks = queue.Queue(maxsize=max_chunks)
+    cancelled = threading.Event()
+    finished = object()
+
+    def produce():
+        writer = _QueueWriter(chunks, cancelled, chunk_size)
+        try:
+            with ZipFile(writer, 'w', compression=compression, compresslevel=compression_level) as zipped:
+                for file in files:
+                    zipped.write(file, os.path.basename(file))
+            writer.flush()
+            writer.put(finished)
+        except Exception as e:
+            if not cancelled.is_set():
+                writer.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is finished:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        cancelled.set()
+        producer.join()
+
+
+class _Discard:
+    """A writable context manager which throws away what is written to it"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def write(self, data):
+        return len(data)
+
+
+def extract_hashed(zip_path: str, to: str = None, chunk_size: int = 1024 * 1024) -> Dict[str, str]:
+    """
+    Computes the md5 checksum of every file in a zip archive, extracting each one to the directory at to while it is
+    hashed so the extracted files are not read back from disk.  Members with paths outside of to are rejected.
+    :param zip_path: the path to the zip archive
+    :param to: the directory to extract to, the archive is only read when not provided
+    :param chunk_size: the number of bytes decompressed at a time
+    :return: a dictionary of the archive member names to their md5 checksums
+    """
+    checksums = {}
+    with ZipFile(zip_path) as zipped:
+        for member in zipped.infolist():
+            target = None
+            if to is not None:
+                target = os.path.realpath(os.path.join(to, member.filename))
+                if not target.startswith(os.path.realpath(to) + os.sep):
+                    raise ValueError(f"{member.filename} would be extracted outside of {to}")
+                if member.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+            elif member.is_dir():
+                continue
+            md5 = hashlib.md5()
+            with zipped.open(member) as source, open(target, 'wb') if target else _Discard() as destination:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    md5.update(chunk)
+                    destination.write(chunk)
+            checksums[member.filename] = md5.hexdigest()
+    return checksums
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+STATE_FILE = ".hsclient-sync.json"
+# the metadata documents HydroShare generates for aggregations and the leftovers of interrupted downloads
+DEFAULT_EXCLUDE = ("**/*_meta.xml", "**/*_resmap.xml", "**/*.part", "**/*.part.etag")
+
+
+@lru_cache(maxsize=None)
+def _glob_pattern(pattern: str):
+    """Compiles a glob pattern where * and ? do not match a / and **/ matches any number of folders"""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r"\Z")
+
+
+def path_filter(include: Iterable[str] = None, exclude: Iterable[str] = DEFAULT_EXCLUDE) -> Callable[[str], bool]:
+    """
+    Builds a predicate selecting the relative paths, using / as the separator, which are synced.  A path is synced if
+    it matches one of the include glob patterns, or include is None, and none of the exclude patterns.  In the
+    patterns * matches within a folder and **/ matches any number of folders, so "*.ipynb" only matches the notebooks
+    at the top of the directory and "**/*.ipynb" matches them in every folder.  Hidden files and the files in hidden
+    folders, such as .git, are never synced.
+    """
+    include = None if include is None else [_glob_pattern(pattern) for pattern in include]
+    exclude = [_glob_pattern(pattern) for pattern in exclude or ()]
+
+    def matches(path: str) -> bool:
+        if any(part.startswith(".") for part in path.split("/")):
+            return False
+        if include is not None and not any(pattern.match(path) for pattern in include):
+            return False
+        return not any(pattern.match(path) for pattern in exclude)
+
+    return matches
+
+
+class SyncPlan(NamedTuple):
+    """The transfers needed to bring a local directory and a resource in sync, as paths relative to both"""
+
+    upload: List[str]
+    download: List[str]
+    delete_remote: List[str]
+    delete_local: List[str]
+    conflicts: List[str]
+
+
+class LocalState:
+    """
+    The md5 checksums of the files in a local directory, along with the checksums of the files at the last sync.  The
+    state is kept in a json file in the directory.  A checksum is only recomputed when the modification time or size
+    of the file has changed since it was last computed.
+    :param local_dir: The local directory
+    :param chunk_size: The number of bytes read at a time when computing checksums
+    """
+
+    def __init__(self, local_dir: str, chunk_size: int = 1024 * 1024):
+        self.local_dir = local_dir
+        self.chunk_size = chunk_size
+        self._path = os.path.join(local_dir, STATE_FILE)
+        self._files = {}
+        self.synced = {}
+        if os.path.exists(self._path):
+            with open(self._path) as f:
+                state = json.load(f)
+            self._files = state.get("files", {})
+            self.synced = state.get("synced", {})
+
+    def save(self) -> None:
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self._files, "synced": self.synced}, f)
+        os.replace(tmp_path, self._path)
+
+    def local_path(self, path: str) -> str:
+        return os.path.join(self.local_dir, *path.split("/"))
+
+    def checksums(self, matches: Callable[[str], bool] = None) -> Dict[str, str]:
+        """
+        The md5 checksums of the files in the directory keyed by their relative path, using / as the separator
+        :param matches: Selects the paths to include, see path_filter.  Hidden files and folders are always skipped.
+        """
+        matches = matches or path_filter()
+        checksums = {}
+        for root, directories, files in os.walk(self.local_dir):
+            directories[:] = [directory for directory in directories if not directory.startswith(".")]
+            for name in files:
+                local_path = os.path.join(root, name)
+                path = os.path.relpath(local_path, self.local_dir).replace(os.sep, "/")
+                if path in (STATE_FILE, STATE_FILE + ".tmp") or not matches(path):
+                    continue
+                checksums[path] = self.checksum(path)
+        self._files = {path: self._files[path] for path in checksums}
+        return checksums
+
+    def checksum(self, path: str) -> str:
+        """The md5 checksum of the file at the relative path, read from the state when the file is unchanged"""
+        stat = os.stat(self.local_path(path))
+        cached = self._files.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        md5 = hashlib.md5()
+        with open(self.local_path(path), "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                md5.update(chunk)
+        self.record(path, md5.hexdigest())
+        return md5.hexdigest()
+
+    def record(self, path: str, checksum: Optional[str]) -> None:
+        """Records the checksum of the file at path as it is on disk now, or that the file was removed"""
+        if checksum is None:
+            self._files.pop(path, None)
+            return
+        stat = os.stat(self.local_path(path))
+        self._files[path] = [stat.st_mtime_ns, stat.st_size, checksum]
+
+
+def plan_sync(
+    local: Dict[str, str], remote: Dict[str, str], synced: Dict[str, str], direction: str, delete: bool
+) -> SyncPlan:
+    """
+    Compares the checksums of the local and remote files.  When pushing, the resource is made to match the local
+    files and when pulling the local files are made to match the resource.  When syncing both ways, the checksums at
+    the last sync decide which side changed, files changed on both sides are reported as conflicts and left alone.
+    Files only on the side being synced to are deleted when delete is True.
+    """
+    if direction not in ("push", "pull", "both"):
+        raise ValueError(f"direction must be push, pull or both, not {direction}")
+    plan = SyncPlan([], [], [], [], [])
+    for path in sorted(set(local) | set(remote)):
+        local_checksum, remote_checksum = local.get(path), remote.get(path)
+        if local_checksum == remote_checksum:
+            continue
+        if direction == "both":
+            if remote_checksum == synced.get(path):
+                push = True
+            elif local_checksum == synced.get(path):
+                push = False
+            else:
+                plan.conflicts.append(path)
+                continue
+        else:
+            push = direction == "push"
+        if push:
+            if local_checksum is not None:
+                plan.upload.append(path)
+            elif delete:
+                plan.delete_remote.append(path)
+        else:
+            if remote_checksum is not None:
+                plan.download.append(path)
+            elif delete:
+                plan.delete_local.append(path)
+    return plan
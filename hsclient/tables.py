@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List
+
+import pandas
+
+from hsclient.json_models import ResourcePreview
+
+DATE_COLUMNS = ("date_created", "date_last_updated")
+BOOLEAN_COLUMNS = ("public", "discoverable", "shareable", "immutable", "published")
+LIST_COLUMNS = ("authors",)
+STRING_COLUMNS = tuple(
+    name
+    for name in ResourcePreview.__fields__
+    if name not in DATE_COLUMNS + BOOLEAN_COLUMNS + LIST_COLUMNS + ("coverages",)
+)
+
+
+def _flatten_coverages(coverages) -> Dict[str, object]:
+    """
+    Flattens the coverages of a search result into coverage_<key> values.  Coverages served as a list of
+    {"type": ..., "value": {...}} objects are flattened into coverage_<type>_<key> values.
+    """
+    if not coverages:
+        return {}
+    if isinstance(coverages, dict):
+        return {f"coverage_{key}": value for key, value in coverages.items()}
+    flattened = {}
+    for coverage in coverages:
+        value = coverage.get("value")
+        if isinstance(value, dict):
+            for key, item in value.items():
+                flattened[f"coverage_{coverage.get('type')}_{key}"] = item
+        else:
+            flattened[f"coverage_{coverage.get('type')}"] = value
+    return flattened
+
+
+def result_columns(pages: Iterable[List[Dict]]) -> Dict[str, list]:
+    """
+    Collects the search results of each page into one list of values per column, without validating them.  Missing
+    values are None, null authors become an empty list and coverages are flattened into their own columns.
+    """
+    columns = {name: [] for name in STRING_COLUMNS + DATE_COLUMNS + BOOLEAN_COLUMNS + LIST_COLUMNS}
+    coverages = {}
+    rows = 0
+    for results in pages:
+        for item in results:
+            for name, values in columns.items():
+                values.append(item.get(name))
+            for name, value in _flatten_coverages(item.get("coverages")).items():
+                if name not in coverages:
+                    coverages[name] = [None] * rows
+                coverages[name].append(value)
+            rows += 1
+            for values in coverages.values():
+                if len(values) < rows:
+                    values.append(None)
+    columns["authors"] = [authors or [] for authors in columns["authors"]]
+    columns.update(sorted(coverages.items()))
+    return columns
+
+
+def _coverage_series(values: list) -> pandas.Series:
+    try:
+        return pandas.to_numeric(pandas.Series(values, dtype=object)).astype("float64")
+    except (TypeError, ValueError):
+        return pandas.Series(values, dtype="string")
+
+
+def columns_to_dataframe(columns: Dict[str, list]) -> pandas.DataFrame:
+    """
+    Builds a DataFrame with explicit column dtypes: strings, nullable booleans, UTC timestamps parsed for the whole
+    column at once, lists of authors and numeric coverages where every value is a number.
+    """
+    data = {}
+    for name, values in columns.items():
+        if name in STRING_COLUMNS:
+            data[name] = pandas.Series(values, dtype="string")
+        elif name in DATE_COLUMNS:
+            data[name] = pandas.to_datetime(pandas.Series(values, dtype=object), utc=True, errors="coerce")
+        elif name in BOOLEAN_COLUMNS:
+            data[name] = pandas.Series(values, dtype="boolean")
+        elif name in LIST_COLUMNS:
+            data[name] = pandas.Series(values, dtype=object)
+        else:
+            data[name] = _coverage_series(values)
+    return pandas.DataFrame(data)
+
+
+def columns_to_arrow(columns: Dict[str, list]):
+    """Builds a pyarrow Table from the typed columns of columns_to_dataframe, authors become a list<string> column"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("search_arrow requires pyarrow, install it with `pip install hsclient[arrow]`")
+    df = columns_to_dataframe(columns)
+    schema = pyarrow.Schema.from_pandas(df, preserve_index=False)
+    schema = schema.set(schema.get_field_index("authors"), pyarrow.field("authors", pyarrow.list_(pyarrow.string())))
+    return pyarrow.Table.from_pandas(df, schema=schema, preserve_index=False)
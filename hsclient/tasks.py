@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+from hsclient.utils import backoff_delays
+
+
+class _ZipTask:
+    def __init__(self, future, task_id, download_path, save_path, chunk_size, then, delays, deadline):
+        self.future = future
+        self.task_id = task_id
+        self.download_path = download_path
+        self.save_path = save_path
+        self.chunk_size = chunk_size
+        self.then = then
+        self.delays = delays
+        self.deadline = deadline
+        self.next_poll = time.monotonic()
+
+
+class TaskPoller:
+    """
+    Waits on the zip tasks HydroShare runs to build folder and aggregation downloads.  Zips are requested up front over
+    a thread pool and a single thread polls every outstanding task, backing off exponentially with jitter for each
+    task.  Each archive is downloaded as soon as its task completes.
+    :param hs_session: The HydroShareSession to make requests with
+    :param max_workers: The number of concurrent zip requests and downloads
+    :param initial_delay: The number of seconds before a task is polled again the first time
+    :param max_delay: The maximum number of seconds between polls of a task
+    """
+
+    def __init__(self, hs_session, max_workers: int = 4, initial_delay: float = 0.5, max_delay: float = 30.0):
+        self._hs_session = hs_session
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._initial_delay = initial_delay
+        self._max_delay = max_delay
+        self._waiting = []
+        self._condition = threading.Condition()
+        self._thread = None
+        # the number of submitted zips whose futures are not done yet
+        self._outstanding = 0
+        self._stopped = False
+
+    def submit_zip(
+        self,
+        path: str,
+        save_path: str = "",
+        params: Dict[str, str] = None,
+        chunk_size: int = None,
+        then: Callable[[str], str] = None,
+        timeout: float = None,
+    ) -> Future:
+        """
+        Requests the zip at path and downloads it once HydroShare has built it
+        :param path: The path to request the zip from
+        :param save_path: The local path to save the zip to
+        :param params: The query parameters of the zip request
+        :param chunk_size: The number of bytes written at a time while downloading
+        :param then: Called with the path of the downloaded zip in a worker thread, its return value is the result
+        :param timeout: The number of seconds to wait for the task before failing with a TimeoutError
+        :return: A Future resolving to the path of the downloaded zip, or the return value of then
+        """
+        future = Future()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            self._executor.submit(self._request, future, path, params, save_path, chunk_size, then, deadline)
+            self._outstanding += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops accepting zips.  If wait is True, waits for every submitted zip to be built and downloaded, otherwise the
+        zips still being built fail with a RuntimeError.
+        """
+        with self._condition:
+            if wait:
+                while self._outstanding or self._thread is not None:
+                    self._condition.wait()
+            else:
+                self._stopped = True
+                stopped, self._waiting = self._waiting, []
+                self._condition.notify_all()
+        if not wait:
+            for task in stopped:
+                task.future.set_exception(RuntimeError(f"The task poller was shut down before {task.task_id} finished"))
+        self._executor.shutdown(wait=wait)
+
+    def _done(self, future):
+        with self._condition:
+            self._outstanding -= 1
+            self._condition.notify_all()
+
+    def _request(self, future, path, params, save_path, chunk_size, then, deadline):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            task_id, download_path, ready = self._hs_session._request_zip(path, params)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        delays = backoff_delays(self._initial_delay, self._max_delay)
+        task = _ZipTask(future, task_id, download_path, save_path, chunk_size, then, delays, deadline)
+        if ready:
+            self._download(task)
+            return
+        with self._condition:
+            if self._stopped:
+                task.future.set_exception(RuntimeError(f"The task poller was shut down before {task_id} finished"))
+                return
+            self._waiting.append(task)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name="hsclient-task-poller", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _poll(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._waiting:
+                        self._thread = None
+                        self._condition.notify_all()
+                        return
+                    now = time.monotonic()
+                    due = [task for task in self._waiting if task.next_poll <= now]
+                    if due:
+                        break
+                    self._condition.wait(min(task.next_poll for task in self._waiting) - now)
+            for task in due:
+                self._check(task)
+
+    def _check(self, task):
+        error = None
+        ready = False
+        try:
+            ready = self._hs_session.task_ready(task.task_id)
+        except Exception as e:
+            error = e
+        if error is None and not ready and task.deadline is not None and time.monotonic() >= task.deadline:
+            error = TimeoutError(f"Timed out waiting for task {task.task_id} to zip {task.download_path}")
+        with self._condition:
+            if task not in self._waiting:
+                # failed by shutdown(wait=False) while it was being checked
+                return
+            if error is not None or ready:
+                self._waiting.remove(task)
+            else:
+                task.next_poll = time.monotonic() + next(task.delays)
+        if error is not None:
+            task.future.set_exception(error)
+        elif ready:
+            try:
+                self._executor.submit(self._download, task)
+            except RuntimeError as e:
+                task.future.set_exception(e)
+
+    def _download(self, task):
+        try:
+            downloaded = self._hs_session.retrieve_file(task.download_path, task.save_path, task.chunk_size)
+            if task.then is not None:
+                downloaded = task.then(downloaded)
+            task.future.set_result(downloaded)
+        except Exception as e:
+            task.future.set_exception(e)
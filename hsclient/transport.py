@@ -0,0 +1,71 @@
+import threading
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[None, float, Tuple[float, float]]
+
+# the methods which are safe to repeat when a request fails
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+
+def retry_policy(
+    max_retries: int = 3, backoff_factor: float = 0.5, status_forcelist: Iterable[int] = (429, 502, 503, 504)
+) -> Retry:
+    """
+    The urllib3 retry policy for requests made to HydroShare.  Idempotent requests failing to connect or answered with
+    a status in status_forcelist are retried up to max_retries times, waiting backoff_factor * 2 ** (retry - 1)
+    seconds in between, or as long as a Retry-After header asks for.  Once the retries are exhausted the last response
+    is returned so the error is raised with the status HydroShare answered with.
+    """
+    options = dict(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=frozenset(status_forcelist),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=IDEMPOTENT_METHODS, **options)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=IDEMPOTENT_METHODS, **options)
+
+
+class HydroShareAdapter(HTTPAdapter):
+    """
+    A transport adapter with a sized connection pool, a retry policy and a default timeout, counting the requests sent
+    through it and the retries they took
+    :param pool_connections: The number of hosts to keep connection pools for
+    :param pool_maxsize: The maximum number of connections kept alive to each host
+    :param max_retries: The urllib3 Retry policy, see retry_policy
+    :param timeout: The default timeout of a request in seconds, or a (connect, read) tuple, None to wait indefinitely
+    """
+
+    def __init__(
+        self, pool_connections: int = 10, pool_maxsize: int = 32, max_retries: Retry = None, timeout: Timeout = None
+    ):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0}
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries if max_retries is not None else retry_policy(),
+        )
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """The number of requests sent and the number of times they were retried"""
+        with self._lock:
+            return dict(self._stats)
+
+    def send(self, request, timeout: Optional[Timeout] = None, **kwargs):
+        response = super().send(request, timeout=timeout if timeout is not None else self.timeout, **kwargs)
+        retries = getattr(response.raw, "retries", None)
+        with self._lock:
+            self._stats["requests"] += 1
+            if retries is not None:
+                self._stats["retries"] += len(retries.history)
+        return response
@@ -1,8 +1,16 @@
+import random
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter
 from os.path import splitext
+from typing import Any, Callable, Iterator, Tuple
 from urllib.request import pathname2url
 
 from hsmodels.schemas.enums import AggregationType
 
+from hsclient.exceptions import HydroShareTaskError
+
 
 def is_aggregation(path):
     return path.endswith('#aggregation')
@@ -22,6 +30,17 @@ def main_file_type(type: AggregationType):
     return None
 
 
+def may_create_aggregation(path) -> bool:
+    """
+    Checks whether HydroShare may create or update an aggregation when a file is added at path, either because the
+    file type is aggregated on upload or because the file holds aggregation metadata
+    """
+    name = path.lower()
+    if name.endswith(".refts.json") or name.endswith("_resmap.xml") or name.endswith("_meta.xml"):
+        return True
+    return splitext(name)[1] in (".tif", ".tiff", ".vrt", ".nc", ".shp", ".shx", ".dbf", ".prj", ".sqlite")
+
+
 def attribute_filter(o, key, value) -> bool:
     if isinstance(o, list):
         if key == "contains":
@@ -45,6 +64,172 @@ def attribute_filter(o, key, value) -> bool:
     return attr == value
 
 
+def hashable(value) -> bool:
+    """Checks whether value can be used as a dictionary key"""
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+_missing = object()
+
+
+def _compare(operator: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def compare(attr, value):
+        if attr is None:
+            return False
+        try:
+            if isinstance(attr, (date, datetime)) and isinstance(value, str):
+                value = type(attr).fromisoformat(value)
+            return operator(attr, value)
+        except TypeError:
+            return False
+        except ValueError:
+            raise ValueError(f"{value!r} is not an ISO formatted {type(attr).__name__}") from None
+
+    return compare
+
+
+def _contains(attr, value) -> bool:
+    try:
+        return value in attr
+    except TypeError:
+        return False
+
+
+def _regex(attr, pattern) -> bool:
+    return attr is not None and pattern.search(str(attr)) is not None
+
+
+# operators which may end a filter key, each called with the attribute and the filter value
+filter_operators = {
+    "in": lambda attr, values: _contains(values, attr),
+    "startswith": lambda attr, prefix: isinstance(attr, str) and attr.startswith(prefix),
+    "endswith": lambda attr, suffix: isinstance(attr, str) and attr.endswith(suffix),
+    "gt": _compare(lambda attr, value: attr > value),
+    "gte": _compare(lambda attr, value: attr >= value),
+    "lt": _compare(lambda attr, value: attr < value),
+    "lte": _compare(lambda attr, value: attr <= value),
+    "regex": _regex,
+}
+
+# the operators of attribute_filter, only applied to lists and dictionaries and otherwise treated as attribute names
+_container_operators = {
+    "contains": (list, _contains),
+    "key": (dict, _contains),
+    "value": (dict, lambda attr, value: value in attr.values()),
+}
+
+
+@lru_cache(maxsize=256)
+def _compile_key(key: str) -> Tuple[Callable[[Any], Any], str]:
+    """Splits a filter key into a getter for the attribute path and the name of the operator applied to it"""
+    keys = key.split("__")
+    operator = "eq"
+    if len(keys) > 1 and (keys[-1] in filter_operators or keys[-1] in _container_operators):
+        operator = keys.pop()
+    return attrgetter(".".join(keys)), operator
+
+
+def _filter_value(operator: str, value):
+    """Prepares the value of a filter for its operator, compiling patterns and freezing collections"""
+    if operator == "regex":
+        return re.compile(value)
+    if operator == "in":
+        try:
+            return frozenset(value)
+        except TypeError:
+            return tuple(value)
+    return value
+
+
+def _container_condition(get: Callable[[Any], Any], operator: str, value) -> Callable[[Any], bool]:
+    """A condition applying a container operator to lists or dictionaries and comparing other attributes by name"""
+    container_type, contains = _container_operators[operator]
+
+    def condition(o):
+        attr = get(o)
+        if isinstance(attr, container_type):
+            return contains(attr, value)
+        return attr is not _missing and getattr(attr, operator, _missing) == value
+
+    return condition
+
+
+def _operator_condition(key: str, get: Callable[[Any], Any], operator: str, value) -> Callable[[Any], bool]:
+    """A condition applying one of the filter_operators, reporting an invalid value along with the filter key"""
+    evaluate = filter_operators[operator]
+
+    def condition(o):
+        attr = get(o)
+        try:
+            return attr is not _missing and evaluate(attr, value)
+        except ValueError as e:
+            raise ValueError(f"Invalid value for the filter {key}: {e}") from None
+
+    return condition
+
+
+def _compile_condition(key: str, value) -> Callable[[Any], bool]:
+    getter, operator = _compile_key(key)
+    value = _filter_value(operator, value)
+
+    def get(o):
+        try:
+            return getter(o)
+        except AttributeError:
+            return _missing
+
+    if operator == "eq":
+        return lambda o: get(o) == value
+    if operator in _container_operators:
+        return _container_condition(get, operator, value)
+    return _operator_condition(key, get, operator, value)
+
+
+def compile_filter(**kwargs) -> Callable[[Any], bool]:
+    """
+    Compiles filter keyword arguments into a predicate which checks all of them against an object in one pass.  Keys
+    are attribute names, nested attributes are separated by __ (double underscore) and a key may end with an operator,
+    for example folder__startswith="data" or modified__gt="2021-01-01".  The operators are in, startswith, endswith,
+    gt, gte, lt, lte and regex, along with contains for lists and key and value for dictionaries.  Without an operator
+    the attribute must equal the value.  Dates and datetimes are compared with ISO formatted strings by parsing them.
+    :params **kwargs: the filters
+    :return: a function taking an object and returning whether it matches every filter
+    """
+    conditions = [_compile_condition(key, value) for key, value in kwargs.items()]
+    if not conditions:
+        return lambda o: True
+    if len(conditions) == 1:
+        return conditions[0]
+    return lambda o: all(condition(o) for condition in conditions)
+
+
+def backoff_delays(
+    initial: float = 0.5, maximum: float = 30.0, factor: float = 2.0, jitter: float = 0.25
+) -> Iterator[float]:
+    """
+    Yields delays growing exponentially from initial up to maximum.  Each delay is randomly varied by up to the jitter
+    fraction of itself so that clients waiting on the same thing spread out their requests.
+    """
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, maximum)
+
+
+def task_status_ready(task_id: str, status: str) -> bool:
+    """
+    Whether a status reported by HydroShare for a task means it is done, raises a HydroShareTaskError if the status
+    reports that the task failed
+    """
+    if str(status).lower() in ("failed", "failure", "aborted", "revoked"):
+        raise HydroShareTaskError(task_id, status)
+    return status == 'true'
+
+
 def encode_resource_url(url):
     """
     URL encodes a full resource file/folder url.
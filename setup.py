@@ -14,6 +14,11 @@ setup(
         'requests_oauthlib',
         'pandas'
     ],
+    extras_require={
+        'async': ['aiohttp'],
+        'remote': ['apsw'],
+        'arrow': ['pyarrow'],
+    },
     url='https://github.com/hydroshare/hsclient',
     license='MIT',
     author='Scott Black',
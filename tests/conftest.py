@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+RESOURCE_ID = "97523bdb7b174901b3fc2d89813458f1"
+
+Request = namedtuple("Request", ["command", "path", "headers", "body"])
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+metadata_dir = os.path.join(data_dir, "test_resource_metadata_files")
+
+
+def serve(request, content, filename):
+    """
+    Serves content as a download named filename with an ETag, answering Range requests the way HydroShare's storage
+    does, including If-Range requests for a changed file with the whole file
+    """
+    etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+    }
+    range_header = request.headers.get("Range")
+    if not range_header or request.headers.get("If-Range", etag) != etag:
+        return 200, headers, content
+    start, end = range_header.split("=", 1)[1].split("-", 1)
+    start, end = int(start), min(int(end or len(content) - 1), len(content) - 1)
+    if start >= len(content):
+        return 416, {"Content-Range": f"bytes */{len(content)}"}, b""
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+    return 206, headers, content[start : end + 1]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers requests from the routes of the StandInServer.  A route is either the bytes of a file, served with serve,
+    or a callable taking the Request and returning a (status, headers, body) tuple.  A body shorter than the
+    Content-Length header of a route is sent before the connection is dropped.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _respond(self):
+        request = Request(self.command, self.path, self.headers, self._read_body())
+        self.server.requests.append(request)
+        route = self.server.routes.get((self.command, urlparse(self.path).path.rstrip("/")))
+        if route is None:
+            status, headers, body = 404, {}, b"not found"
+        elif callable(route):
+            status, headers, body = route(request)
+        else:
+            status, headers, body = serve(request, route, os.path.basename(urlparse(self.path).path.rstrip("/")))
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if "Content-Length" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        elif int(headers["Content-Length"]) > len(body):
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+
+class StandInServer(ThreadingHTTPServer):
+    """A local stand-in for HydroShare serving the test resource from the files in tests/data"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.requests = []
+        self.routes = {}
+        resource = f"/resource/{RESOURCE_ID}"
+        self.route("GET", f"{resource}/data/resourcemap.xml", os.path.join(metadata_dir, "resourcemap.xml"))
+        self.route("GET", f"{resource}/data/resourcemetadata.xml", os.path.join(metadata_dir, "resourcemetadata.xml"))
+        self.route("GET", f"{resource}/manifest-md5.txt", os.path.join(metadata_dir, "manifest-md5.txt"))
+        for file in ["test.xml", "test_meta.xml", "test_resmap.xml"]:
+            self.route("GET", f"{resource}/data/contents/{file}", os.path.join(metadata_dir, file))
+        self.route("GET", f"{resource}/data/contents/other.txt", os.path.join(data_dir, "other.txt"))
+        self.route("GET", f"{resource}/data/contents/folder/another.txt", os.path.join(data_dir, "another.txt"))
+
+    def route(self, method, path, route):
+        """Serves the route at path, a path to a local file is served as its contents"""
+        if isinstance(route, str):
+            with open(route, "rb") as f:
+                route = f.read()
+        self.routes[(method, path.rstrip("/"))] = route
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+@pytest.fixture()
+def stand_in():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
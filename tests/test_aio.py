@@ -0,0 +1,177 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import pytest
+from conftest import RESOURCE_ID, data_dir
+from hsmodels.schemas.enums import AggregationType
+
+pytest.importorskip("aiohttp")
+
+from hsclient import HydroShareHTTPError, HydroShareTaskError  # noqa: E402
+from hsclient.aio import AsyncHydroShare  # noqa: E402
+
+
+def async_hydroshare(stand_in):
+    return AsyncHydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+
+
+def test_async_resource_files_and_aggregations(stand_in):
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            res = await hs.resource(RESOURCE_ID)
+            assert res.resource_id == RESOURCE_ID
+            assert sorted(await res.files()) == ["folder/another.txt", "other.txt"]
+            assert (await res.file(name="other.txt")).checksum == "fe05f0cb46cb6d0691dd08655c675f89"
+            assert len(await res.files(search_aggregations=True)) == 3
+            aggregations = await res.aggregations(type=AggregationType.SingleFileAggregation)
+            assert len(aggregations) == 1
+            assert aggregations[0].metadata.title == "test"
+            assert await aggregations[0].files() == ["test.xml"]
+            assert not await res.aggregation(title="bad")
+
+    asyncio.run(run())
+    # resource map, metadata, manifest, aggregation map and aggregation metadata
+    assert len(stand_in.requests) == 5
+
+
+def test_async_file_download(stand_in):
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            res = await hs.resource(RESOURCE_ID)
+            with tempfile.TemporaryDirectory() as tmp:
+                downloaded = await asyncio.gather(
+                    res.file_download("other.txt", save_path=tmp),
+                    res.file_download("folder/another.txt", save_path=tmp),
+                )
+                assert [os.path.basename(file) for file in downloaded] == ["other.txt", "another.txt"]
+                with open(downloaded[0]) as f:
+                    assert f.read().strip() == "hello dude"
+
+    asyncio.run(run())
+
+
+def test_async_file_upload(stand_in):
+    stand_in.route("POST", f"/hsapi/resource/{RESOURCE_ID}/files", lambda request: (201, {}, b""))
+    stand_in.route("POST", f"/hsapi/resource/{RESOURCE_ID}/files/folder", lambda request: (201, {}, b""))
+
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            res = await hs.resource(RESOURCE_ID)
+            files = [os.path.join(data_dir, "other.txt"), os.path.join(data_dir, "another.txt")]
+            results = await res.file_upload(*files, destination_path="folder")
+            assert results == {files[0]: None, files[1]: None}
+            results = await res.file_upload(os.path.join(data_dir, "missing.txt"))
+            assert isinstance(results[os.path.join(data_dir, "missing.txt")], FileNotFoundError)
+
+    asyncio.run(run())
+    uploads = [request for request in stand_in.requests if request.command == "POST"]
+    assert len(uploads) == 2
+    assert all(b'filename="' in request.body for request in uploads)
+
+
+def test_async_search_pages(stand_in):
+    def search(request):
+        page = 2 if "page=2" in request.path else 1
+        body = {
+            "results": [{"resource_id": f"{page}-{i}", "authors": None} for i in range(3)],
+            "next": f"http://127.0.0.1:{stand_in.port}/hsapi/resource/?page=2" if page == 1 else None,
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    stand_in.route("GET", "/hsapi/resource", search)
+
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            return [result async for result in hs.search(subject=["a", "b"])]
+
+    results = asyncio.run(run())
+    assert [result.resource_id for result in results] == ["1-0", "1-1", "1-2", "2-0", "2-1", "2-2"]
+    assert results[0].authors == []
+    assert "subject=a,b" in stand_in.requests[0].path
+
+
+def test_async_retrieve_zip_polls_task(stand_in):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zipped:
+        zipped.writestr("another.txt", "another hello dude")
+    polls = []
+
+    def task_status(request):
+        polls.append(request)
+        return 200, {}, json.dumps({"status": "true" if len(polls) > 1 else "false"}).encode()
+
+    stand_in.route(
+        "GET",
+        f"/resource/{RESOURCE_ID}/data/contents/folder",
+        lambda request: (
+            200,
+            {},
+            json.dumps({"task_id": "task", "download_path": "/zips/folder.zip", "zip_status": "Not ready"}).encode(),
+        ),
+    )
+    stand_in.route("GET", "/hsapi/taskstatus/task", task_status)
+    stand_in.route("GET", "/zips/folder.zip", archive.getvalue())
+
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            res = await hs.resource(RESOURCE_ID)
+            with tempfile.TemporaryDirectory() as tmp:
+                downloaded = await res.folder_download("folder", save_path=tmp)
+                assert os.path.basename(downloaded) == "folder.zip"
+                with zipfile.ZipFile(downloaded) as zipped:
+                    assert zipped.namelist() == ["another.txt"]
+
+    asyncio.run(run())
+    assert len(polls) == 2
+
+
+def zip_task_route(stand_in, status):
+    stand_in.route(
+        "GET",
+        f"/resource/{RESOURCE_ID}/data/contents/folder",
+        lambda request: (
+            200,
+            {},
+            json.dumps({"task_id": "task", "download_path": "/zips/folder.zip", "zip_status": "Not ready"}).encode(),
+        ),
+    )
+    stand_in.route("GET", "/hsapi/taskstatus/task", lambda request: (200, {}, json.dumps({"status": status}).encode()))
+
+
+def test_async_retrieve_zip_failed_task(stand_in):
+    zip_task_route(stand_in, "Failed")
+
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            await hs._hs_session.retrieve_zip(f"/resource/{RESOURCE_ID}/data/contents/folder")
+
+    with pytest.raises(HydroShareTaskError, match="failed with status Failed"):
+        asyncio.run(run())
+
+
+def test_async_retrieve_zip_timeout(stand_in):
+    zip_task_route(stand_in, "false")
+
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            await hs._hs_session.retrieve_zip(f"/resource/{RESOURCE_ID}/data/contents/folder", timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+def test_async_http_errors(stand_in):
+    async def run():
+        async with async_hydroshare(stand_in) as hs:
+            with pytest.raises(HydroShareHTTPError) as error:
+                await hs._hs_session.get("/missing", status_code=200)
+            assert error.value.status_code == 404
+            with pytest.raises(HydroShareHTTPError) as error:
+                await hs._hs_session.retrieve_file("/missing")
+            assert error.value.status_code == 404
+
+    asyncio.run(run())
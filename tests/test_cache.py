@@ -0,0 +1,92 @@
+import hashlib
+
+import pytest
+from conftest import RESOURCE_ID
+
+from hsclient import HydroShare
+from hsclient.cache import DiskCache
+
+
+def etag_route(content):
+    """A route serving content with an ETag, answering 304 when the If-None-Match header matches it"""
+    etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+
+    def route(request):
+        if request.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, content
+
+    return route
+
+
+@pytest.fixture()
+def cached_stand_in(stand_in):
+    for key, content in list(stand_in.routes.items()):
+        stand_in.routes[key] = etag_route(content)
+    return stand_in
+
+
+def test_disk_cache_revalidates(cached_stand_in, tmp_path):
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=cached_stand_in.port, cache_dir=str(tmp_path))
+    res = hs.resource(RESOURCE_ID)
+    assert len(res.files()) == 2
+    assert not any("If-None-Match" in request.headers for request in cached_stand_in.requests)
+
+    cached_stand_in.requests.clear()
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=cached_stand_in.port, cache_dir=str(tmp_path))
+    res = hs.resource(RESOURCE_ID)
+    assert len(res.files()) == 2
+    assert res.metadata.title
+    assert len(cached_stand_in.requests) == 3
+    assert all("If-None-Match" in request.headers for request in cached_stand_in.requests)
+
+    manifest = f"/resource/{RESOURCE_ID}/manifest-md5.txt"
+    changed = (
+        b"d41d8cd98f00b204e9800998ecf8427e    data/contents/other.txt\n"
+        b"d41d8cd98f00b204e9800998ecf8427e    data/contents/folder/another.txt\n"
+    )
+    cached_stand_in.route("GET", manifest, etag_route(changed))
+    res.refresh()
+    assert res.file(path="other.txt").checksum == "d41d8cd98f00b204e9800998ecf8427e"
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    cache.put("a", [b"1234"])
+    cache.put("b", [b"1234"])
+    assert cache.get("a")
+    cache.put("c", [b"1234"])
+    assert cache.get("b") is None
+    with open(cache.get("a").path, "rb") as f:
+        assert f.read() == b"1234"
+    assert cache.get("c").size == 4
+
+    cache = DiskCache(str(tmp_path), max_bytes=10)
+    assert cache.get("a")
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_resource_cache(stand_in):
+    stand_in.route("POST", f"/hsapi/resource/{RESOURCE_ID}/functions/move-or-rename", lambda request: (200, {}, b""))
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, resource_cache_size=1, resource_cache_ttl=60)
+    res = hs.resource(RESOURCE_ID)
+    assert hs.resource(RESOURCE_ID) is res
+    assert len(stand_in.requests) == 2
+    assert hs.resource_cache_stats()["hits"] == 1
+    assert hs.resource_cache_stats()["misses"] == 1
+
+    res.file_rename("other.txt", "renamed.txt")
+    assert hs.resource_cache_stats()["invalidations"] == 1
+    assert hs.resource(RESOURCE_ID) is not res
+
+    hs.resource("0" * 32, validate=False)
+    assert hs.resource_cache_stats()["evictions"] == 1
+    assert hs.resource_cache_stats()["size"] == 1
+
+
+def test_resource_cache_expires(stand_in):
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, resource_cache_size=8, resource_cache_ttl=0)
+    res = hs.resource(RESOURCE_ID)
+    assert hs.resource(RESOURCE_ID) is not res
+    assert hs.resource_cache_stats()["expirations"] == 1
@@ -0,0 +1,168 @@
+import hashlib
+import os
+
+import pytest
+import requests
+from conftest import RESOURCE_ID, serve
+
+from hsclient import FileChangedError, HydroShare, HydroShareHTTPError
+
+content = bytes(range(256)) * 4096
+path = f"/resource/{RESOURCE_ID}/data/contents/large.bin"
+
+
+def session(stand_in, **kwargs):
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, chunk_size=4096, **kwargs)
+    return hs._hs_session
+
+
+def dropping_route(content, drops):
+    """Serves content, dropping the connection halfway through the response for the first drops requests"""
+    requests = []
+
+    def route(request):
+        requests.append(request)
+        status, headers, body = serve(request, content, "large.bin")
+        if len(requests) <= drops:
+            headers["Content-Length"] = str(len(body))
+            body = body[: len(body) // 2]
+        return status, headers, body
+
+    return route, requests
+
+
+def test_download_resumes_after_dropped_connection(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=2)
+    stand_in.route("GET", path, route)
+    downloaded = session(stand_in).retrieve_file(path, str(tmp_path))
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    assert [request.headers.get("Range") for request in requests] == [
+        None,
+        f"bytes={len(content) // 2}-",
+        f"bytes={len(content) * 3 // 4}-",
+    ]
+    assert os.listdir(tmp_path) == ["large.bin"]
+
+
+def test_download_gives_up_after_retries(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=10)
+    stand_in.route("GET", path, route)
+    with pytest.raises(Exception):
+        session(stand_in, download_retries=1).retrieve_file(path, str(tmp_path))
+    assert len(requests) == 2
+    assert sorted(os.listdir(tmp_path)) == ["large.bin.part", "large.bin.part.etag"]
+
+
+def test_download_resumes_part_file(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=1)
+    stand_in.route("GET", path, route)
+    with pytest.raises(Exception):
+        session(stand_in, download_retries=0).retrieve_file(path, str(tmp_path))
+
+    checksum = hashlib.md5(content).hexdigest()
+    downloaded = session(stand_in).retrieve_file(path, str(tmp_path), checksum=checksum)
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    assert requests[-1].headers.get("Range") == f"bytes={len(content) // 2}-"
+
+
+def test_download_restarts_when_file_changed(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=1)
+    stand_in.route("GET", path, route)
+    with pytest.raises(Exception):
+        session(stand_in, download_retries=0).retrieve_file(path, str(tmp_path))
+
+    changed = content[::-1]
+    stand_in.route("GET", path, lambda request: serve(request, changed, "large.bin"))
+    downloaded = session(stand_in).retrieve_file(path, str(tmp_path))
+    with open(downloaded, "rb") as f:
+        assert f.read() == changed
+    assert os.listdir(tmp_path) == ["large.bin"]
+
+
+def test_segmented_download(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=0)
+    stand_in.route("GET", path, route)
+    downloaded = session(stand_in).retrieve_file(
+        path, str(tmp_path), segments=4, checksum=hashlib.md5(content).hexdigest()
+    )
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    quarter = len(content) // 4
+    assert sorted(request.headers.get("Range") or "" for request in requests) == [""] + [
+        f"bytes={start}-{start + quarter - 1}" for start in range(0, len(content), quarter)
+    ]
+    assert os.listdir(tmp_path) == ["large.bin"]
+
+
+def test_segmented_download_resumes_segments(stand_in, tmp_path):
+    route, requests = dropping_route(content, drops=3)
+    stand_in.route("GET", path, route)
+    downloaded = session(stand_in).retrieve_file(path, str(tmp_path), segments=2)
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    assert len(requests) == 5
+
+
+def test_segmented_download_falls_back_to_a_single_stream(stand_in, tmp_path):
+    requests = []
+
+    def route(request):
+        requests.append(request)
+        status, headers, body = serve(request, content, "large.bin")
+        del headers["Accept-Ranges"]
+        return status, headers, body
+
+    stand_in.route("GET", path, route)
+    downloaded = session(stand_in).retrieve_file(path, str(tmp_path), segments=4)
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    assert len(requests) == 1
+
+
+def test_segmented_download_of_a_changed_file(stand_in, tmp_path):
+    requests = []
+
+    def route(request):
+        requests.append(request)
+        # the file changes after the first request, so the segments are answered with the whole new file
+        return serve(request, content if len(requests) == 1 else content[::-1], "large.bin")
+
+    stand_in.route("GET", path, route)
+    with pytest.raises(FileChangedError) as error:
+        session(stand_in).retrieve_file(path, str(tmp_path), segments=2)
+    assert isinstance(error.value, HydroShareHTTPError)
+    assert error.value.status_code == 200
+    assert "the file changed during a segmented download" in str(error.value)
+
+
+@pytest.fixture()
+def chunk_sizes(monkeypatch):
+    """Records the chunk_size each response body is streamed with and the size of the largest chunk read"""
+    sizes = []
+    iter_content = requests.models.Response.iter_content
+
+    def recording_iter_content(self, chunk_size=1, decode_unicode=False):
+        largest = 0
+        for chunk in iter_content(self, chunk_size=chunk_size, decode_unicode=decode_unicode):
+            largest = max(largest, len(chunk))
+            yield chunk
+        sizes.append((chunk_size, largest))
+
+    monkeypatch.setattr(requests.models.Response, "iter_content", recording_iter_content)
+    return sizes
+
+
+def test_download_streams_in_chunks(stand_in, tmp_path, chunk_sizes):
+    stand_in.route("GET", path, content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, chunk_size=1000)
+    hs_session = hs._hs_session
+    downloaded = hs_session.retrieve_file(path, str(tmp_path))
+    with open(downloaded, "rb") as f:
+        assert f.read() == content
+    assert chunk_sizes == [(1000, 1000)]
+
+    del chunk_sizes[:]
+    hs_session.retrieve_file(path, str(tmp_path), chunk_size=256)
+    assert chunk_sizes == [(256, 256)]
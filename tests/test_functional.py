@@ -61,6 +61,19 @@ def test_absolute_path_multiple_file_upload(new_resource):
     assert len(new_resource.files()) == 2
 
 
+def test_parallel_file_upload(new_resource):
+    files = [
+        os.path.join("data", "other.txt"),
+        os.path.join("data", "another.txt"),
+        os.path.join("data", "does_not_exist.txt"),
+    ]
+    results = new_resource.file_upload(*files, parallel=2)
+    assert len(new_resource.files()) == 2
+    assert results[files[0]] is None
+    assert results[files[1]] is None
+    assert isinstance(results[files[2]], FileNotFoundError)
+
+
 def test_absolute_path_single_file_upload(new_resource):
     rel_path = os.path.join("data", "other.txt")
     new_resource.file_upload(os.path.abspath(rel_path))
@@ -344,6 +357,17 @@ def test_refresh(resource):
     assert resource._parsed_aggregations is None
 
 
+def test_prefetch(resource):
+    resource.refresh(eager=True)
+    assert resource._retrieved_map
+    assert resource._retrieved_metadata
+    assert resource._parsed_checksums
+    agg = resource._parsed_aggregations[0]
+    assert agg._retrieved_map
+    assert agg._retrieved_metadata
+    assert resource.aggregation(type=AggregationType.GeographicRasterAggregation) is agg
+
+
 def test_empty_creator(new_resource):
     new_resource.metadata.creators.clear()
     try:
@@ -0,0 +1,304 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import zipfile
+
+import pytest
+from conftest import RESOURCE_ID, data_dir
+
+from hsclient import ChecksumMismatchError, HydroShare
+from hsclient.hydroshare import Aggregation
+
+hsapi = f"/hsapi/resource/{RESOURCE_ID}"
+
+
+@pytest.fixture()
+def resource(stand_in):
+    for path in ["functions/move-or-rename", "functions/zip"]:
+        stand_in.route("POST", f"{hsapi}/{path}", lambda request: (200, {}, b""))
+    for path in ["files/other.txt", "files/folder/another.txt", "folders/folder"]:
+        stand_in.route("DELETE", f"{hsapi}/{path}", lambda request: (200, {}, b""))
+    for path in ["files", "files/folder"]:
+        stand_in.route("POST", f"{hsapi}/{path}", lambda request: (201, {}, b""))
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    assert sorted(res.files()) == ["folder/another.txt", "other.txt"]
+    stand_in.requests.clear()
+    return res
+
+
+def assert_not_refreshed(stand_in):
+    assert not [request for request in stand_in.requests if request.command == "GET"]
+
+
+def test_file_rename_updates_locally(stand_in, resource):
+    checksum = resource.file(path="other.txt").checksum
+    resource.file_rename("other.txt", "renamed.txt")
+    renamed = resource.file(path="renamed.txt")
+    assert renamed.checksum == checksum
+    assert renamed.url.endswith(f"/resource/{RESOURCE_ID}/data/contents/renamed.txt")
+    assert not resource.file(path="other.txt")
+
+    resource.folder_rename("folder", "moved")
+    assert sorted(resource.files()) == ["moved/another.txt", "renamed.txt"]
+    assert_not_refreshed(stand_in)
+
+
+def test_file_and_folder_delete_update_locally(stand_in, resource):
+    resource.file_delete("other.txt")
+    assert resource.files() == ["folder/another.txt"]
+    resource.folder_delete("folder")
+    assert resource.files() == []
+    assert_not_refreshed(stand_in)
+
+
+def test_file_zip_updates_locally(stand_in, resource):
+    resource.file_zip("folder/another.txt")
+    assert sorted(resource.files()) == ["folder/another.txt.zip", "other.txt"]
+    assert resource.file(path="folder/another.txt.zip").checksum is None
+    assert_not_refreshed(stand_in)
+
+
+def test_file_upload_updates_locally(stand_in, resource):
+    file = os.path.join(data_dir, "another.txt")
+    resource.file_upload(file, destination_path="folder")
+    resource.file_upload(os.path.join(data_dir, "other.txt"), destination_path="/")
+    with open(file, "rb") as f:
+        assert resource.file(path="folder/another.txt").checksum == hashlib.md5(f.read()).hexdigest()
+    assert len(resource.files()) == 2
+    assert_not_refreshed(stand_in)
+
+
+def test_aggregation_upload_refreshes(stand_in, resource):
+    resource.file_upload(os.path.join(data_dir, "test_resource_metadata_files", "test_meta.xml"))
+    resource.files()
+    assert [request for request in stand_in.requests if request.command == "GET"]
+
+
+def test_aggregation_folder_refreshes(stand_in, resource):
+    resource._aggregations[0]._map_path = f"/resource/{RESOURCE_ID}/data/contents/folder/test_resmap.xml"
+    resource.file_delete("folder/another.txt")
+    resource.files()
+    assert [request for request in stand_in.requests if request.command == "GET"]
+
+
+def test_file_lookups(stand_in, resource):
+    assert resource.file(name="another.txt").folder == "folder"
+    assert resource.files(extension=".txt", folder="folder") == ["folder/another.txt"]
+    assert resource.files(extension=".txt", name="missing.txt") == []
+    assert resource.file(path="test.xml") is None
+    assert resource.file(path="test.xml", search_aggregations=True) == "test.xml"
+    assert resource.files(path=["unhashable"]) == []
+
+    resource.file_rename("other.txt", "renamed.txt")
+    assert resource.file(name="other.txt") is None
+    assert resource.file(name="renamed.txt") == "renamed.txt"
+
+
+def test_file_filter_operators(resource):
+    assert resource.files(extension__in=[".txt", ".csv"], folder__startswith="fold") == ["folder/another.txt"]
+    assert resource.files(name__regex=r"^oth") == ["other.txt"]
+    assert resource.file(path="other.txt", name__regex="^another") is None
+    assert len(resource.aggregations(title__regex="^te")) == 1
+    assert len(resource.aggregations(title__in=["bad"])) == 0
+    assert len(resource.aggregations(file__name="test.xml", files__extension=".xml")) == 1
+
+
+def test_file_storage(resource):
+    file = resource.file(path="other.txt")
+    assert not hasattr(file, "__dict__")
+    assert file.url == f"/resource/{RESOURCE_ID}/data/contents/other.txt"
+    assert file._url_prefix is resource.file(path="folder/another.txt")._url_prefix
+    assert file.checksum == "fe05f0cb46cb6d0691dd08655c675f89"
+    copied = pickle.loads(pickle.dumps(file))
+    assert (copied, copied.url, copied.checksum) == (file, file.url, file.checksum)
+
+
+def test_manifest_is_shared(stand_in, resource):
+    resource.aggregations()
+    assert resource._aggregations[0]._checksums is resource._checksums
+    assert resource._checksums["data/contents/other.txt"] == bytes.fromhex("fe05f0cb46cb6d0691dd08655c675f89")
+    assert not [request for request in stand_in.requests if request.path.endswith("manifest-md5.txt")]
+
+
+def test_parse_manifest():
+    lines = [
+        b"fe05f0cb46cb6d0691dd08655c675f89    data/contents/other.txt",
+        b"d41d8cd98f00b204e9800998ecf8427e    data/contents/a folder/file name.txt",
+        b"",
+    ]
+    checksums = Aggregation._parse_checksums(iter(lines))
+    assert checksums == {
+        "data/contents/other.txt": bytes.fromhex("fe05f0cb46cb6d0691dd08655c675f89"),
+        "data/contents/a folder/file name.txt": bytes.fromhex("d41d8cd98f00b204e9800998ecf8427e"),
+    }
+
+
+def test_verified_file_download(stand_in, resource, tmp_path):
+    downloaded = resource.file_download("other.txt", save_path=str(tmp_path), verify=True)
+    assert os.path.exists(downloaded)
+
+    stand_in.route("GET", f"/resource/{RESOURCE_ID}/data/contents/other.txt", b"corrupted")
+    with pytest.raises(ChecksumMismatchError) as error:
+        resource.file_download("other.txt", save_path=str(tmp_path), verify=True)
+    assert error.value.expected == "fe05f0cb46cb6d0691dd08655c675f89"
+    assert not os.path.exists(downloaded + ".part")
+    with open(downloaded, "rb") as f:
+        assert hashlib.md5(f.read()).hexdigest() == "fe05f0cb46cb6d0691dd08655c675f89"
+    with pytest.raises(ChecksumMismatchError):
+        resource.file_download("missing.txt", save_path=str(tmp_path), verify=True)
+
+
+def test_verified_download_after_local_updates(stand_in, resource, tmp_path):
+    content = open(os.path.join(data_dir, "other.txt"), "rb").read()
+    stand_in.route("POST", f"{hsapi}/files/folder", lambda request: (201, {}, b""))
+    resource.file_rename("other.txt", "renamed.txt")
+    resource.file_upload(os.path.join(data_dir, "other.txt"), destination_path="folder")
+    for path in ["renamed.txt", "folder/other.txt"]:
+        stand_in.route("GET", f"/resource/{RESOURCE_ID}/data/contents/{path}", content)
+        downloaded = resource.file_download(path, save_path=str(tmp_path), verify=True)
+        with open(downloaded, "rb") as f:
+            assert f.read() == content
+    with pytest.raises(ChecksumMismatchError):
+        resource.file_download("other.txt", save_path=str(tmp_path), verify=True)
+    # the checksums come from the local updates, the manifest is not requested again
+    assert not [request for request in stand_in.requests if "manifest-md5.txt" in request.path]
+
+
+def aggregation_zip_route(stand_in, content):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zipped:
+        zipped.writestr("test.xml/test.xml", content)
+        zipped.writestr("test.xml/test_meta.xml", "generated")
+    stand_in.route(
+        "GET",
+        f"/django_irods/rest_download/{RESOURCE_ID}/data/contents/test.xml",
+        lambda request: (
+            200,
+            {},
+            json.dumps({"task_id": "task", "download_path": "/zips/test.xml.zip", "zip_status": "Ready"}).encode(),
+        ),
+    )
+    stand_in.route("GET", "/zips/test.xml.zip", archive.getvalue())
+
+
+def test_verified_aggregation_download(stand_in, resource, tmp_path):
+    with open(os.path.join(data_dir, "test_resource_metadata_files", "test.xml"), "rb") as f:
+        aggregation_zip_route(stand_in, f.read())
+    aggregation = resource.aggregation()
+    unzip_to = str(tmp_path / "unzipped")
+    unzipped = resource.aggregation_download(aggregation, str(tmp_path), unzip_to=unzip_to, verify=True)
+    assert sorted(os.listdir(os.path.join(unzipped, "test.xml"))) == ["test.xml", "test_meta.xml"]
+    assert not os.path.exists(tmp_path / "test.xml.zip")
+
+    aggregation_zip_route(stand_in, b"corrupted")
+    with pytest.raises(ChecksumMismatchError) as error:
+        resource.aggregation_download(aggregation, str(tmp_path), verify=True)
+    assert error.value.path == "test.xml"
+    assert not os.path.exists(tmp_path / "test.xml.zip")
+
+
+def test_verified_aggregation_download_leaves_nothing_on_mismatch(stand_in, resource, tmp_path):
+    unzip_to = tmp_path / "unzipped"
+    unzip_to.mkdir()
+    (unzip_to / "kept.txt").write_text("kept")
+    aggregation_zip_route(stand_in, b"corrupted")
+    with pytest.raises(ChecksumMismatchError):
+        resource.aggregation_download(resource.aggregation(), str(tmp_path), unzip_to=str(unzip_to), verify=True)
+    assert os.listdir(unzip_to) == ["kept.txt"]
+    assert sorted(os.listdir(tmp_path)) == ["unzipped"]
+
+
+def test_verified_aggregation_download_skips_files_without_checksums(stand_in, resource, tmp_path):
+    resource._checksums["data/contents/test.xml"] = None
+    aggregation_zip_route(stand_in, b"not in the manifest")
+    unzip_to = str(tmp_path / "unzipped")
+    resource.aggregation_download(resource.aggregation(), str(tmp_path), unzip_to=unzip_to, verify=True)
+    with open(os.path.join(unzip_to, "test.xml", "test.xml"), "rb") as f:
+        assert f.read() == b"not in the manifest"
+
+
+def test_aggregations_download(stand_in, resource, tmp_path):
+    with open(os.path.join(data_dir, "test_resource_metadata_files", "test.xml"), "rb") as f:
+        aggregation_zip_route(stand_in, f.read())
+    aggregation = resource.aggregation()
+    futures = resource.aggregations_download(aggregation, save_path=str(tmp_path), unzip_to=str(tmp_path / "unzipped"))
+    assert futures[aggregation].result(timeout=10) == str(tmp_path / "unzipped")
+    assert os.path.exists(tmp_path / "unzipped" / "test.xml" / "test.xml")
+
+
+def bag_route(stand_in, polls_until_ready):
+    polls = []
+
+    def bag(request):
+        polls.append(request)
+        if len(polls) < polls_until_ready:
+            return 200, {"Content-Type": "text/html"}, b"building" * 1000
+        return (
+            200,
+            {"Content-Type": "application/zip", "Content-Disposition": f'attachment; filename="{RESOURCE_ID}.zip"'},
+            b"bag",
+        )
+
+    stand_in.route("GET", hsapi, bag)
+    return polls
+
+
+def test_bag_download_polls(stand_in, resource, tmp_path):
+    polls = bag_route(stand_in, 2)
+    downloaded = resource.download(save_path=str(tmp_path))
+    assert os.path.basename(downloaded) == f"{RESOURCE_ID}.zip"
+    with open(downloaded, "rb") as f:
+        assert f.read() == b"bag"
+    assert len(polls) == 2
+
+
+def test_bag_download_timeout(stand_in, resource, tmp_path):
+    bag_route(stand_in, 1000)
+    with pytest.raises(TimeoutError):
+        resource.download(save_path=str(tmp_path), timeout=0.2)
+
+
+def test_parallel_upload(stand_in, resource, tmp_path):
+    missing = str(tmp_path / "missing.txt")
+    file = os.path.join(data_dir, "another.txt")
+    results = resource.file_upload(file, missing, destination_path="folder", parallel=2)
+    assert results[file] is None
+    assert isinstance(results[missing], FileNotFoundError)
+    with open(file, "rb") as f:
+        assert resource.file(path="folder/another.txt").checksum == hashlib.md5(f.read()).hexdigest()
+    assert [request.command for request in stand_in.requests] == ["POST"]
+    assert_not_refreshed(stand_in)
+
+
+def test_parallel_upload_refreshes_once(stand_in, resource):
+    def upload(request):
+        return (500, {}, b"failed") if b'filename="other.txt"' in request.body else (201, {}, b"")
+
+    stand_in.route("POST", f"{hsapi}/files", upload)
+    metadata_dir = os.path.join(data_dir, "test_resource_metadata_files")
+    files = [os.path.join(metadata_dir, name) for name in ("test_meta.xml", "test_resmap.xml")]
+    files.append(os.path.join(data_dir, "other.txt"))
+    results = resource.file_upload(*files, parallel=3)
+    assert results[files[0]] is None and results[files[1]] is None
+    assert results[files[2]] is not None
+    resource.files()
+    resource.files()
+    gets = [request.path for request in stand_in.requests if request.command == "GET"]
+    # the aggregations uploaded refresh the resource once, not once per file
+    assert gets and len(gets) == len(set(gets))
+
+
+def test_prefetch_makes_later_filters_local(stand_in):
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    res.prefetch()
+    gets = {request.path.rstrip("/") for request in stand_in.requests if request.command == "GET"}
+    assert f"/resource/{RESOURCE_ID}/data/contents/test_resmap.xml" in gets
+    assert f"/resource/{RESOURCE_ID}/data/contents/test_meta.xml" in gets
+    stand_in.requests.clear()
+    assert res.aggregations(title="test")
+    assert res.files()
+    assert stand_in.requests == []
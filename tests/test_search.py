@@ -0,0 +1,142 @@
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pandas
+import pyarrow
+import pytest
+
+from hsclient import HydroShare
+
+
+def search_route(stand_in, total, report_count=True, delay=None):
+    """A paginated search end point serving total results, page size taken from the count parameter"""
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def search(request):
+        query = parse_qs(urlparse(request.path).query)
+        page = int(query.get("page", ["1"])[0])
+        count = int(query.get("count", ["3"])[0])
+        with lock:
+            in_flight.append(page)
+            peak.append(len(in_flight))
+        if delay:
+            delay(page)
+        start = (page - 1) * count
+        results = [{"resource_id": str(i), "authors": None} for i in range(start, min(start + count, total))]
+        has_next = start + count < total
+        body = {
+            "results": results,
+            "next": (
+                f"http://127.0.0.1:{stand_in.port}/hsapi/resource/?page={page + 1}&count={count}" if has_next else None
+            ),
+        }
+        if report_count:
+            body["count"] = total
+        with lock:
+            in_flight.remove(page)
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    stand_in.route("GET", "/hsapi/resource", search)
+    return peak
+
+
+@pytest.fixture()
+def hs(stand_in):
+    return HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+
+
+@pytest.mark.parametrize("read_ahead", [0, 1, 3])
+def test_search_page_size(stand_in, hs, read_ahead):
+    search_route(stand_in, 10)
+    results = [result.resource_id for result in hs.search(page_size=4, read_ahead=read_ahead)]
+    assert results == [str(i) for i in range(10)]
+    paths = [request.path for request in stand_in.requests]
+    assert len(paths) == 3
+    assert all("count=4" in path for path in paths)
+
+
+def test_search_read_ahead_keeps_order(stand_in, hs):
+    # later pages are answered first, results still come back in page order
+    search_route(stand_in, 20, delay=lambda page: threading.Event().wait(0.05 * (6 - page)))
+    results = [result.resource_id for result in hs.search(page_size=4, read_ahead=4)]
+    assert results == [str(i) for i in range(20)]
+
+
+def test_search_read_ahead_is_bounded(stand_in, hs):
+    peak = search_route(stand_in, 30, delay=lambda page: threading.Event().wait(0.02))
+    results = [result.resource_id for result in hs.search(page_size=3, read_ahead=2)]
+    assert results == [str(i) for i in range(30)]
+    assert max(peak) <= 2
+
+
+def test_search_read_ahead_follows_next_links(stand_in, hs):
+    search_route(stand_in, 7, report_count=False)
+    results = [result.resource_id for result in hs.search(page_size=3, read_ahead=2)]
+    assert results == [str(i) for i in range(7)]
+    assert len(stand_in.requests) == 3
+
+
+def test_search_stops_early(stand_in, hs):
+    search_route(stand_in, 30)
+    search = hs.search(page_size=3, read_ahead=2)
+    assert next(search).resource_id == "0"
+    search.close()
+    # the first page plus at most read_ahead pages were requested
+    assert len(stand_in.requests) <= 3
+
+
+def catalog_route(stand_in):
+    results = [
+        {
+            "resource_id": "a",
+            "resource_title": "first",
+            "authors": ["Black, Scott"],
+            "date_created": "2021-05-11T18:51:53.041587Z",
+            "date_last_updated": "2021-05-12T10:00:00Z",
+            "public": True,
+            "coverages": [
+                {"type": "box", "value": {"northlimit": 42.0, "southlimit": 41.0, "units": "Decimal degrees"}}
+            ],
+            "unknown": "dropped",
+        },
+        {"resource_id": "b", "authors": None, "date_created": None, "public": None, "coverages": []},
+    ]
+    body = {"count": 2, "next": None, "results": results}
+    stand_in.route("GET", "/hsapi/resource", lambda request: (200, {}, json.dumps(body).encode()))
+
+
+def test_search_dataframe(stand_in, hs):
+    catalog_route(stand_in)
+    df = hs.search_dataframe(subject=["a"], page_size=10)
+    assert list(df["resource_id"]) == ["a", "b"]
+    assert isinstance(df["date_created"].dtype, pandas.DatetimeTZDtype)
+    assert df["date_created"][0].year == 2021
+    assert df["date_created"].isna()[1]
+    assert df["public"].dtype == "boolean"
+    assert df["authors"].tolist() == [["Black, Scott"], []]
+    assert df["coverage_box_northlimit"].dtype == "float64"
+    assert df["coverage_box_northlimit"][0] == 42.0
+    assert df["coverage_box_units"][0] == "Decimal degrees"
+    assert "unknown" not in df.columns
+    assert "subject=a" in stand_in.requests[0].path and "count=10" in stand_in.requests[0].path
+
+
+def test_search_arrow(stand_in, hs):
+    catalog_route(stand_in)
+    table = hs.search_arrow()
+    assert table.column("resource_id").to_pylist() == ["a", "b"]
+    assert table.schema.field("authors").type == pyarrow.list_(pyarrow.string())
+    assert pyarrow.types.is_timestamp(table.schema.field("date_created").type)
+
+
+def test_search_without_validation(stand_in, hs):
+    catalog_route(stand_in)
+    validated = list(hs.search())
+    constructed = list(hs.search(validate=False))
+    assert [result.authors for result in constructed] == [["Black, Scott"], []]
+    assert [result.authors for result in validated] == [["Black, Scott"], []]
+    assert constructed[0].resource_title == validated[0].resource_title == "first"
+    assert not hasattr(constructed[0], "unknown")
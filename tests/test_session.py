@@ -0,0 +1,56 @@
+import pytest
+from conftest import RESOURCE_ID
+
+from hsclient import HydroShare, HydroShareHTTPError
+
+
+def flaky_route(statuses):
+    """Answers with each of statuses in turn, then with 200"""
+    requests = []
+
+    def route(request):
+        requests.append(request)
+        status = statuses[len(requests) - 1] if len(requests) <= len(statuses) else 200
+        return status, {"Retry-After": "0"}, b"{}"
+
+    return route, requests
+
+
+def hydroshare(stand_in, **kwargs):
+    return HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, **kwargs)
+
+
+def test_idempotent_requests_are_retried(stand_in):
+    route, requests = flaky_route([503, 429, 502])
+    stand_in.route("GET", "/hsapi/userInfo", route)
+    hs = hydroshare(stand_in, backoff_factor=0)
+    hs._hs_session.get("/hsapi/userInfo/", status_code=200)
+    assert len(requests) == 4
+    assert hs.request_stats() == {"requests": 1, "retries": 3}
+
+
+def test_retries_are_bounded(stand_in):
+    route, requests = flaky_route([503] * 10)
+    stand_in.route("DELETE", f"/hsapi/resource/{RESOURCE_ID}", route)
+    hs = hydroshare(stand_in, max_retries=2, backoff_factor=0)
+    with pytest.raises(HydroShareHTTPError) as error:
+        hs._hs_session.delete(f"/hsapi/resource/{RESOURCE_ID}/", status_code=204)
+    assert error.value.status_code == 503
+    assert error.value.method == "DELETE"
+    assert len(requests) == 3
+
+
+def test_posts_are_not_retried(stand_in):
+    route, requests = flaky_route([503])
+    stand_in.route("POST", "/hsapi/resource", route)
+    hs = hydroshare(stand_in, backoff_factor=0)
+    with pytest.raises(HydroShareHTTPError):
+        hs._hs_session.post("/hsapi/resource/", status_code=201)
+    assert len(requests) == 1
+
+
+def test_adapter_configuration(stand_in):
+    hs = hydroshare(stand_in, pool_maxsize=64, timeout=(1, 5))
+    adapter = hs._hs_session._session.get_adapter("http://127.0.0.1/")
+    assert adapter._pool_maxsize == 64
+    assert adapter.timeout == (1, 5)
@@ -0,0 +1,120 @@
+import io
+import os
+import re
+import threading
+import zipfile
+
+import pytest
+from conftest import RESOURCE_ID
+
+from hsclient import HydroShare
+from hsclient.streaming import MultipartEncoder, stream_zip
+
+hsapi = f"/hsapi/resource/{RESOURCE_ID}"
+
+
+def parse_multipart(request):
+    """Parses the file parts of a multipart/form-data request into a dictionary of filenames to contents"""
+    boundary = request.headers["Content-Type"].split("boundary=", 1)[1].encode()
+    parts = {}
+    for part in request.body.split(b"--" + boundary)[1:-1]:
+        headers, content = part.split(b"\r\n\r\n", 1)
+        filename = re.search(rb'filename="([^"]*)"', headers).group(1).decode()
+        parts[filename] = content[: -len(b"\r\n")]
+    assert request.body.endswith(b"--" + boundary + b"--\r\n")
+    return parts
+
+
+def test_multipart_upload(stand_in, tmp_path):
+    stand_in.route("POST", f"{hsapi}/files", lambda request: (201, {}, b""))
+    file = tmp_path / "données é.txt"
+    file.write_bytes(b"\x00binary\r\n--content" * 1000)
+    progress = []
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    res.file_upload(str(file), progress_callback=lambda *args: progress.append(args))
+
+    request = next(request for request in stand_in.requests if request.command == "POST")
+    assert parse_multipart(request) == {"données é.txt": file.read_bytes()}
+    assert int(request.headers["Content-Length"]) == len(request.body)
+    sent, total, rate = progress[-1]
+    assert sent == total == len(request.body)
+    assert rate > 0
+
+
+def test_multipart_known_length(tmp_path):
+    file = tmp_path / "file.txt"
+    file.write_bytes(b"x" * 100000)
+    with open(file, "rb") as f:
+        encoder = MultipartEncoder({"file": f, "text": ("text.txt", "text"), "bytes": ("bytes.bin", b"\x01\x02")})
+        body = encoder.read()
+    assert encoder.len == len(body)
+    assert encoder.read(10) == b""
+
+
+def test_multipart_iterable_part_is_chunked(stand_in):
+    stand_in.route("POST", f"{hsapi}/files", lambda request: (201, {}, b""))
+    progress = []
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    content = [b"first ", b"second ", b"third"]
+    hs._hs_session.upload_file(
+        f"{hsapi}/files",
+        files={"file": ("streamed.txt", iter(content))},
+        status_code=201,
+        progress_callback=lambda *args: progress.append(args),
+    )
+    request = stand_in.requests[-1]
+    assert request.headers["Transfer-Encoding"] == "chunked"
+    assert "Content-Length" not in request.headers
+    assert parse_multipart(request) == {"streamed.txt": b"".join(content)}
+    sent, total, _ = progress[-1]
+    assert (sent, total) == (len(request.body), None)
+
+
+def test_multipart_reads_in_pieces():
+    encoder = MultipartEncoder({"file": ("file.bin", io.BytesIO(os.urandom(200000)))})
+    pieces = list(iter(lambda: encoder.read(1000), b""))
+    assert all(len(piece) == 1000 for piece in pieces[:-1])
+    assert sum(len(piece) for piece in pieces) == encoder.len
+
+
+@pytest.fixture()
+def zip_inputs(tmp_path):
+    files = []
+    for name, content in [("a.txt", b"a" * 100000), ("b.bin", os.urandom(50000))]:
+        (tmp_path / name).write_bytes(content)
+        files.append(str(tmp_path / name))
+    return files
+
+
+def test_stream_zip_round_trip(zip_inputs):
+    archive = b"".join(stream_zip(zip_inputs, compression_level=6, chunk_size=1000, max_chunks=2))
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipped:
+        assert zipped.namelist() == ["a.txt", "b.bin"]
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in zipped.infolist())
+        for file in zip_inputs:
+            with open(file, "rb") as f:
+                assert zipped.read(os.path.basename(file)) == f.read()
+
+
+def test_stream_zip_stored(zip_inputs):
+    for compression_level in [None, 0]:
+        archive = b"".join(stream_zip(zip_inputs, compression_level=compression_level))
+        with zipfile.ZipFile(io.BytesIO(archive)) as zipped:
+            assert all(info.compress_type == zipfile.ZIP_STORED for info in zipped.infolist())
+            assert zipped.read("a.txt") == b"a" * 100000
+
+
+def test_stream_zip_reraises_producer_errors(zip_inputs, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        b"".join(stream_zip(zip_inputs + [str(tmp_path / "missing.txt")]))
+
+
+def test_stream_zip_close_stops_producer(zip_inputs):
+    threads = set(threading.enumerate())
+    chunks = stream_zip(zip_inputs, compression_level=0, chunk_size=100, max_chunks=1)
+    assert next(chunks)
+    producers = set(threading.enumerate()) - threads
+    assert producers
+    chunks.close()
+    assert not any(producer.is_alive() for producer in producers)
@@ -0,0 +1,147 @@
+import os
+
+import pytest
+from conftest import RESOURCE_ID
+
+from hsclient import HydroShare
+from hsclient.sync import STATE_FILE, LocalState, path_filter, plan_sync
+
+hsapi = f"/hsapi/resource/{RESOURCE_ID}"
+remote_files = ["folder/another.txt", "other.txt", "test.xml"]
+
+
+def test_plan_push_and_pull():
+    local = {"same.txt": "a", "changed.txt": "b", "local.txt": "c"}
+    remote = {"same.txt": "a", "changed.txt": "x", "remote.txt": "d"}
+    plan = plan_sync(local, remote, {}, "push", delete=True)
+    assert plan.upload == ["changed.txt", "local.txt"]
+    assert plan.delete_remote == ["remote.txt"]
+    assert plan.download == plan.delete_local == []
+
+    plan = plan_sync(local, remote, {}, "pull", delete=False)
+    assert plan.download == ["changed.txt", "remote.txt"]
+    assert plan.upload == plan.delete_local == []
+
+    with pytest.raises(ValueError):
+        plan_sync(local, remote, {}, "sideways", delete=False)
+
+
+def test_plan_both():
+    synced = {"local_edit.txt": "a", "remote_edit.txt": "a", "both_edit.txt": "a", "local_delete.txt": "a"}
+    local = {"local_edit.txt": "b", "remote_edit.txt": "a", "both_edit.txt": "b", "new_local.txt": "n"}
+    remote = {
+        "local_edit.txt": "a",
+        "remote_edit.txt": "c",
+        "both_edit.txt": "c",
+        "local_delete.txt": "a",
+        "new_remote.txt": "m",
+    }
+    plan = plan_sync(local, remote, synced, "both", delete=True)
+    assert plan.upload == ["local_edit.txt", "new_local.txt"]
+    assert plan.download == ["new_remote.txt", "remote_edit.txt"]
+    assert plan.delete_remote == ["local_delete.txt"]
+    assert plan.conflicts == ["both_edit.txt"]
+
+
+def test_local_state_caches_checksums(tmp_path):
+    (tmp_path / "folder").mkdir()
+    (tmp_path / "folder" / "file.txt").write_bytes(b"hello")
+    state = LocalState(str(tmp_path))
+    assert state.checksums() == {"folder/file.txt": "5d41402abc4b2a76b9719d911017c592"}
+    state.save()
+
+    state = LocalState(str(tmp_path))
+    state.chunk_size = None  # reading the file again would fail
+    assert state.checksums() == {"folder/file.txt": "5d41402abc4b2a76b9719d911017c592"}
+
+
+def test_sync_pull_then_push(stand_in, tmp_path):
+    for path in ["files", "files/folder", "files/new"]:
+        stand_in.route("POST", f"{hsapi}/{path}", lambda request: (201, {}, b""))
+    stand_in.route("PUT", f"{hsapi}/folders/new", lambda request: (201, {}, b""))
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+
+    result = res.sync(str(tmp_path), direction="pull")
+    assert sorted(result["downloaded"]) == remote_files
+    assert not result["errors"]
+    assert os.path.exists(tmp_path / "folder" / "another.txt")
+    assert os.path.exists(tmp_path / STATE_FILE)
+
+    assert res.sync(str(tmp_path), direction="both")["downloaded"] == []
+
+    stand_in.requests.clear()
+    (tmp_path / "other.txt").write_text("changed")
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "file.txt").write_text("new")
+    result = res.sync(str(tmp_path), direction="push")
+    assert sorted(result["uploaded"]) == ["new/file.txt", "other.txt"]
+    assert not result["errors"]
+    requests = [(request.command, request.path.rstrip("/")) for request in stand_in.requests]
+    assert ("PUT", f"{hsapi}/folders/new") in requests
+    assert not [path for command, path in requests if command == "GET" and "/data/contents/" in path]
+
+
+def test_path_filter():
+    matches = path_filter()
+    assert matches("folder/file.txt")
+    assert not matches("test_meta.xml") and not matches("folder/test_resmap.xml")
+    assert not matches(".git/config") and not matches("folder/.ipynb_checkpoints/a.ipynb")
+    assert not matches("file.txt.part") and not matches("file.txt.part.etag")
+    notebooks = path_filter(include=["*.ipynb"])
+    assert notebooks("a.ipynb") and not notebooks("folder/a.ipynb") and not notebooks("a.py")
+    assert path_filter(include=["**/*.ipynb"])("folder/a.ipynb")
+    assert path_filter(exclude=())("test_meta.xml")
+
+
+def test_sync_skips_hidden_and_generated_files(stand_in, tmp_path):
+    stand_in.route("POST", f"{hsapi}/files", lambda request: (201, {}, b""))
+    for path in [".git/config", ".ipynb_checkpoints/a.ipynb", "a.ipynb.part", "notes_meta.xml", "folder/a.ipynb"]:
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        (tmp_path / path).write_text("local")
+    (tmp_path / "a.ipynb").write_text("notebook")
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    result = res.sync(str(tmp_path), direction="push", include=["*.ipynb"], delete=True)
+    assert result["uploaded"] == ["a.ipynb"]
+    assert result["deleted_remote"] == []
+    assert not result["errors"]
+
+
+def test_sync_records_folder_and_delete_errors(stand_in, tmp_path, monkeypatch):
+    stand_in.route("PUT", f"{hsapi}/folders/new", lambda request: (403, {}, b"permission denied"))
+    stand_in.route("PUT", f"{hsapi}/folders/existing", lambda request: (400, {}, b"Folder already exists"))
+    stand_in.route("POST", f"{hsapi}/files/existing", lambda request: (201, {}, b""))
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    res.sync(str(tmp_path), direction="pull")
+
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new" / "file.txt").write_text("new")
+    (tmp_path / "existing").mkdir()
+    (tmp_path / "existing" / "file.txt").write_text("existing")
+    result = res.sync(str(tmp_path), direction="push")
+    assert result["uploaded"] == ["existing/file.txt"]
+    assert sorted(result["errors"]) == ["new", "new/file.txt"]
+    assert result["errors"]["new"].status_code == 403
+
+
+def test_sync_records_local_delete_errors(stand_in, tmp_path, monkeypatch):
+    (tmp_path / "locked.txt").write_text("locked")
+    (tmp_path / "stale.txt").write_text("stale")
+    remove = os.remove
+
+    def remove_unless_locked(path):
+        if path.endswith("locked.txt"):
+            raise PermissionError(path)
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", remove_unless_locked)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    res = hs.resource(RESOURCE_ID)
+    result = res.sync(str(tmp_path), direction="pull", delete=True)
+    assert sorted(result["downloaded"]) == remote_files
+    assert result["deleted_local"] == ["stale.txt"]
+    assert isinstance(result["errors"]["locked.txt"], PermissionError)
+    # the downloads are recorded in the state despite the failed delete
+    assert LocalState(str(tmp_path)).synced.keys() >= set(remote_files)
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import time
+import zipfile
+from itertools import islice
+
+import pytest
+from conftest import RESOURCE_ID
+
+from hsclient import HydroShare, HydroShareTaskError
+from hsclient.tasks import TaskPoller
+from hsclient.utils import backoff_delays
+
+
+def zip_route(stand_in, folder, polls_until_ready, status="true"):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zipped:
+        zipped.writestr(f"{folder}/file.txt", folder)
+    polls = []
+
+    def task_status(request):
+        polls.append(request)
+        return 200, {}, json.dumps({"status": status if len(polls) >= polls_until_ready else "false"}).encode()
+
+    stand_in.route(
+        "GET",
+        f"/resource/{RESOURCE_ID}/data/contents/{folder}",
+        lambda request: (
+            200,
+            {},
+            json.dumps({"task_id": folder, "download_path": f"/zips/{folder}.zip", "zip_status": "Not ready"}).encode(),
+        ),
+    )
+    stand_in.route("GET", f"/hsapi/taskstatus/{folder}", task_status)
+    stand_in.route("GET", f"/zips/{folder}.zip", archive.getvalue())
+    return polls
+
+
+def test_backoff_delays():
+    delays = list(islice(backoff_delays(initial=1, maximum=8, jitter=0), 6))
+    assert delays == [1, 2, 4, 8, 8, 8]
+    assert all(0.75 <= delay <= 1.25 for delay in islice(backoff_delays(initial=1, maximum=1), 100))
+
+
+def test_folders_download(stand_in, tmp_path):
+    polls = {folder: zip_route(stand_in, folder, i + 1) for i, folder in enumerate(["a", "b", "c"])}
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    hs._hs_session._task_poller = TaskPoller(hs._hs_session, initial_delay=0.01, max_delay=0.05)
+    res = hs.resource(RESOURCE_ID)
+    futures = res.folders_download("a", "b", "c", save_path=str(tmp_path))
+    downloaded = {folder: future.result(timeout=10) for folder, future in futures.items()}
+    assert {folder: os.path.basename(path) for folder, path in downloaded.items()} == {
+        "a": "a.zip",
+        "b": "b.zip",
+        "c": "c.zip",
+    }
+    assert {folder: len(requests) for folder, requests in polls.items()} == {"a": 1, "b": 2, "c": 3}
+
+
+def test_submit_zip_timeout(stand_in, tmp_path):
+    zip_route(stand_in, "never", 1000)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    poller = TaskPoller(hs._hs_session, initial_delay=0.01, max_delay=0.01)
+    future = poller.submit_zip(f"/resource/{RESOURCE_ID}/data/contents/never", str(tmp_path), timeout=0.1)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=10)
+    poller.shutdown()
+
+
+def test_retrieve_zip_timeout(stand_in, tmp_path):
+    polls = zip_route(stand_in, "never", 1000)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    with pytest.raises(TimeoutError):
+        hs._hs_session.retrieve_zip(f"/resource/{RESOURCE_ID}/data/contents/never", str(tmp_path), timeout=0.1)
+    # the backoff is cut short to poll once more at the deadline
+    assert len(polls) == 2
+
+
+def test_failed_task(stand_in, tmp_path):
+    zip_route(stand_in, "failed", 2, status="Failed")
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    path = f"/resource/{RESOURCE_ID}/data/contents/failed"
+    with pytest.raises(HydroShareTaskError, match="failed with status Failed"):
+        hs._hs_session.retrieve_zip(path, str(tmp_path))
+
+    poller = TaskPoller(hs._hs_session, initial_delay=0.01, max_delay=0.01)
+    with pytest.raises(HydroShareTaskError):
+        poller.submit_zip(path, str(tmp_path)).result(timeout=10)
+    poller.shutdown()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_close_shuts_down_task_poller(stand_in, tmp_path):
+    zip_route(stand_in, "a", 2)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    hs._hs_session._task_poller = poller = TaskPoller(hs._hs_session, initial_delay=0.01, max_delay=0.01)
+    future = hs._hs_session.submit_zip(f"/resource/{RESOURCE_ID}/data/contents/a", str(tmp_path))
+    assert os.path.basename(future.result(timeout=10)) == "a.zip"
+    hs.close()
+    assert hs._hs_session._task_poller is None
+    with pytest.raises(RuntimeError):
+        poller.submit_zip(f"/resource/{RESOURCE_ID}/data/contents/a", str(tmp_path))
+
+
+def test_close_waits_for_zips_being_polled(stand_in, tmp_path):
+    polls = zip_route(stand_in, "a", 5)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    hs._hs_session._task_poller = TaskPoller(hs._hs_session, initial_delay=0.05, max_delay=0.05)
+    future = hs._hs_session.submit_zip(f"/resource/{RESOURCE_ID}/data/contents/a", str(tmp_path))
+    while not polls:
+        time.sleep(0.01)
+    hs.close()
+    assert future.done()
+    assert os.path.basename(future.result()) == "a.zip"
+    assert len(polls) == 5
+
+
+def test_shutdown_without_waiting_fails_zips_being_polled(stand_in, tmp_path):
+    polls = zip_route(stand_in, "never", 1000)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    poller = TaskPoller(hs._hs_session, initial_delay=0.05, max_delay=0.05)
+    future = poller.submit_zip(f"/resource/{RESOURCE_ID}/data/contents/never", str(tmp_path))
+    while not polls:
+        time.sleep(0.01)
+    poller.shutdown(wait=False)
+    with pytest.raises(RuntimeError, match="shut down"):
+        future.result(timeout=10)
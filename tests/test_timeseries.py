@@ -0,0 +1,286 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import zipfile
+
+import pandas
+import pytest
+from conftest import RESOURCE_ID, metadata_dir
+
+from hsclient import HydroShare
+from hsclient.hydroshare import Aggregation, _connect_read_only, _timeseries_frames
+from hsclient.remote import RangeReader
+
+TIMESERIES_ID = "e013dae505e647378dfc7d1662170e20"
+SQLITE = "ODM2_Multi_Site_One_Variable.sqlite"
+contents = f"/resource/{TIMESERIES_ID}/data/contents"
+
+
+def timeseries_resource_map() -> bytes:
+    """The resource map of the single file aggregation of the test resource, rewritten for the time series"""
+    with open(os.path.join(metadata_dir, "test_resmap.xml")) as f:
+        resource_map = f.read()
+    for old, new in [
+        (RESOURCE_ID, TIMESERIES_ID),
+        ("test_resmap.xml", "ODM2_Multi_Site_One_Variable_resmap.xml"),
+        ("test_meta.xml", "ODM2_Multi_Site_One_Variable_meta.xml"),
+        ("test.xml", SQLITE),
+        ("SingleFileAggregation", "TimeSeriesAggregation"),
+    ]:
+        resource_map = resource_map.replace(old, new)
+    return resource_map.encode()
+
+
+def timeseries_routes(stand_in, sqlite_content):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zipped:
+        zipped.writestr(f"{SQLITE}/{SQLITE}", sqlite_content)
+    downloads = []
+
+    def rest_download(request):
+        downloads.append(request)
+        body = {"task_id": "task", "download_path": "/zips/timeseries.zip", "zip_status": "Ready"}
+        return 200, {}, json.dumps(body).encode()
+
+    stand_in.route("GET", f"{contents}/ODM2_Multi_Site_One_Variable_resmap.xml", timeseries_resource_map())
+    meta = "ODM2_Multi_Site_One_Variable_meta.xml"
+    stand_in.route("GET", f"{contents}/{meta}", os.path.join(metadata_dir, meta))
+    stand_in.route("GET", f"/django_irods/rest_download/{TIMESERIES_ID}/data/contents/{SQLITE}", rest_download)
+    stand_in.route("GET", "/zips/timeseries.zip", archive.getvalue())
+    return downloads
+
+
+def timeseries_aggregation(hs, sqlite_content):
+    checksums = {f"data/contents/{SQLITE}": hashlib.md5(sqlite_content).digest()}
+    return Aggregation(f"{contents}/ODM2_Multi_Site_One_Variable_resmap.xml", hs._hs_session, checksums)
+
+
+@pytest.fixture()
+def sqlite_content():
+    with open(os.path.join(metadata_dir, SQLITE), "rb") as f:
+        return f.read()
+
+
+def test_as_series_caches_sqlite(stand_in, sqlite_content, tmp_path):
+    downloads = timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, cache_dir=str(tmp_path))
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    assert len(aggregation.as_series("2837b7d9-1ebc-11e6-a16e-f45c8999816f")) == 1333
+    assert len(aggregation.as_series("3b9037f8-1ebc-11e6-a304-f45c8999816f")) == 1440
+    assert len(downloads) == 1
+
+    # a new session finds the sqlite file in cache_dir by its checksum
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, cache_dir=str(tmp_path))
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    cached = aggregation._timeseries_file()
+    assert len(downloads) == 1
+    assert os.path.dirname(cached) == str(tmp_path / "timeseries")
+    with open(cached, "rb") as f:
+        assert f.read() == sqlite_content
+
+
+def test_as_series_without_checksum_is_not_cached(stand_in, sqlite_content, tmp_path):
+    downloads = timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port, cache_dir=str(tmp_path))
+    no_checksums = {f"data/contents/{SQLITE}": None}
+    aggregation = Aggregation(f"{contents}/ODM2_Multi_Site_One_Variable_resmap.xml", hs._hs_session, no_checksums)
+    assert len(aggregation.as_series("2837b7d9-1ebc-11e6-a16e-f45c8999816f")) == 1333
+    assert len(aggregation.as_series("3b9037f8-1ebc-11e6-a304-f45c8999816f")) == 1440
+    assert len(downloads) == 1
+    cache = hs._hs_session.timeseries_cache
+    assert cache.get(hashlib.md5(sqlite_content).hexdigest()) is None
+    assert os.listdir(cache.directory) == ["index.sqlite"]
+
+    # the download is kept with the aggregation until it is refreshed
+    aggregation.refresh()
+    aggregation._parsed_checksums = no_checksums
+    with open(aggregation._timeseries_file(), "rb") as f:
+        assert f.read() == sqlite_content
+    assert len(downloads) == 2
+
+
+def test_as_series_cache_is_bounded(stand_in, sqlite_content):
+    downloads = timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(
+        host="127.0.0.1", protocol="http", port=stand_in.port, timeseries_cache_max_bytes=len(sqlite_content)
+    )
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    aggregation.as_series("2837b7d9-1ebc-11e6-a16e-f45c8999816f")
+    cache = hs._hs_session.timeseries_cache
+    cache.put("other", [b"x"])
+    assert cache.get(hashlib.md5(sqlite_content).hexdigest()) is None
+    aggregation.as_series("2837b7d9-1ebc-11e6-a16e-f45c8999816f")
+    assert len(downloads) == 2
+
+
+def test_as_series_opens_read_only(stand_in, sqlite_content):
+    timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    con = _connect_read_only(aggregation._timeseries_file())
+    with pytest.raises(sqlite3.OperationalError):
+        con.execute("DELETE FROM TimeSeriesResultValues")
+    con.close()
+    with open(aggregation._timeseries_file(), "rb") as f:
+        assert f.read() == sqlite_content
+
+
+def test_as_dataframe(stand_in, sqlite_content):
+    downloads = timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    series_ids = ["2837b7d9-1ebc-11e6-a16e-f45c8999816f", "3b9037f8-1ebc-11e6-a304-f45c8999816f"]
+    df = aggregation.as_dataframe(series_ids)
+    assert list(df.columns) == series_ids
+    assert df.index.name == "ValueDateTime"
+    assert str(df.index.dtype).startswith("datetime64")
+    assert all(dtype == "float64" for dtype in df.dtypes)
+    assert len(df) == 1440
+    assert df[series_ids[0]].count() == 1333
+    series = aggregation.as_series(series_ids[0])
+    assert list(df[series_ids[0]].dropna()) == list(series.sort_values("ValueDateTime")["DataValue"])
+
+    assert aggregation.as_dataframe().shape == (1440, 7)
+    assert len(downloads) == 1
+
+
+def test_as_dataframe_chunks(stand_in, sqlite_content):
+    timeseries_routes(stand_in, sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    whole = aggregation.as_dataframe()
+    chunks = list(aggregation.as_dataframe(chunksize=1000))
+    assert len(chunks) > 1
+    assert all(len(chunk.index) == len(set(chunk.index)) for chunk in chunks)
+    assert pandas.concat(chunks).equals(whole)
+
+
+def timeseries_database(path, values):
+    """Writes a sqlite file with the (ResultUUID, ValueDateTime, ValueDateTimeUTCOffset, DataValue) values"""
+    con = sqlite3.connect(str(path))
+    con.execute("CREATE TABLE Results (ResultID INTEGER PRIMARY KEY, ResultUUID VARCHAR)")
+    con.execute(
+        "CREATE TABLE TimeSeriesResultValues "
+        "(ResultID INTEGER, DataValue FLOAT, ValueDateTime DATETIME, ValueDateTimeUTCOffset INTEGER)"
+    )
+    for series_id in sorted({value[0] for value in values}):
+        con.execute("INSERT INTO Results (ResultUUID) VALUES (?)", (series_id,))
+    con.executemany(
+        "INSERT INTO TimeSeriesResultValues SELECT ResultID, ?, ?, ? FROM Results WHERE ResultUUID = ?",
+        [(value, time, offset, series_id) for series_id, time, offset, value in values],
+    )
+    con.commit()
+    con.close()
+    return lambda: sqlite3.connect(str(path))
+
+
+def test_as_dataframe_aligns_on_utc(tmp_path):
+    connect = timeseries_database(
+        tmp_path / "series.sqlite",
+        [
+            ("denver", "2008-01-01 00:00:00", -7, 1.0),
+            ("denver", "2008-01-01 01:00:00", -7, 2.0),
+            ("newyork", "2008-01-01 02:00:00", -5, 3.0),
+            ("newyork", "2008-01-01 03:00:00", -5, 4.0),
+        ],
+    )
+    df = next(_timeseries_frames(connect, None, None))
+    assert str(df.index.tz) == "UTC"
+    assert list(df.index) == list(pandas.to_datetime(["2008-01-01 07:00", "2008-01-01 08:00"], utc=True))
+    assert df.to_dict("list") == {"denver": [1.0, 2.0], "newyork": [3.0, 4.0]}
+    chunks = list(_timeseries_frames(connect, None, 1))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+
+
+def test_as_dataframe_rejects_duplicate_times(tmp_path):
+    connect = timeseries_database(
+        tmp_path / "series.sqlite",
+        [("denver", "2008-01-01 00:00:00", -7, 1.0), ("denver", "2008-01-01 00:00:00", -7, 2.0)],
+    )
+    with pytest.raises(ValueError, match="denver has more than one value at 2008-01-01 07:00:00"):
+        next(_timeseries_frames(connect, None, None))
+
+
+def test_as_dataframe_many_series(tmp_path):
+    series_ids = [f"series-{i:04}" for i in range(1500)]
+    connect = timeseries_database(
+        tmp_path / "series.sqlite",
+        [(series_id, f"2008-01-01 0{i % 3}:00:00", 0, float(i)) for i, series_id in enumerate(series_ids)],
+    )
+
+    def limited_connect():
+        con = connect()
+        if hasattr(con, "setlimit"):
+            con.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        return con
+
+    whole = next(_timeseries_frames(limited_connect, None, None))
+    assert whole.shape == (3, 1500)
+    selected = next(_timeseries_frames(limited_connect, series_ids[::-1], None))
+    assert list(selected.columns) == series_ids[::-1]
+    assert selected[series_ids].equals(whole)
+    chunks = list(_timeseries_frames(limited_connect, series_ids, 100))
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+
+
+def test_range_reader(stand_in, sqlite_content):
+    stand_in.route("GET", f"{contents}/{SQLITE}", sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    reader = RangeReader(hs._hs_session, f"{contents}/{SQLITE}", block_size=4096, cache_blocks=4)
+    assert reader.size == len(sqlite_content)
+    assert reader.read(100, 4000) == sqlite_content[4000:4100]
+    assert reader.read(8192, 8192) == sqlite_content[8192:16384]
+    assert reader.stats["requests"] == 3
+    # block 3 is cached and the two missing blocks after it are requested at once
+    assert reader.read(4096 * 3, 4096 * 3) == sqlite_content[4096 * 3 : 4096 * 6]
+    assert reader.stats["requests"] == 4
+    assert reader.stats["hits"] == 2
+    # only the last 4 blocks are kept
+    assert reader.read(10, 0) == sqlite_content[:10]
+    assert reader.stats["requests"] == 5
+    assert reader.read(10, len(sqlite_content) - 4) == sqlite_content[-4:]
+    assert reader.stats["bytes"] < len(sqlite_content)
+
+    stand_in.route("GET", f"{contents}/{SQLITE}", b"changed" + sqlite_content)
+    with pytest.raises(OSError):
+        reader.read(4096, 4096 * 10)
+
+
+def test_remote_queries(stand_in, sqlite_content):
+    downloads = timeseries_routes(stand_in, sqlite_content)
+    stand_in.route("GET", f"{contents}/{SQLITE}", sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    series_id = "2837b7d9-1ebc-11e6-a16e-f45c8999816f"
+    series = aggregation.as_series(series_id, remote=True)
+    assert len(series) == 1333
+    df = aggregation.as_dataframe([series_id], remote=True)
+    assert df.equals(aggregation.as_dataframe([series_id], agg_path=metadata_dir))
+    assert not downloads
+    stats = aggregation._remote_reader.stats
+    assert stats["requests"] > 1
+    assert stats["hits"] > 0
+    assert stats["bytes"] < len(sqlite_content)
+
+
+def test_range_reader_empty_file(stand_in):
+    stand_in.route("GET", f"{contents}/empty.sqlite", b"")
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    reader = RangeReader(hs._hs_session, f"{contents}/empty.sqlite")
+    assert reader.size == 0
+    assert reader.read(100, 0) == b""
+
+
+def test_remote_requires_apsw(stand_in, sqlite_content, monkeypatch):
+    monkeypatch.setattr("hsclient.remote.apsw", None)
+    timeseries_routes(stand_in, sqlite_content)
+    stand_in.route("GET", f"{contents}/{SQLITE}", sqlite_content)
+    hs = HydroShare(host="127.0.0.1", protocol="http", port=stand_in.port)
+    aggregation = timeseries_aggregation(hs, sqlite_content)
+    aggregation.files()
+    stand_in.requests.clear()
+    with pytest.raises(ImportError):
+        aggregation.as_series("2837b7d9-1ebc-11e6-a16e-f45c8999816f", remote=True)
+    assert not stand_in.requests
@@ -0,0 +1,54 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from hsclient.utils import attribute_filter, compile_filter
+
+
+def metadata(**kwargs):
+    defaults = dict(
+        title="Temperature",
+        subjects=["a", "b"],
+        additional_metadata={"key": "value"},
+        period_coverage=SimpleNamespace(start=datetime(2020, 1, 1), end=None),
+    )
+    defaults.update(kwargs)
+    return SimpleNamespace(**defaults)
+
+
+def test_compile_filter_matches_attribute_filter():
+    o = metadata()
+    for key, value in [
+        ("title", "Temperature"),
+        ("title", "bad"),
+        ("subjects__contains", "a"),
+        ("subjects__contains", "c"),
+        ("additional_metadata__key", "key"),
+        ("additional_metadata__value", "value"),
+        ("additional_metadata__value", "key"),
+        ("period_coverage__start", datetime(2020, 1, 1)),
+        ("missing", None),
+        ("missing__nested", None),
+    ]:
+        assert compile_filter(**{key: value})(o) == bool(attribute_filter(o, key, value)), key
+
+
+def test_compile_filter_operators():
+    o = metadata()
+    assert compile_filter(title__in=["Temperature", "Flow"])(o)
+    assert not compile_filter(title__in=["Flow"])(o)
+    assert compile_filter(title__startswith="Temp", title__endswith="ture")(o)
+    assert compile_filter(title__regex="^temp|Temp")(o)
+    assert not compile_filter(title__regex="^Flow")(o)
+    assert compile_filter(period_coverage__start__gt="2019-12-31")(o)
+    assert compile_filter(period_coverage__start__gte=datetime(2020, 1, 1))(o)
+    assert not compile_filter(period_coverage__start__lt="2020-01-01")(o)
+    assert compile_filter(period_coverage__start__lte="2020-01-01T00:00:00")(o)
+    assert not compile_filter(period_coverage__end__gt="2020-01-01")(o)
+    assert not compile_filter(title__gt=1)(o)
+    with pytest.raises(ValueError, match="period_coverage__start__gt: 'last year' is not an ISO formatted datetime"):
+        compile_filter(period_coverage__start__gt="last year")(o)
+    assert not compile_filter(missing__in=[None])(o)
+    assert compile_filter()(o)
+    assert not compile_filter(title="Temperature", subjects__contains="c")(o)